@@ -1,17 +1,28 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-import numpy as np
 import os
+import time
+import hashlib
+import datetime
+import threading
+from collections import OrderedDict
+
+import numpy as np
 
-from core.agents import generate_one_future
+from core.agents import AGENTS, get_client, iter_future_events
 from core.scoring import score_futures
-from core.simulation import simulate_trajectories
+from core.simulation import simulate_monte_carlo
+from core import metrics
+from core.resilience import get_breaker
 
 MINIMAX_MODEL = os.getenv("MINIMAX_MODEL", "MiniMax-M2.5")
 
 st.set_page_config(page_title="Alternate", layout="wide")
 
-AGENT_ORDER = ["Visionary", "Realist", "Capitalist", "Chaos Agent"]
+# Personas come from the registry (core/personas.json or AGENTS_CONFIG)
+AGENT_ORDER = [a["name"] for a in AGENTS]
+AGENT_INFO = {a["name"]: a for a in AGENTS}
+CARDS_PER_ROW = 4
+SIM_PATHS = 2000  # Monte Carlo paths per agent
 
 # ── Custom CSS ────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -198,7 +209,7 @@ html, body, [class*="css"] {
 /* ── Agent Explainer Cards (matches hero aesthetic) ───────────────────────── */
 .model-row{
     display: grid;
-    grid-template-columns: repeat(4, minmax(0, 1fr));
+    grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
     gap: 14px;
     margin: 0.5rem 0 2rem 0;
 }
@@ -257,17 +268,17 @@ html, body, [class*="css"] {
 """, unsafe_allow_html=True)
 
 # ── Hero Section ──────────────────────────────────────────────────────────────
-st.markdown("""
+st.markdown(f"""
 <div class="alt-hero">
     <div class="tagline">⚡ Generative Strategy Engine</div>
     <h1>Alternate</h1>
     <div class="description">
-        Describe a high-stakes scenario. Four ideological agents <strong>Visionary, Realist, Capitalist, Chaos Agent.</strong> Each generating a competing future.<br><br>
+        Describe a high-stakes scenario. {len(AGENT_ORDER)} ideological agents <strong>{', '.join(AGENT_ORDER)}.</strong> Each generating a competing future.<br><br>
         No advice. No consensus. <strong>Parallel realities, battling for dominance.</strong><br>
         Watch their influence curves diverge over time. Only one worldview wins.
     </div>
     <div class="pill-row">
-        <span class="pill">4 Competing Agents</span>
+        <span class="pill">{len(AGENT_ORDER)} Competing Agents</span>
         <span class="pill">Counterfactual Futures</span>
         <span class="pill">Influence Simulation</span>
         <span class="pill">Strategy Packets</span>
@@ -276,29 +287,16 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ── Agent Explainer Cards ─────────────────────────────────────────────────────
-st.markdown("""
-<div class="model-row">
+explainer_cards = "".join(
+    f"""
   <div class="model-card">
-    <div class="model-title">Visionary</div>
-    <div class="model-desc">Thinks in long-term asymmetry and exponential upside, prioritizing bold moves that reshape the narrative.</div>
+    <div class="model-title">{a['name']}</div>
+    <div class="model-desc">{a['description']}</div>
   </div>
-
-  <div class="model-card">
-    <div class="model-title">Realist</div>
-    <div class="model-desc">Optimizes for downside protection, operational feasibility, and survivability under uncertainty.</div>
-  </div>
-
-  <div class="model-card">
-    <div class="model-title">Capitalist</div>
-    <div class="model-desc">Maximizes leverage, optionality, and economic value while negotiating for structural advantage.</div>
-  </div>
-
-  <div class="model-card">
-    <div class="model-title">Chaos Agent</div>
-    <div class="model-desc">Exploits attention, volatility, and asymmetric disruption to force momentum through controlled instability.</div>
-  </div>
-</div>
-""", unsafe_allow_html=True)
+"""
+    for a in AGENTS
+)
+st.markdown(f'<div class="model-row">{explainer_cards}</div>', unsafe_allow_html=True)
 
 # ── Input ─────────────────────────────────────────────────────────────────────
 scenario = st.text_area(
@@ -307,242 +305,427 @@ scenario = st.text_area(
     height=120
 )
 
-if st.button("Run Alternate", type="primary"):
-    if not scenario.strip():
-        st.warning("Type a scenario first.")
-        st.stop()
+AGENT_COLORS = {a["name"]: a["color"] for a in AGENTS}
+
+METRIC_META = {
+    "influence": {
+        "label": "Influence",
+        "desc": "How much this worldview bends the outcome over time. Higher = more dominant.",
+        "color": "#8b5cf6",
+        "max": 2.0,
+    },
+    "stability": {
+        "label": "Stability",
+        "desc": "How structurally sound the strategy is under pressure. Higher = less likely to collapse.",
+        "color": "#22c55e",
+        "max": 1.35,
+    },
+    "risk": {
+        "label": "Risk",
+        "desc": "Exposure to catastrophic failure or backfire. Higher = more volatile.",
+        "color": "#ef4444",
+        "max": 2.0,
+    },
+}
+
+
+def render_card_header(f):
+    """Header, error and narrative — drawn as soon as the agent's future arrives."""
+    agent_name = f.get("name", "Agent")
+    color = AGENT_COLORS.get(agent_name, "#ffffff")
+
+    source_label = f.get("source", "Unknown")
+    if source_label in ("LLM", "MiniMax"):
+        display_source = f"Model: {MINIMAX_MODEL}"
+    elif source_label in ("Fallback", "MOCK"):
+        display_source = "Source: Fallback (mock)"
+        if f.get("meta", {}).get("fail_fast") == "circuit_open":
+            display_source += " · provider paused"
+    else:
+        display_source = f"Source: {source_label}"
+
+    st.markdown(f"""
+    <div class="agent-header">
+        <div class="agent-name" style="border-left: 3px solid {color}; padding-left: 8px;">{agent_name}</div>
+        <div class="agent-source">{display_source}</div>
+    </div>
+    """, unsafe_allow_html=True)
 
-    np.random.seed(42)  # fixed seed — no user control needed
+    if f.get("error"):
+        st.error(f.get("error"))
 
-    # ── Streaming progress (feels faster) ────────────────────────────────────
-    st.divider()
+    narrative = f.get("narrative", "")
     st.markdown(
-        '<p style="font-family: Space Mono, monospace; font-size:0.75rem; color:#8b5cf6; letter-spacing:2px; text-transform:uppercase; margin-bottom:0.6rem;">⏳ Generating parallel futures</p>',
+        f'<p style="color:#9ca3af; font-size:0.88rem; line-height:1.6; margin-bottom:1rem;">{narrative}</p>',
         unsafe_allow_html=True
     )
 
-    progress_text = st.empty()
-    progress_bar = st.progress(0)
 
-    futures = []
-    total = len(AGENT_ORDER)
+def render_card_body(f, s):
+    """Metrics and the full packet — drawn once every agent has been scored."""
+    for key in ["influence", "stability", "risk"]:
+        meta = METRIC_META[key]
+        val = s[key]
+        pct = min(100, int((val / meta["max"]) * 100))
+        st.markdown(f"""
+        <div class="metric-row">
+            <div class="metric-label">{meta['label']}</div>
+            <div class="metric-desc">{meta['desc']}</div>
+            <div class="metric-value">{val:.2f}</div>
+            <div class="metric-bar">
+                <div class="metric-bar-fill" style="width:{pct}%; background:{meta['color']};"></div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
 
-    for idx, agent_name in enumerate(AGENT_ORDER, start=1):
-        progress_text.markdown(
-            f"<p style='color:#9ca3af; margin:0;'>Generating <strong>{agent_name}</strong>…</p>",
-            unsafe_allow_html=True
+    with st.expander("Open future packet", expanded=False):
+        st.write("**Narrative**")
+        st.write(f.get("narrative", ""))
+
+        st.write("**Headlines**")
+        for h in f.get("headlines", []):
+            st.write("-", h)
+
+        st.write("**Strategy**")
+        st.code(f.get("strategy", ""))
+
+        st.write("**Vulnerabilities**")
+        for v in f.get("vulnerabilities", []):
+            st.write("-", v)
+
+
+# ── Result caching ────────────────────────────────────────────────────────────
+# A finished run is kept in st.session_state, so widget reruns (expanders,
+# the ops toggle) redraw it instead of regenerating. Generated futures are
+# also kept per process, keyed by scenario, so any session that asks for a
+# scenario again skips the model entirely.
+RUN_CACHE_SIZE = 64
+
+
+class _RunStore:
+    """Bounded LRU of generated futures; sessions run on their own threads, hence the lock."""
+
+    def __init__(self, max_entries: int = RUN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._runs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            futures = self._runs.get(key)
+            if futures is not None:
+                self._runs.move_to_end(key)
+            return futures
+
+    def put(self, key: str, futures: list) -> None:
+        with self._lock:
+            self._runs[key] = futures
+            self._runs.move_to_end(key)
+            while len(self._runs) > self.max_entries:
+                self._runs.popitem(last=False)
+
+
+@st.cache_resource
+def _run_store() -> _RunStore:
+    return _RunStore()
+
+
+@st.cache_resource(show_spinner=False)
+def _llm_client():
+    return get_client()
+
+
+@st.cache_resource(show_spinner=False)
+def _history():
+    """The process's run history store, or None when HISTORY_DIR is empty."""
+    from core import history  # pyarrow.dataset; only loaded once a run finishes
+
+    return history.get_history() if history.HISTORY_DIR else None
+
+
+def record_run(run: dict, futures: list, scores: list, sim: dict) -> None:
+    """Append a finished run to the history once; a write failure never breaks the page."""
+    store = _history()
+    if store is None or run.get("recorded"):
+        return
+    run["recorded"] = True
+    try:
+        with metrics.timer("history_write_seconds"):
+            store.record(run["scenario"], futures, scores, sim, run_seconds=run.get("seconds"))
+    except Exception:
+        metrics.inc("history_write_errors_total")
+
+
+@st.cache_data(show_spinner=False, max_entries=RUN_CACHE_SIZE)
+def _score_and_simulate(futures: list) -> tuple:
+    scores = score_futures(futures)
+    # fixed 24-month horizon, fixed seed — no user control needed
+    sim = simulate_monte_carlo(scores, steps=24, n_paths=SIM_PATHS, percentiles=(10, 50, 90), seed=42)
+    return scores, sim
+
+
+# ── Influence chart ───────────────────────────────────────────────────────────
+CHART_MAX_POINTS = 120  # per series; longer horizons are downsampled
+
+
+def chart_digest(trajectories, bands, win_prob) -> str:
+    """Content hash of everything the chart draws; the chart spec cache key."""
+    h = hashlib.sha1()
+    for name in sorted(trajectories):
+        h.update(name.encode("utf-8"))
+        h.update(np.asarray(trajectories[name], dtype=float).tobytes())
+        for p in sorted(bands.get(name, {})):
+            h.update(np.asarray(bands[name][p], dtype=float).tobytes())
+        h.update(repr(win_prob.get(name)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _downsample_index(n: int, max_points: int = CHART_MAX_POINTS):
+    """Evenly spaced indices into a series of length n, always keeping both ends."""
+    if n <= max_points:
+        return range(n)
+    return np.unique(np.linspace(0, n - 1, max_points).round().astype(int))
+
+
+@st.cache_data(show_spinner=False, max_entries=RUN_CACHE_SIZE)
+def _influence_chart_spec(digest: str, _trajectories, _bands, _win_prob) -> dict:
+    """
+    Vega-Lite spec for the influence chart. Only the digest is hashed by
+    Streamlit; the underscore arguments are the data it was computed from.
+    Each agent gets its mean line plus one band between the outermost
+    simulated percentiles, so the point count doesn't grow with n_paths.
+    """
+    import altair as alt
+
+    with metrics.timer("chart_build_seconds"):
+        winner = max(_win_prob, key=_win_prob.get)
+        labels, colors, rows = [], [], []
+        for name, curve in _trajectories.items():
+            label = f"{name} ({_win_prob[name]:.0%})"
+            labels.append(label)
+            colors.append(AGENT_COLORS.get(name, "#ffffff"))
+
+            band = _bands.get(name) or {0: curve}
+            lo, hi = band[min(band)], band[max(band)]
+            last = len(curve) - 1
+            for i in _downsample_index(len(curve)):
+                rows.append({
+                    "agent": label, "month": int(i), "mean": float(curve[i]),
+                    "lo": float(lo[i]), "hi": float(hi[i]),
+                    "winner": name == winner, "end": bool(name == winner and i == last),
+                })
+
+        horizon = max((len(c) for c in _trajectories.values()), default=0)
+        color = alt.Color("agent:N", scale=alt.Scale(domain=labels, range=colors),
+                          legend=alt.Legend(title=None, orient="top-left", labelColor="white"))
+        x = alt.X("month:Q", title="Month")
+        base = alt.Chart(alt.Data(values=rows))
+
+        bands_layer = base.mark_area(strokeWidth=0).encode(
+            x=x, y="lo:Q", y2="hi:Q", color=color,
+            opacity=alt.condition("datum.winner", alt.value(0.14), alt.value(0.07)),
+        )
+        lines = base.mark_line(strokeWidth=2.2).encode(
+            x=x, y=alt.Y("mean:Q", title="Influence"), color=color,
+            opacity=alt.condition("datum.winner", alt.value(1.0), alt.value(0.6)),
+        )
+        end = base.transform_filter("datum.end").mark_circle(size=80, opacity=1).encode(
+            x=x, y="mean:Q", color=color,
         )
 
-        try:
-            # IMPORTANT: This uses generate_one_future (not generate_futures)
-            f = generate_one_future(agent_name, scenario)
-        except Exception as e:
-            # Keep UI alive even if something unexpected happens
-            f = {
-                "name": agent_name,
-                "narrative": f"Failed to generate output for {agent_name}.",
-                "headlines": [],
-                "strategy": "",
-                "vulnerabilities": [],
-                "tone_score": 1.0,
-                "risk_score": 1.0,
-                "source": "Fallback",
-                "error": f"{type(e).__name__}: {str(e)}",
-            }
-
-        futures.append(f)
-
-        progress_bar.progress(int((idx / total) * 100))
-        progress_text.markdown(
-            f"<p style='color:#9ca3af; margin:0;'>Generating <strong>{agent_name}</strong>… ✅</p>",
-            unsafe_allow_html=True
+        chart = (
+            alt.layer(bands_layer, lines, end)
+            .properties(height=300, background="#0a0a0a",
+                        title=alt.Title(f"Influence trajectory ({horizon}-month horizon)",
+                                        anchor="start", color="#9ca3af", fontSize=12))
+            .configure_view(stroke=None)
+            .configure_axis(labelColor="#4b5563", titleColor="#6b7280", gridColor="#1f2937",
+                            domainColor="#1f2937", tickColor="#1f2937")
         )
+        return chart.to_dict()
 
-    progress_text.markdown(
-        "<p style='color:#9ca3af; margin:0;'><strong>Done.</strong> Rendering results…</p>",
-        unsafe_allow_html=True
-    )
 
-    # ── Score + simulate ─────────────────────────────────────────────────────
-    scores = score_futures(futures)
-    trajectories = simulate_trajectories(scores, steps=24)  # fixed 24-month horizon
+def scenario_key(text: str) -> str:
+    return " ".join(text.split())
 
+
+if st.button("Run Alternate", type="primary"):
+    if not scenario.strip():
+        st.warning("Type a scenario first.")
+        st.stop()
+    key = scenario_key(scenario)
+    st.session_state["run"] = {"key": key, "scenario": scenario, "futures": _run_store().get(key),
+                               "seconds": 0.0, "recorded": False}
+
+run = st.session_state.get("run")
+if run is not None:
+    if scenario_key(scenario) != run["key"]:
+        st.caption(f"Showing the last run for “{run['key']}”. Press Run Alternate for the new scenario.")
+
+    generating = run["futures"] is None
     st.divider()
 
-    # ── Winner ───────────────────────────────────────────────────────────────
-    final = [(name, curve[-1]) for name, curve in trajectories.items()]
-    winner_name, winner_val = max(final, key=lambda x: x[1])
+    if generating:
+        # ── Streaming progress (feels faster) ────────────────────────────────
+        st.markdown(
+            '<p style="font-family: Space Mono, monospace; font-size:0.75rem; color:#8b5cf6; letter-spacing:2px; text-transform:uppercase; margin-bottom:0.6rem;">⏳ Generating parallel futures</p>',
+            unsafe_allow_html=True
+        )
 
-    winner_future = next((f for f in futures if f["name"] == winner_name), {})
-    winner_score_data = next((s for s in scores if s["name"] == winner_name), {})
+        progress_text = st.empty()
+        progress_bar = st.progress(0)
 
-    inf = winner_score_data.get("influence", 0)
-    stab = winner_score_data.get("stability", 0)
-    risk = winner_score_data.get("risk", 0)
+    # Winner + chart sit above the cards but can only be drawn once every
+    # agent is in, so reserve their slot now and fill it afterwards.
+    summary = st.container()
 
-    if inf > 1.5:
-        inf_reason = "commanding influence"
-    elif inf > 1.0:
-        inf_reason = "strong influence"
-    else:
-        inf_reason = "steady influence"
+    # ── Agent Cards ───────────────────────────────────────────────────────────
+    # Rows of CARDS_PER_ROW, however many agents the registry holds
+    cards = {}
+    for row_start in range(0, len(AGENT_ORDER), CARDS_PER_ROW):
+        cols = st.columns(CARDS_PER_ROW)
+        for col, name in zip(cols, AGENT_ORDER[row_start:row_start + CARDS_PER_ROW]):
+            cards[name] = col.container()
+
+    if generating:
+        # Streamed narratives land here first and are replaced by the full card
+        previews = {name: cards[name].empty() for name in AGENT_ORDER}
+        futures = []
+        total = len(AGENT_ORDER)
+
+        generating_label = ", ".join(AGENT_ORDER) if total <= CARDS_PER_ROW else f"{total} agents"
+        progress_text.markdown(
+            f"<p style='color:#9ca3af; margin:0;'>Generating <strong>{generating_label}</strong>…</p>",
+            unsafe_allow_html=True
+        )
 
-    if stab > 0.9:
-        stab_reason = "high structural stability"
-    elif stab > 0.6:
-        stab_reason = "moderate stability"
-    else:
-        stab_reason = "volatile but potent energy"
+        # All agents run concurrently; each card fills in as its future lands
+        t_run = time.perf_counter()
+        for event in iter_future_events(run["scenario"]):
+            if event["type"] == "field":
+                if event["field"] == "narrative" and event["name"] in previews:
+                    previews[event["name"]].markdown(
+                        f'<p style="color:#6b7280; font-size:0.88rem; line-height:1.6;">'
+                        f'<strong>{event["name"]}</strong> is writing… {event["value"]}</p>',
+                        unsafe_allow_html=True
+                    )
+                continue
+
+            f = event["result"]
+            futures.append(f)
+            agent_name = f.get("name", "")
+
+            if agent_name in previews:
+                previews[agent_name].empty()
+            with cards.get(agent_name, st.container()):
+                render_card_header(f)
+
+            progress_bar.progress(int((len(futures) / total) * 100))
+            progress_text.markdown(
+                f"<p style='color:#9ca3af; margin:0;'><strong>{agent_name}</strong> ✅ ({len(futures)}/{total})</p>",
+                unsafe_allow_html=True
+            )
+
+        progress_text.markdown(
+            "<p style='color:#9ca3af; margin:0;'><strong>Done.</strong> Rendering results…</p>",
+            unsafe_allow_html=True
+        )
+
+        # Back to display order so scores, chart and verdict stay stable
+        order = {name: i for i, name in enumerate(AGENT_ORDER)}
+        futures.sort(key=lambda x: order.get(x.get("name", ""), 999))
 
-    if risk < 0.6:
-        risk_reason = "low exposure to downside"
-    elif risk < 1.2:
-        risk_reason = "calculated risk"
+        # Runs with a fallback aren't shared, so the next attempt can do better
+        if not any(f.get("source") == "Fallback" for f in futures):
+            _run_store().put(run["key"], futures)
+        run["futures"] = futures
+        run["seconds"] = time.perf_counter() - t_run
     else:
-        risk_reason = "high risk tolerance that paid off here"
+        futures = run["futures"]
+        for f in futures:
+            with cards.get(f["name"], st.container()):
+                render_card_header(f)
 
-    winner_headline = winner_future.get("headlines", [""])[0] if winner_future.get("headlines") else ""
+    # ── Score + simulate ─────────────────────────────────────────────────────
+    scores, sim = _score_and_simulate(futures)
+    trajectories = sim["mean"]
+    win_prob = sim["win_prob"]
 
-    reason_text = (
-        f"{winner_name} emerged dominant with {inf_reason} (↑{inf:.2f}), "
-        f"{stab_reason} (⬡{stab:.2f}), and {risk_reason} (⚠ {risk:.2f}). "
-        f"Over the 24-month simulation horizon, its trajectory compounded furthest. "
-    )
-    if winner_headline:
-        reason_text += f'Key signal: <em>"{winner_headline}"</em>'
+    with summary:
+        st.divider()
 
-    st.markdown(f"""
-    <div class="winner-banner">
-        <div class="crown">🏆</div>
-        <div class="winner-name">{winner_name} wins</div>
-        <div class="winner-score">Final influence score: {winner_val:.2f}</div>
-        <div class="winner-reason">{reason_text}</div>
-    </div>
-    """, unsafe_allow_html=True)
+        # ── Winner ───────────────────────────────────────────────────────────
+        # Winner = the agent that finishes first in the most simulated paths
+        winner_name = max(win_prob, key=win_prob.get)
+        winner_val = trajectories[winner_name][-1]
 
-    # ── Influence Chart ──────────────────────────────────────────────────────
-    AGENT_COLORS = {
-        "Visionary": "#8b5cf6",
-        "Realist": "#3b82f6",
-        "Capitalist": "#f59e0b",
-        "Chaos Agent": "#ef4444",
-    }
-
-    fig, ax = plt.subplots(figsize=(10, 3.5))
-    fig.patch.set_facecolor("#0a0a0a")
-    ax.set_facecolor("#0a0a0a")
-
-    for name, curve in trajectories.items():
-        color = AGENT_COLORS.get(name, "#ffffff")
-        ax.plot(curve, label=name, color=color, linewidth=2.2,
-                alpha=1.0 if name == winner_name else 0.6)
-        if name == winner_name:
-            ax.plot(len(curve) - 1, curve[-1], "o", color=color, markersize=8)
-
-    ax.set_title("Influence trajectory (24-month horizon)", color="#9ca3af",
-                 fontsize=10, pad=10, loc="left")
-    ax.set_xlabel("Month", color="#6b7280", fontsize=9)
-    ax.set_ylabel("Influence", color="#6b7280", fontsize=9)
-    ax.tick_params(colors="#4b5563")
-    for spine in ax.spines.values():
-        spine.set_edgecolor("#1f2937")
-
-    ax.legend(framealpha=0, labelcolor="white", fontsize=9)
-    st.pyplot(fig)
-
-    st.markdown("""
-    <p style="font-size:0.78rem; color:#4b5563; margin-top:-8px; margin-bottom:1.5rem;">
-    📊 <em>The chart shows how each agent's influence compounds over time based on their tone and risk scores.
-    A steeper curve = more aggressive compounding. Volatile agents can surge early but destabilize.
-    The winning agent has the highest final influence at month 24.</em>
-    </p>
-    """, unsafe_allow_html=True)
+        winner_future = next((f for f in futures if f["name"] == winner_name), {})
+        winner_score_data = next((s for s in scores if s["name"] == winner_name), {})
 
-    # ── Agent Cards ───────────────────────────────────────────────────────────
-    cols = st.columns(4)
-
-    METRIC_META = {
-        "influence": {
-            "label": "Influence",
-            "desc": "How much this worldview bends the outcome over time. Higher = more dominant.",
-            "color": "#8b5cf6",
-            "max": 2.0,
-        },
-        "stability": {
-            "label": "Stability",
-            "desc": "How structurally sound the strategy is under pressure. Higher = less likely to collapse.",
-            "color": "#22c55e",
-            "max": 1.35,
-        },
-        "risk": {
-            "label": "Risk",
-            "desc": "Exposure to catastrophic failure or backfire. Higher = more volatile.",
-            "color": "#ef4444",
-            "max": 2.0,
-        },
-    }
-
-    for i, f in enumerate(futures):
-        s = scores[i]
-        agent_name = f.get("name", f"Agent {i+1}")
-        color = AGENT_COLORS.get(agent_name, "#ffffff")
-
-        source_label = f.get("source", "Unknown")
-        if source_label in ("LLM", "MiniMax"):
-            display_source = f"Model: {MINIMAX_MODEL}"
-        elif source_label in ("Fallback", "MOCK"):
-            display_source = "Source: Fallback (mock)"
+        inf = winner_score_data.get("influence", 0)
+        stab = winner_score_data.get("stability", 0)
+        risk = winner_score_data.get("risk", 0)
+
+        if inf > 1.5:
+            inf_reason = "commanding influence"
+        elif inf > 1.0:
+            inf_reason = "strong influence"
         else:
-            display_source = f"Source: {source_label}"
+            inf_reason = "steady influence"
 
-        with cols[i]:
-            st.markdown(f"""
-            <div class="agent-header">
-                <div class="agent-name" style="border-left: 3px solid {color}; padding-left: 8px;">{agent_name}</div>
-                <div class="agent-source">{display_source}</div>
-            </div>
-            """, unsafe_allow_html=True)
+        if stab > 0.9:
+            stab_reason = "high structural stability"
+        elif stab > 0.6:
+            stab_reason = "moderate stability"
+        else:
+            stab_reason = "volatile but potent energy"
 
-            if f.get("error"):
-                st.error(f.get("error"))
+        if risk < 0.6:
+            risk_reason = "low exposure to downside"
+        elif risk < 1.2:
+            risk_reason = "calculated risk"
+        else:
+            risk_reason = "high risk tolerance that paid off here"
 
-            narrative = f.get("narrative", "")
-            st.markdown(
-                f'<p style="color:#9ca3af; font-size:0.88rem; line-height:1.6; margin-bottom:1rem;">{narrative}</p>',
-                unsafe_allow_html=True
-            )
+        winner_headline = winner_future.get("headlines", [""])[0] if winner_future.get("headlines") else ""
+
+        reason_text = (
+            f"{winner_name} emerged dominant with {inf_reason} (↑{inf:.2f}), "
+            f"{stab_reason} (⬡{stab:.2f}), and {risk_reason} (⚠ {risk:.2f}). "
+            f"Across {SIM_PATHS:,} simulated 24-month paths it finished first {win_prob[winner_name]:.0%} of the time. "
+        )
+        if winner_headline:
+            reason_text += f'Key signal: <em>"{winner_headline}"</em>'
 
-            for key in ["influence", "stability", "risk"]:
-                meta = METRIC_META[key]
-                val = s[key]
-                pct = min(100, int((val / meta["max"]) * 100))
-                st.markdown(f"""
-                <div class="metric-row">
-                    <div class="metric-label">{meta['label']}</div>
-                    <div class="metric-desc">{meta['desc']}</div>
-                    <div class="metric-value">{val:.2f}</div>
-                    <div class="metric-bar">
-                        <div class="metric-bar-fill" style="width:{pct}%; background:{meta['color']};"></div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-
-            st.markdown("<br>", unsafe_allow_html=True)
-
-            with st.expander("Open future packet", expanded=False):
-                st.write("**Narrative**")
-                st.write(f.get("narrative", ""))
-
-                st.write("**Headlines**")
-                for h in f.get("headlines", []):
-                    st.write("-", h)
-
-                st.write("**Strategy**")
-                st.code(f.get("strategy", ""))
-
-                st.write("**Vulnerabilities**")
-                for v in f.get("vulnerabilities", []):
-                    st.write("-", v)
+        st.markdown(f"""
+        <div class="winner-banner">
+            <div class="crown">🏆</div>
+            <div class="winner-name">{winner_name} wins</div>
+            <div class="winner-score">Win probability: {win_prob[winner_name]:.0%} · Mean final influence: {winner_val:.2f}</div>
+            <div class="winner-reason">{reason_text}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        # ── Influence Chart ──────────────────────────────────────────────────
+        with metrics.timer("chart_render_seconds"):
+            digest = chart_digest(trajectories, sim["bands"], win_prob)
+            spec = _influence_chart_spec(digest, trajectories, sim["bands"], win_prob)
+            st.vega_lite_chart(spec, use_container_width=True, theme=None)
+
+        st.markdown("""
+        <p style="font-size:0.78rem; color:#4b5563; margin-top:-8px; margin-bottom:1.5rem;">
+        📊 <em>The chart shows how each agent's mean influence compounds over time based on their tone and risk scores,
+        with the shaded band covering the 10th–90th percentile of simulated paths.
+        A steeper curve = more aggressive compounding. Volatile agents can surge early but destabilize.
+        The winning agent finishes first at month 24 in the largest share of paths (shown in the legend).</em>
+        </p>
+        """, unsafe_allow_html=True)
+
+    for f, s in zip(futures, scores):
+        with cards.get(f["name"], st.container()):
+            render_card_body(f, s)
 
     # ── Battle Verdict ────────────────────────────────────────────────────────
     st.divider()
@@ -555,17 +738,136 @@ if st.button("Run Alternate", type="primary"):
     winner_s = ranked[0]
     loser_s = ranked[-1]
 
-    dynamic_roasts = {
-        "Visionary": f"You paint the future in bold strokes — but {loser_s['name']} called your bluff.",
-        "Realist": f"You stabilised the situation well. But stability without momentum handed {winner_s['name']} the crown.",
-        "Capitalist": f"You captured the upside early. {winner_s['name']} just had a bigger moat.",
-        "Chaos Agent": f"You burned bright. Influence spiked. Then the structure ate you. {winner_s['name']} outlasted you.",
-    }
+    def roast(name):
+        info = AGENT_INFO.get(name, {})
+        return info.get("roast", "I outplay you all.").format(winner=winner_s["name"], loser=loser_s["name"])
 
     for s in scores:
         st.markdown(f"""
         <div class="verdict-box">
             <div class="agent-tag">{s['name']}</div>
-            <div class="roast">{dynamic_roasts.get(s['name'], 'I outplay you all.')}</div>
+            <div class="roast">{roast(s['name'])}</div>
         </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+        """, unsafe_allow_html=True)
+
+    # After the page is drawn, so the write never delays the results
+    record_run(run, futures, scores, sim)
+
+
+# ── Run history ───────────────────────────────────────────────────────────────
+HISTORY_ROWS = 200  # newest matching runs listed
+HISTORY_WINDOWS = {"Last 7 days": 7, "Last 30 days": 30, "Last 365 days": 365, "All time": None}
+
+
+def render_history_panel():
+    """Past runs from the local history store, filtered without loading it all."""
+    st.divider()
+    st.markdown(
+        '<p style="font-family: Space Mono, monospace; font-size:0.75rem; color:#8b5cf6; letter-spacing:2px; text-transform:uppercase; margin-bottom:0.8rem;">🗂 Run history</p>',
+        unsafe_allow_html=True
+    )
+    store = _history()
+    if store is None:
+        st.caption("Run history is off (HISTORY_DIR is empty).")
+        return
+
+    c1, c2, c3, c4 = st.columns([1, 1, 2, 1])
+    agent = c1.selectbox("Agent", ["Any"] + AGENT_ORDER, key="history_agent")
+    winner = c2.selectbox("Winner", ["Any"] + AGENT_ORDER, key="history_winner")
+    text = c3.text_input("Scenario contains", key="history_text")
+    window = c4.selectbox("Period", list(HISTORY_WINDOWS), key="history_window")
+
+    days = HISTORY_WINDOWS[window]
+    since = datetime.date.today() - datetime.timedelta(days=days - 1) if days else None
+    with metrics.timer("history_query_seconds"):
+        table = store.query(
+            agent=None if agent == "Any" else agent,
+            winner=None if winner == "Any" else winner,
+            text=text.strip() or None,
+            since=since,
+            winners_only=agent == "Any",  # one row per run unless following one agent
+            limit=HISTORY_ROWS,
+        )
+    if not table.num_rows:
+        st.caption("No recorded runs match.")
+        return
+
+    rows = table.to_pylist()
+    st.dataframe(
+        [{
+            "when": r["created_at"].strftime("%Y-%m-%d %H:%M"),
+            "scenario": r["scenario"],
+            "agent": r["agent"],
+            "winner": r["winner_agent"],
+            "win prob": round(r["win_prob"], 3),
+            "influence": round(r["influence"], 2),
+            "source": r["source"],
+            "seconds": None if r["run_seconds"] is None else round(r["run_seconds"], 1),
+        } for r in rows],
+        use_container_width=True, hide_index=True,
+    )
+    st.caption(f"Newest {len(rows)} matching {'rows' if agent != 'Any' else 'runs'}.")
+
+    labels = {i: f"{r['created_at']:%Y-%m-%d %H:%M} · {r['scenario'][:80]}" for i, r in enumerate(rows)}
+    picked = st.selectbox("Replay trajectories of", list(labels), format_func=labels.get, key="history_run")
+    r = rows[picked]
+    trajectories, bands, win_prob = store.trajectories(r["run_id"], r["date"])
+    digest = chart_digest(trajectories, bands, win_prob)
+    st.vega_lite_chart(_influence_chart_spec(digest, trajectories, bands, win_prob),
+                       use_container_width=True, theme=None)
+
+
+# ── Ops panel ─────────────────────────────────────────────────────────────────
+def render_ops_panel():
+    """Latency percentiles and fallback rate for this server process."""
+    snap = metrics.snapshot()
+    st.divider()
+    st.markdown(
+        '<p style="font-family: Space Mono, monospace; font-size:0.75rem; color:#8b5cf6; letter-spacing:2px; text-transform:uppercase; margin-bottom:0.8rem;">🛠 Ops metrics (this process)</p>',
+        unsafe_allow_html=True
+    )
+
+    rate = snap["fallback_rate"]
+    breaker = get_breaker().stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Fallback rate", "—" if rate is None else f"{rate:.1%}")
+    c2.metric("Provider requests", int(metrics.counter_value("llm_requests_total")))
+    c3.metric("Echo rejections", int(metrics.counter_value("llm_echo_rejections_total")))
+    c4.metric("Circuit breaker", breaker["state"].replace("_", "-"),
+              help=f"opened {breaker['opens']}×, {breaker['short_circuited']} requests short-circuited")
+
+    rows = [
+        {
+            "metric": h["name"],
+            "labels": ", ".join(f"{k}={v}" for k, v in h["labels"].items()),
+            "count": h["count"],
+            "p50 (s)": h["p50"],
+            "p95 (s)": h["p95"],
+            "p99 (s)": h["p99"],
+        }
+        for h in snap["histograms"]
+    ]
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.caption("No calls recorded yet in this process.")
+
+    with st.expander("Counters", expanded=False):
+        st.dataframe(
+            [{"counter": c["name"], "labels": ", ".join(f"{k}={v}" for k, v in c["labels"].items()),
+              "value": c["value"]} for c in snap["counters"]],
+            use_container_width=True, hide_index=True,
+        )
+
+    if st.button("Export metrics snapshot"):
+        st.caption(f"Wrote {metrics.export()}")
+
+
+if st.sidebar.checkbox("Show run history", value=False):
+    render_history_panel()
+
+if st.sidebar.checkbox("Show ops panel", value=False):
+    render_ops_panel()
+
+# After first paint: build the provider client once per server process
+_llm_client()
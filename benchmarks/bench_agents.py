@@ -0,0 +1,103 @@
+"""
+Persona panel size benchmark: 4, 16 and 64 agents against the local fake server.
+
+    python -m benchmarks.bench_agents [--sizes 4,16,64] [--scenarios 5] [--latency-median 0.3]
+
+Synthetic panels are written as registry config files and loaded through
+core.registry, exactly as AGENTS_CONFIG would be. For each size it reports
+prompt precompilation time, per-scenario generation latency for the
+threaded (generate_futures) and pooled async (generate_futures_pooled)
+paths, and the cost of scoring and the Monte Carlo simulation. The response
+cache is off.
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+from benchmarks import fake_server
+from core.metrics import percentile
+
+STYLES = ["bold, expansive", "cautious, grounded", "profit-seeking, leveraged", "disruptive, volatile",
+          "patient, institutional", "contrarian, skeptical", "community-first, grassroots", "technical, precise"]
+
+
+def synthetic_panel(n: int) -> dict:
+    return {"agents": [
+        {
+            "name": f"Persona {i + 1:02d}",
+            "style": STYLES[i % len(STYLES)],
+            "voice_rules": [f"Argue from the {STYLES[i % len(STYLES)].split(',')[0]} point of view.",
+                            "Be specific."],
+        }
+        for i in range(n)
+    ]}
+
+
+def _timed(fn, *args) -> tuple:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def bench_size(agents, registry, scoring, simulation, n: int, scenarios: list, paths: int) -> dict:
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(synthetic_panel(n), f)
+    try:
+        compile_s, _ = _timed(agents.set_agents, registry.load_agents(f.name))
+    finally:
+        os.unlink(f.name)
+
+    row = {"agents": n, "compile_ms": compile_s * 1000}
+    for name, generate in (("threads", agents.generate_futures), ("async", agents.generate_futures_pooled)):
+        latencies, fallbacks = [], 0
+        for i, scenario in enumerate(scenarios):
+            elapsed, futures = _timed(generate, f"{scenario} [{name} {n}/{i}]")
+            assert len(futures) == n
+            latencies.append(elapsed)
+            fallbacks += sum(f.get("source") == "Fallback" for f in futures)
+        row[f"{name}_p50_s"] = percentile(latencies, 50)
+        row[f"{name}_p95_s"] = percentile(latencies, 95)
+        row[f"{name}_fallbacks"] = fallbacks
+
+    score_s, scores = _timed(scoring.score_futures, futures)
+    sim_s, _ = _timed(lambda: simulation.simulate_monte_carlo(scores, steps=24, n_paths=paths, seed=1))
+    row["score_ms"] = score_s * 1000
+    row["simulate_ms"] = sim_s * 1000
+    return row
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    fake_server.add_arguments(ap)
+    ap.add_argument("--sizes", default="4,16,64")
+    ap.add_argument("--scenarios", type=int, default=5, help="scenarios per size and path")
+    ap.add_argument("--sim-paths", type=int, default=2000, help="Monte Carlo paths per agent")
+    ap.add_argument("--client-rps", default="1000", help="LLM_RPS for the client-side limiter")
+    args = ap.parse_args()
+
+    server = fake_server.start(fake_server.config_from_args(args))
+    # core.agents reads these at import time
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["LLM_CACHE"] = "off"
+    os.environ.setdefault("LLM_RPS", args.client_rps)
+    from core import agents, registry, scoring, simulation
+
+    scenarios = [f"Benchmark scenario {i}: a rival ships a cheaper product in market {i}"
+                 for i in range(args.scenarios)]
+    print(f"{'agents':>6}{'compile ms':>12}{'threads p50':>13}{'p95':>7}{'async p50':>11}{'p95':>7}"
+          f"{'fallbk':>8}{'score ms':>10}{'sim ms':>8}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        r = bench_size(agents, registry, scoring, simulation, n, scenarios, args.sim_paths)
+        print(
+            f"{r['agents']:>6}{r['compile_ms']:>12.1f}{r['threads_p50_s']:>13.2f}{r['threads_p95_s']:>7.2f}"
+            f"{r['async_p50_s']:>11.2f}{r['async_p95_s']:>7.2f}"
+            f"{r['threads_fallbacks'] + r['async_fallbacks']:>8}{r['score_ms']:>10.2f}{r['simulate_ms']:>8.1f}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
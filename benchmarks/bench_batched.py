@@ -0,0 +1,101 @@
+"""
+Compare per-agent and batched generation against the configured endpoint or a fake server.
+
+    python -m benchmarks.bench_batched [--runs 3] [--scenario "..."]
+    python -m benchmarks.bench_batched --fake --latency-median 0.3 \
+        --shapes clean=0.9,missing_key=0.05,echo=0.05      # local fake server
+
+Runs generate_futures in both modes with the response cache bypassed and
+reports wall time, prompt/completion tokens and how many personas had to
+be re-requested individually, plus llm_batch_total (batches that were ok,
+partly unusable or failed outright).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from benchmarks import fake_server
+
+DEFAULT_SCENARIO = "A new open-source video model drops tomorrow and disrupts the market"
+
+
+def _tokens(futures: list) -> tuple:
+    prompt = completion = 0
+    batch_counted = False
+    for f in futures:
+        meta = f.get("meta", {})
+        usage = meta.get("usage")
+        if not usage:
+            continue
+        if meta.get("batched"):
+            # One usage record is shared by every packet in the batch
+            if batch_counted:
+                continue
+            batch_counted = True
+        prompt += usage["prompt_tokens"]
+        completion += usage["completion_tokens"]
+    return prompt, completion
+
+
+def run_mode(agents, scenario: str, batched: bool, runs: int) -> dict:
+    wall = prompt = completion = rerequested = fallbacks = 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        futures = agents.generate_futures(scenario, batched=batched)
+        wall += time.perf_counter() - t0
+
+        p, c = _tokens(futures)
+        prompt += p
+        completion += c
+        fallbacks += sum(1 for f in futures if f.get("source") == "Fallback")
+        if batched:
+            rerequested += sum(1 for f in futures if not f.get("meta", {}).get("batched"))
+    return {
+        "wall_s": wall / runs,
+        "prompt_tokens": prompt / runs,
+        "completion_tokens": completion / runs,
+        "rerequested": rerequested / runs,
+        "fallbacks": fallbacks / runs,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--scenario", default=DEFAULT_SCENARIO)
+    ap.add_argument("--fake", action="store_true", help="run against a local fake server")
+    ap.add_argument("--client-rps", default="1000", help="LLM_RPS for the client-side limiter with --fake")
+    fake_server.add_arguments(ap)
+    args = ap.parse_args()
+
+    server = None
+    if args.fake:
+        config = fake_server.config_from_args(args)
+        server = fake_server.start(config)
+        # core.agents reads these at import time
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+        os.environ["OPENAI_API_KEY"] = "fake"
+        os.environ.setdefault("LLM_RPS", args.client_rps)
+    from core import agents, metrics
+    from core import cache as llm_cache
+
+    llm_cache.CACHE_MODE = "off"
+    print(f"{'mode':<12}{'wall s':>9}{'prompt tok':>12}{'compl tok':>11}{'re-req':>8}{'fallback':>10}")
+    for name, batched in (("per-agent", False), ("batched", True)):
+        r = run_mode(agents, args.scenario, batched, args.runs)
+        print(
+            f"{name:<12}{r['wall_s']:>9.2f}{r['prompt_tokens']:>12.0f}{r['completion_tokens']:>11.0f}"
+            f"{r['rerequested']:>8.1f}{r['fallbacks']:>10.1f}"
+        )
+    batches = {result: metrics.counter_value("llm_batch_total", result=result)
+               for result in ("ok", "partial", "failed")}
+    print(f"batches: {json.dumps(batches)}")
+    if server is not None:
+        print(f"server responses: {json.dumps(config.counts, sort_keys=True)}", file=sys.stderr)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Offline generation benchmark against the local fake server.
+
+    python -m benchmarks.bench_generate --scenarios 40 --latency-median 0.3 \
+        --shapes clean=0.7,fenced=0.1,trailing_comma=0.1,truncated=0.05,echo=0.05 \
+        [--burst-every 60 --burst-len 8] [--error-rate 0.02] [--json out.json]
+
+Starts benchmarks.fake_server on a free port, points OPENAI_BASE_URL at it
+(before core.agents is imported) and runs the same scenarios through each
+generation path:
+  sync        generate_futures, one scenario at a time
+  threads     generate_futures from --workers threads
+  async       generate_many on the pooled AsyncOpenAI engine
+For each it reports scenarios/s, provider requests/s, per-scenario latency
+percentiles, recovery rate and fallback rate. The response cache is off.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fake_server
+from core.metrics import percentile
+
+
+def _summarise(name: str, runs: list, wall: float, requests: int) -> dict:
+    latencies = [lat for lat, _ in runs]
+    results = [f for _, futures in runs for f in futures]
+    llm = [f for f in results if f.get("source") != "Fallback"]
+    return {
+        "path": name,
+        "scenarios": len(runs),
+        "wall_s": round(wall, 3),
+        "scenarios_per_s": round(len(runs) / wall, 2),
+        "requests_per_s": round(requests / wall, 2),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "recovery_rate": round(sum("recovered" in f.get("source", "") for f in llm) / max(1, len(llm)), 3),
+        "fallback_rate": round((len(results) - len(llm)) / max(1, len(results)), 3),
+    }
+
+
+def run_sync(agents, scenarios: list) -> list:
+    runs = []
+    for s in scenarios:
+        t0 = time.perf_counter()
+        futures = agents.generate_futures(s)
+        runs.append((time.perf_counter() - t0, futures))
+    return runs
+
+
+def run_threads(agents, scenarios: list, workers: int) -> list:
+    def one(s):
+        t0 = time.perf_counter()
+        futures = agents.generate_futures(s)
+        return time.perf_counter() - t0, futures
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(one, scenarios))
+
+
+def run_async(agents, scenarios: list) -> list:
+    async def one(s):
+        t0 = time.perf_counter()
+        futures = await agents.generate_futures_async(s)
+        return time.perf_counter() - t0, futures
+
+    async def all_scenarios():
+        return await asyncio.gather(*(one(s) for s in scenarios))
+
+    return agents._run_sync(all_scenarios())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    fake_server.add_arguments(ap)
+    ap.add_argument("--scenarios", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=8, help="threads for the threads path")
+    ap.add_argument("--paths", default="sync,threads,async")
+    ap.add_argument("--client-rps", default="1000", help="LLM_RPS for the client-side limiter")
+    ap.add_argument("--json", help="also write the results to this file")
+    args = ap.parse_args()
+
+    config = fake_server.config_from_args(args)
+    server = fake_server.start(config)
+
+    # core.agents reads these at import time
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["LLM_CACHE"] = "off"
+    os.environ.setdefault("LLM_RPS", args.client_rps)
+    from core import agents
+
+    scenarios = [f"Benchmark scenario {i}: a rival ships a cheaper product in market {i}"
+                 for i in range(args.scenarios)]
+    runners = {
+        "sync": lambda: run_sync(agents, scenarios),
+        "threads": lambda: run_threads(agents, scenarios, args.workers),
+        "async": lambda: run_async(agents, scenarios),
+    }
+
+    report = []
+    print(f"{'path':<9}{'scen/s':>8}{'req/s':>8}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'recov':>8}{'fallbk':>8}")
+    for name in args.paths.split(","):
+        before = config.requests
+        t0 = time.perf_counter()
+        runs = runners[name]()
+        row = _summarise(name, runs, time.perf_counter() - t0, config.requests - before)
+        report.append(row)
+        print(
+            f"{name:<9}{row['scenarios_per_s']:>8}{row['requests_per_s']:>8}{row['p50_s']:>8}"
+            f"{row['p95_s']:>8}{row['p99_s']:>8}{row['recovery_rate']:>8}{row['fallback_rate']:>8}"
+        )
+
+    print(f"server responses: {json.dumps(config.counts, sort_keys=True)}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": report, "server": config.counts}, f, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Run history store: query latency over a large synthetic history.
+
+    python -m benchmarks.bench_history [--runs 100000] [--days 30] [--dir /tmp/alternate_history]
+
+Writes --runs synthetic four-agent runs spread over --days date partitions
+through HistoryStore.write (then compacts), and times the history panel's
+queries against a full read of every column. Reported sizes are the bytes
+materialised by each read.
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import datetime
+import tempfile
+
+import numpy as np
+
+from core.history import HistoryStore
+
+AGENT_NAMES = ["Visionary", "Realist", "Capitalist", "Chaos Agent"]
+WORDS = ["rival", "launch", "regulator", "pricing", "open-source", "merger", "recall", "layoffs",
+         "funding", "outage", "tariff", "model", "market", "partnership", "lawsuit", "strike"]
+
+
+def synthetic_rows(n_runs: int, day: datetime.date, rng: random.Random, steps: int = 24) -> list:
+    base = datetime.datetime.combine(day, datetime.time(), datetime.timezone.utc)
+    nrng = np.random.default_rng(rng.randrange(2 ** 32))
+    rows = []
+    for i in range(n_runs):
+        run_id = f"{day.isoformat()}-{i:06d}-{rng.randrange(16 ** 6):06x}"
+        created_at = base + datetime.timedelta(seconds=rng.uniform(0, 86399))
+        scenario = " ".join(rng.choices(WORDS, k=rng.randint(6, 14)))
+        win = nrng.dirichlet(np.ones(len(AGENT_NAMES)))
+        winner = AGENT_NAMES[int(win.argmax())]
+        curves = np.cumsum(nrng.normal(0.05, 0.2, (len(AGENT_NAMES), steps)), axis=1) + 1.0
+        for j, name in enumerate(AGENT_NAMES):
+            curve = curves[j].tolist()
+            rows.append({
+                "run_id": run_id, "created_at": created_at, "scenario": scenario, "agent": name,
+                "winner_agent": winner, "winner": name == winner, "win_prob": float(win[j]),
+                "final_influence": curve[-1], "tone_score": rng.uniform(0, 2), "risk_score": rng.uniform(0, 2),
+                "influence": rng.uniform(0, 2), "stability": rng.uniform(0, 1.35), "risk": rng.uniform(0, 2),
+                "narrative": f"{name} view: {scenario}. " * 4, "headlines": [scenario[:80]] * 3,
+                "strategy": "1) act; 2) compound; 3) lock in", "vulnerabilities": ["execution", "backlash", "trust"],
+                "trajectory": curve, "band_lo": [v - 0.3 for v in curve], "band_hi": [v + 0.3 for v in curve],
+                "source": "MiniMax", "attempts_used": 1, "cache": "miss", "error": None,
+                "meta": '{"attempts_used": 1}', "run_seconds": rng.uniform(2, 9),
+            })
+    return rows
+
+
+def _best_of(fn, repeat: int = 5) -> tuple:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=100000)
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--dir", help="history directory (default: a temp dir, removed afterwards)")
+    args = ap.parse_args()
+
+    root = args.dir or tempfile.mkdtemp(prefix="alternate_history_")
+    store = HistoryStore(root)
+    rng = random.Random(0)
+    today = datetime.date.today()
+    per_day = -(-args.runs // args.days)
+
+    t0 = time.perf_counter()
+    written = 0
+    for d in range(args.days):
+        n = min(per_day, args.runs - written)
+        rows = synthetic_rows(n, today - datetime.timedelta(days=d), rng)
+        for start in range(0, len(rows), 2000):  # several appends per day, as a live app would
+            store.write(rows[start:start + 2000])
+        written += n
+    store.compact()
+    write_s = time.perf_counter() - t0
+    files = sum(len(files) for _, _, files in os.walk(root))
+    print(f"wrote {written:,} runs ({written * len(AGENT_NAMES):,} rows) in {write_s:.1f}s, {files} files")
+
+    latest = store.query(winners_only=True, limit=1).to_pylist()[0]
+    queries = [
+        ("full read, all columns", lambda: store.dataset().to_table()),
+        ("latest 200 runs", lambda: store.query(winners_only=True, limit=200)),
+        ("agent = Realist", lambda: store.query(agent="Realist", limit=200)),
+        ("won by Chaos Agent", lambda: store.query(winner="Chaos Agent", winners_only=True, limit=200)),
+        ("scenario contains 'tariff'", lambda: store.query(text="tariff", winners_only=True, limit=200)),
+        ("last 7 days, all matches", lambda: store.query(since=today - datetime.timedelta(days=6),
+                                                          winners_only=True)),
+        ("one run's trajectories", lambda: store.trajectories(latest["run_id"], latest["date"])),
+    ]
+    print(f"{'query':<30}{'ms':>9}{'rows':>10}{'MB read':>10}")
+    for label, fn in queries:
+        seconds, out = _best_of(fn)
+        rows = out.num_rows if hasattr(out, "num_rows") else len(out[0])
+        size = out.nbytes / 1e6 if hasattr(out, "nbytes") else 0.0
+        print(f"{label:<30}{seconds * 1000:>9.1f}{rows:>10,}{size:>10.1f}")
+
+    if not args.dir:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
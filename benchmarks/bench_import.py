@@ -0,0 +1,65 @@
+"""
+Measure cold import time of the app's modules.
+
+    python -m benchmarks.bench_import [--runs 5] [--top 8] [module ...]
+
+Each module is imported in a fresh interpreter under `python -X importtime`
+so nothing is shared between runs. Reports the median cumulative import
+time and the heaviest imports (by self time) pulled in along the way.
+"""
+import sys
+import argparse
+import statistics
+import subprocess
+
+DEFAULT_MODULES = ["core.agents", "core.scoring", "core.simulation", "core.batch", "app"]
+
+
+def import_profile(module: str) -> dict:
+    """{imported module: (self_us, cumulative_us)} for one cold import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    if module not in profile:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return profile
+
+
+def measure(module: str, runs: int, top: int) -> dict:
+    totals = []
+    self_times = {}
+    for _ in range(runs):
+        profile = import_profile(module)
+        totals.append(profile[module][1] / 1000.0)
+        for name, (self_us, _) in profile.items():
+            self_times.setdefault(name, []).append(self_us / 1000.0)
+    heaviest = sorted(
+        ((name, statistics.median(v)) for name, v in self_times.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:top]
+    return {"module": module, "median_ms": statistics.median(totals), "min_ms": min(totals), "heaviest": heaviest}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cold import time per module.")
+    ap.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=8, help="heaviest imports to list per module")
+    args = ap.parse_args()
+
+    for module in args.modules:
+        r = measure(module, args.runs, args.top)
+        print(f"{r['module']:<18} median {r['median_ms']:8.1f} ms   min {r['min_ms']:8.1f} ms")
+        for name, ms in r["heaviest"]:
+            print(f"    {ms:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark core.agents._safe_parse_json against the previous multi-strategy
+parser on the malformed-output corpus.
+
+    python -m benchmarks.bench_parse_json [--repeat 200]
+
+For every corpus entry it checks both parsers agree (same packet, same
+_recovered flag) and prints the per-call time of each.
+"""
+import os
+import re
+import json
+import time
+import argparse
+
+from core.agents import _safe_parse_json
+
+CORPUS = os.path.join(os.path.dirname(__file__), "corpus", "json_outputs.jsonl")
+
+
+# Frozen copy of the four-strategy parser this replaced, kept for comparison
+def _legacy_safe_parse_json(content: str) -> dict:
+    """Multi-strategy JSON parser. Sets _recovered=True if repairs were needed."""
+    cleaned = content.strip()
+    # Strip markdown fences
+    cleaned = re.sub(r'^```(?:json)?\s*', '', cleaned, flags=re.MULTILINE)
+    cleaned = re.sub(r'\s*```$', '', cleaned, flags=re.MULTILINE)
+    cleaned = cleaned.strip()
+
+    # Extract outermost JSON object
+    start = cleaned.find("{")
+    end = cleaned.rfind("}")
+    if start == -1 or end == -1 or end <= start:
+        raise ValueError(f"No JSON object found in output: {cleaned[:300]}")
+
+    json_str = cleaned[start:end + 1]
+
+    # Strategy 1: direct parse
+    try:
+        parsed = json.loads(json_str)
+        parsed["_recovered"] = False
+        return parsed
+    except json.JSONDecodeError:
+        pass
+
+    # Strategy 2: remove trailing commas
+    repaired = re.sub(r',(\s*[}\]])', r'\1', json_str)
+    try:
+        parsed = json.loads(repaired)
+        parsed["_recovered"] = True
+        return parsed
+    except json.JSONDecodeError:
+        pass
+
+    # Strategy 3: replace literal control chars inside quoted strings only
+    def fix_newlines_in_strings(s):
+        result = []
+        in_string = False
+        escape_next = False
+        for ch in s:
+            if escape_next:
+                result.append(ch)
+                escape_next = False
+            elif ch == '\\' and in_string:
+                result.append(ch)
+                escape_next = True
+            elif ch == '"':
+                in_string = not in_string
+                result.append(ch)
+            elif ch in ('\n', '\r', '\t') and in_string:
+                result.append(' ')
+            else:
+                result.append(ch)
+        return ''.join(result)
+
+    repaired2 = fix_newlines_in_strings(repaired)
+    try:
+        parsed = json.loads(repaired2)
+        parsed["_recovered"] = True
+        return parsed
+    except json.JSONDecodeError:
+        pass
+
+    # Strategy 4: truncate to last valid closing brace
+    # Sometimes the model outputs valid JSON followed by trailing garbage
+    for end_idx in range(len(repaired2) - 1, 0, -1):
+        if repaired2[end_idx] == '}':
+            try:
+                parsed = json.loads(repaired2[:end_idx + 1])
+                parsed["_recovered"] = True
+                return parsed
+            except json.JSONDecodeError:
+                continue
+
+    raise ValueError(
+        f"Could not parse JSON after all repair attempts. Content: {json_str[:400]}"
+    )
+
+
+
+def _load_corpus(path: str = CORPUS) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _outcome(parse, content: str):
+    try:
+        parsed = parse(content)
+    except ValueError:
+        return None, None
+    recovered = parsed.pop("_recovered")
+    parsed.pop("_repairs", None)
+    return parsed, recovered
+
+
+def _time_per_call(parse, content: str, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            parse(content)
+        except ValueError:
+            pass
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    print(f"{'kind':<24}{'chars':>7}{'legacy µs':>12}{'new µs':>10}{'speedup':>9}  repairs / agree")
+    total_old = total_new = 0.0
+    for row in _load_corpus():
+        content = row["content"]
+        old = _time_per_call(_legacy_safe_parse_json, content, args.repeat)
+        new = _time_per_call(_safe_parse_json, content, args.repeat)
+        total_old += old
+        total_new += new
+
+        agree = _outcome(_legacy_safe_parse_json, content) == _outcome(_safe_parse_json, content)
+        try:
+            repairs = ",".join(_safe_parse_json(content)["_repairs"]) or "-"
+        except ValueError:
+            repairs = "unparseable"
+        print(
+            f"{row['kind']:<24}{len(content):>7}{old * 1e6:>12.1f}{new * 1e6:>10.1f}"
+            f"{old / new:>8.1f}x  {repairs} / {'ok' if agree else 'DIFF'}"
+        )
+
+    print(f"{'total':<31}{total_old * 1e6:>12.1f}{total_new * 1e6:>10.1f}{total_old / total_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Partial repair vs full regeneration for damaged packets, against the fake server.
+
+    python -m benchmarks.bench_partial_repair --packets 200 --latency-median 0.3 \
+        --shapes clean=0.6,truncated=0.15,missing_key=0.15,bad_score=0.1
+
+Generates the same scenario × agent packets with LLM_PARTIAL_REPAIR off (any
+missing key or bad score costs a second full ~700-token request) and on (a
+short follow-up asks only for one or two broken fields; worse damage is
+retried in full). Packets run --workers at a time and each is timed on its
+own, so damaged packets can be compared directly. Token counts are the fake server's usage (4 chars per token).
+The response cache is off.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fake_server
+from core.metrics import percentile
+
+
+def _mean(values: list) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def _tokens(metrics, kind: str) -> float:
+    return sum(c["value"] for c in metrics.snapshot()["counters"]
+               if c["name"] == "llm_tokens_total" and c["labels"].get("kind") == kind)
+
+
+def run_setup(agents, metrics, config, repair: bool, jobs: list, workers: int) -> dict:
+    agents.LLM_PARTIAL_REPAIR = repair
+    metrics.reset()
+    before = config.requests
+
+    def one(job):
+        agent, scenario = job
+        t0 = time.perf_counter()
+        result = agents._one_agent_future(agent, scenario)
+        return time.perf_counter() - t0, result
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        timed = list(ex.map(one, jobs))
+
+    damaged = [(s, r) for s, r in timed
+               if r.get("source") == "Fallback" or r["meta"].get("attempts_used", 1) > 1
+               or r["meta"].get("repaired_fields")]
+    repaired = [r["meta"]["repaired_fields"] for _, r in timed if r["meta"].get("repaired_fields")]
+    n = len(timed)
+    return {
+        "packets": n,
+        "damaged": len(damaged),
+        "requests_per_packet": round((config.requests - before) / n, 3),
+        "prompt_tokens_per_packet": round(_tokens(metrics, "prompt") / n, 1),
+        "completion_tokens_per_packet": round(_tokens(metrics, "completion") / n, 1),
+        "mean_s": round(_mean([s for s, _ in timed]), 3),
+        "damaged_mean_s": round(_mean([s for s, _ in damaged]), 3),
+        "damaged_p95_s": round(percentile([s for s, _ in damaged], 95) or 0.0, 3),
+        "repaired": len(repaired),
+        "repaired_fields": round(_mean([len(f) for f in repaired]), 2),
+        "fallback_rate": round(sum(r.get("source") == "Fallback" for _, r in timed) / n, 3),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    fake_server.add_arguments(ap)
+    ap.add_argument("--packets", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--client-rps", default="1000", help="LLM_RPS for the client-side limiter")
+    ap.add_argument("--json", help="also write the results to this file")
+    ap.set_defaults(shapes="clean=0.6,truncated=0.15,missing_key=0.15,bad_score=0.1", latency_median=0.3)
+    args = ap.parse_args()
+
+    config = fake_server.config_from_args(args)
+    server = fake_server.start(config)
+    # core.agents reads these at import time
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["LLM_CACHE"] = "off"
+    os.environ.setdefault("LLM_RPS", args.client_rps)
+    os.environ.setdefault("LLM_TPM", "1e9")  # reservations are per max_tokens; keep both set-ups unthrottled
+    from core import agents, metrics
+
+    report = {}
+    print(f"{'setup':<10}{'damaged':>8}{'req/pkt':>9}{'prompt tok':>12}{'compl tok':>11}"
+          f"{'mean s':>8}{'dmg mean':>10}{'dmg p95':>9}{'repaired':>10}{'fallbk':>8}")
+    for name, repair in (("full", False), ("partial", True)):
+        jobs = [(agents.AGENTS[i % len(agents.AGENTS)], f"Benchmark scenario {i // len(agents.AGENTS)} ({name})")
+                for i in range(args.packets)]
+        r = report[name] = run_setup(agents, metrics, config, repair, jobs, args.workers)
+        print(f"{name:<10}{r['damaged']:>8}{r['requests_per_packet']:>9}{r['prompt_tokens_per_packet']:>12}"
+              f"{r['completion_tokens_per_packet']:>11}{r['mean_s']:>8}{r['damaged_mean_s']:>10}"
+              f"{r['damaged_p95_s']:>9}{r['repaired']:>10}{r['fallback_rate']:>8}")
+
+    print(f"server responses: {json.dumps(config.counts, sort_keys=True)}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": report}, f, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
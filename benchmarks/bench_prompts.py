@@ -0,0 +1,133 @@
+"""
+Compare prompt layouts: "prefix" (static text first) vs "legacy" (scenario first).
+
+    python -m benchmarks.bench_prompts                       # static report, no network
+    python -m benchmarks.bench_prompts --fake --runs 8       # + local fake server
+    python -m benchmarks.bench_prompts --live --runs 5       # + configured endpoint
+
+The static report counts prompt tokens locally for each agent: the fixed
+part, the scenario, and how much of the prompt precedes the scenario (what
+a provider prefix cache can reuse between runs) and is identical for every
+agent (reusable across agents too). It also times compiling a prompt vs
+building messages from the compiled one.
+
+--fake / --live then run --runs scenarios through generate_futures per
+variant with the response cache off and report request latency percentiles
+and provider-reported prompt / cached prompt tokens. --fake simulates
+prefix caching in --prefix-cache-block token blocks.
+"""
+import os
+import time
+import argparse
+
+from benchmarks import fake_server
+
+SCENARIOS = [
+    "A new open-source video model drops tomorrow and disrupts the market",
+    "The largest customer threatens to churn unless prices fall by a third",
+    "A regulator opens an inquiry into the company's data practices",
+    "A competitor poaches the entire platform team in one week",
+]
+
+
+def _common_prefix(texts: list) -> str:
+    return os.path.commonprefix(texts) if texts else ""
+
+
+def static_report(agents, prompts, scenario: str) -> None:
+    print(f"{'variant':<8}{'agent':<13}{'static':>8}{'scenario':>10}{'total':>7}{'pre-scen':>10}{'shared':>8}")
+    for variant in agents.PROMPT_VARIANTS:
+        compiled = [agents._agent_prompt(a["name"], a["style"], variant) for a in agents.AGENTS]
+        shared = prompts.count_tokens(_common_prefix([p.static_prefix() for p in compiled]))
+        for a, p in zip(agents.AGENTS, compiled):
+            print(
+                f"{variant:<8}{a['name']:<13}{p.static_tokens:>8}{prompts.count_tokens(scenario):>10}"
+                f"{p.count_tokens(scenario):>7}{prompts.count_tokens(p.static_prefix()):>10}{shared:>8}"
+            )
+
+    a = agents.AGENTS[0]
+    n = 2000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        agents._agent_prompt.__wrapped__(a["name"], a["style"], agents.PROMPT_VARIANT)
+    compile_us = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    for _ in range(n):
+        agents._build_messages(a["name"], a["style"], scenario)
+    build_us = (time.perf_counter() - t0) / n * 1e6
+    print(f"\ncompile {compile_us:.1f} us/prompt, messages from compiled {build_us:.2f} us/call")
+
+
+def _token_counter(metrics, kind: str) -> float:
+    return metrics.counter_value("llm_tokens_total", kind=kind)
+
+
+def run_variant(agents, llm_cache, metrics, variant: str, runs: int) -> dict:
+    metrics.reset()
+    llm_cache.CACHE_MODE = "off"
+    agents.PROMPT_VARIANT = variant
+    fallbacks = 0
+    for i in range(runs):
+        scenario = f"{SCENARIOS[i % len(SCENARIOS)]} (run {i})"
+        fallbacks += sum(f.get("source") == "Fallback" for f in agents.generate_futures(scenario))
+
+    hist = next((h for h in metrics.snapshot()["histograms"] if h["name"] == "llm_request_seconds"), {})
+    prompt = _token_counter(metrics, "prompt")
+    cached = _token_counter(metrics, "prompt_cached")
+    return {
+        "variant": variant,
+        "requests": hist.get("count", 0),
+        "p50_s": hist.get("p50"),
+        "p95_s": hist.get("p95"),
+        "local_prompt_tokens": metrics.counter_value("llm_prompt_tokens_local_total"),
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "cached_share": cached / prompt if prompt else 0.0,
+        "fallbacks": fallbacks,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--scenario", default=SCENARIOS[0], help="scenario for the static report")
+    ap.add_argument("--runs", type=int, default=4, help="scenarios per variant with --fake/--live")
+    ap.add_argument("--fake", action="store_true", help="run against a local fake server")
+    ap.add_argument("--live", action="store_true", help="run against the configured endpoint")
+    ap.add_argument("--latency-median", type=float, default=0.2, help="fake server latency, seconds")
+    ap.add_argument("--prefix-cache-block", type=int, default=64, help="fake server cache block, tokens")
+    args = ap.parse_args()
+
+    servers = {}
+    if args.fake:
+        # core.agents reads the key at import time; the base URL is set per variant below
+        os.environ["OPENAI_API_KEY"] = "fake"
+
+    from core import agents, metrics, prompts
+    from core import cache as llm_cache
+
+    static_report(agents, prompts, args.scenario)
+    if not (args.fake or args.live):
+        return
+
+    print(f"\n{'variant':<8}{'reqs':>6}{'p50 s':>8}{'p95 s':>8}{'local tok':>11}{'prompt tok':>12}"
+          f"{'cached':>8}{'cached %':>10}{'fallbk':>8}")
+    for variant in agents.PROMPT_VARIANTS:
+        if args.fake:
+            # A fresh server per variant, so neither inherits the other's cached prefixes
+            config = fake_server.FakeServerConfig(latency_median=args.latency_median,
+                                                  prefix_cache_block=args.prefix_cache_block, seed=1)
+            servers[variant] = fake_server.start(config)
+            agents.OPENAI_BASE_URL = f"http://127.0.0.1:{servers[variant].server_port}/v1"
+            agents._client = None
+        r = run_variant(agents, llm_cache, metrics, variant, args.runs)
+        print(
+            f"{variant:<8}{r['requests']:>6}{r['p50_s'] or 0:>8.3f}{r['p95_s'] or 0:>8.3f}"
+            f"{r['local_prompt_tokens']:>11.0f}{r['prompt_tokens']:>12.0f}{r['cached_tokens']:>8.0f}"
+            f"{r['cached_share']:>10.1%}{r['fallbacks']:>8}"
+        )
+    for server in servers.values():
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
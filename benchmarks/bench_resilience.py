@@ -0,0 +1,102 @@
+"""
+Run deadlines and the circuit breaker through a provider outage, against the fake server.
+
+    python -m benchmarks.bench_resilience --runs 6 --outage-runs 12 --run-deadline 6 --hang 60
+
+Plays --runs healthy panel runs, then --outage-runs during which every
+request hangs for ~--hang seconds (or, with --outage 500, fails with a 500),
+then --runs after the provider recovers. Each phase is run with the breaker
+off (LLM_BREAKER_FAILURES=0: every run waits out its deadline) and on
+(fails fast to the mock once it opens, probes after --cooldown seconds).
+Reports per-phase mean and p95 run latency, the fallback rate and the
+provider requests sent. The response cache is off.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from benchmarks import fake_server
+from core.metrics import percentile
+
+
+def run_phase(agents, config, label: str, n: int) -> dict:
+    before = config.requests
+    latencies, results = [], []
+    for i in range(n):
+        t0 = time.perf_counter()
+        results.extend(agents.generate_futures(f"Benchmark scenario {i} ({label}): a rival cuts prices"))
+        latencies.append(time.perf_counter() - t0)
+    return {
+        "mean_s": round(sum(latencies) / n, 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "fallback_rate": round(sum(f.get("source") == "Fallback" for f in results) / len(results), 3),
+        "requests": config.requests - before,
+    }
+
+
+def run_setup(agents, resilience, config, args, failures: int) -> dict:
+    resilience._breaker = resilience.CircuitBreaker(failures, args.cooldown)
+    healthy = (config.latency_median, config.error_rate)
+    phases = {"healthy": run_phase(agents, config, "healthy", args.runs)}
+
+    if args.outage == "hang":
+        config.latency_median = args.hang
+    else:
+        config.error_rate = 1.0
+    phases["outage"] = run_phase(agents, config, "outage", args.outage_runs)
+
+    config.latency_median, config.error_rate = healthy
+    time.sleep(args.cooldown)  # the provider is back; give the breaker its cool-down
+    phases["recovered"] = run_phase(agents, config, "recovered", args.runs)
+    phases["breaker"] = resilience.get_breaker().stats()
+    return phases
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    fake_server.add_arguments(ap)
+    ap.add_argument("--runs", type=int, default=6, help="panel runs before and after the outage")
+    ap.add_argument("--outage-runs", type=int, default=12)
+    ap.add_argument("--outage", choices=("hang", "500"), default="hang")
+    ap.add_argument("--hang", type=float, default=60.0, help="median latency during a hang outage")
+    ap.add_argument("--run-deadline", default="6", help="LLM_RUN_DEADLINE_S")
+    ap.add_argument("--request-timeout", default="4", help="LLM_REQUEST_TIMEOUT_S")
+    ap.add_argument("--failures", type=int, default=5, help="LLM_BREAKER_FAILURES for the breaker-on set-up")
+    ap.add_argument("--cooldown", type=float, default=3.0)
+    ap.add_argument("--client-rps", default="1000", help="LLM_RPS for the client-side limiter")
+    ap.add_argument("--json", help="also write the results to this file")
+    ap.set_defaults(latency_median=0.3)
+    args = ap.parse_args()
+
+    config = fake_server.config_from_args(args)
+    server = fake_server.start(config)
+    # core.agents reads these at import time
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["LLM_CACHE"] = "off"
+    os.environ.setdefault("LLM_RPS", args.client_rps)
+    os.environ.setdefault("LLM_TPM", "1e9")
+    os.environ["LLM_RUN_DEADLINE_S"] = args.run_deadline
+    os.environ["LLM_REQUEST_TIMEOUT_S"] = args.request_timeout
+    from core import agents, resilience
+
+    report = {}
+    print(f"{'setup':<12}{'phase':<11}{'mean s':>8}{'p95 s':>8}{'fallbk':>8}{'requests':>10}")
+    for name, failures in (("breaker-off", 0), ("breaker-on", args.failures)):
+        r = report[name] = run_setup(agents, resilience, config, args, failures)
+        for phase in ("healthy", "outage", "recovered"):
+            p = r[phase]
+            print(f"{name:<12}{phase:<11}{p['mean_s']:>8}{p['p95_s']:>8}{p['fallback_rate']:>8}{p['requests']:>10}")
+        print(f"{'':<12}breaker    {json.dumps(r['breaker'])}")
+
+    print(f"server responses: {json.dumps(config.counts, sort_keys=True)}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": report}, f, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
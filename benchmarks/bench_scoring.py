@@ -0,0 +1,99 @@
+"""
+Vectorized batch scoring vs score_futures at 1k, 100k and 10M rows.
+
+    python -m benchmarks.bench_scoring [--sizes 1000,100000,10000000] [--loop-max 1000000]
+
+For each size it times score_futures over packet dicts (up to --loop-max
+rows; the dicts alone take ~1 KB each), score_arrays over NumPy columns and
+score_table over an Arrow table with a strategy_len column, plus
+score_table over real strategy strings up to --strings-max rows. Every
+vectorized result is checked for exact equality with score_futures (on the
+first --loop-max rows above that size). Times are the best of --repeat.
+"""
+import time
+import argparse
+
+import numpy as np
+import pyarrow as pa
+
+from core import scoring
+
+
+def synthetic_columns(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "tone_score": rng.uniform(0.0, 2.0, n),
+        "risk_score": rng.uniform(0.0, 2.0, n),
+        "strategy_len": rng.integers(0, 1600, n, dtype=np.int32),
+    }
+
+
+def _best_of(fn, repeat: int) -> tuple:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def _matches(expected: list, columns: dict) -> bool:
+    n = len(expected)
+    return all(
+        np.array_equal(np.fromiter((s[k] for s in expected), np.float64, n), np.asarray(columns[k])[:n])
+        for k in scoring.SCORE_COLUMNS
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default="1000,100000,10000000")
+    ap.add_argument("--loop-max", type=int, default=1000000, help="largest size scored with score_futures")
+    ap.add_argument("--strings-max", type=int, default=1000000, help="largest size scored from strategy strings")
+    ap.add_argument("--profile", default="default")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    strategies = ["x" * k for k in range(1600)]
+    print(f"{'rows':>12}{'dict loop s':>13}{'numpy s':>10}{'arrow s':>10}{'arrow str s':>13}"
+          f"{'numpy rows/s':>15}{'speed-up':>10}  exact")
+    for n in (int(s) for s in args.sizes.split(",")):
+        cols = synthetic_columns(n)
+        loop_n = min(n, args.loop_max)
+        futures = [
+            {"name": "Realist", "tone_score": t, "risk_score": r, "strategy": strategies[k]}
+            for t, r, k in zip(cols["tone_score"][:loop_n].tolist(), cols["risk_score"][:loop_n].tolist(),
+                               cols["strategy_len"][:loop_n].tolist())
+        ]
+        loop_s, expected = _best_of(lambda f=futures: scoring.score_futures(f, args.profile),
+                                    1 if loop_n >= 100000 else args.repeat)
+        del futures
+
+        numpy_s, arrays = _best_of(lambda: scoring.score_arrays(
+            cols["tone_score"], cols["risk_score"], cols["strategy_len"], args.profile), args.repeat)
+        exact = _matches(expected, arrays)
+        del arrays
+
+        table = pa.table(cols)
+        arrow_s, scored = _best_of(lambda: scoring.score_table(table, args.profile), args.repeat)
+        exact &= _matches(expected, {k: scored.column(k).to_numpy() for k in scoring.SCORE_COLUMNS})
+        del scored, table
+
+        strings_s = None
+        if n <= args.strings_max:
+            table = pa.table({"tone_score": cols["tone_score"], "risk_score": cols["risk_score"],
+                              "strategy": pa.array(strategies).take(pa.array(cols["strategy_len"]))})
+            strings_s, scored = _best_of(lambda: scoring.score_table(table, args.profile), args.repeat)
+            exact &= _matches(expected, {k: scored.column(k).to_numpy() for k in scoring.SCORE_COLUMNS})
+            del scored, table
+
+        # The dict loop is linear; extrapolate it past --loop-max for the speed-up
+        loop_est = loop_s * n / loop_n
+        print(f"{n:>12,}{f'{loop_s:.4f}' if loop_n == n else '-':>13}{numpy_s:>10.4f}{arrow_s:>10.4f}"
+              f"{'-' if strings_s is None else f'{strings_s:.4f}':>13}{n / numpy_s:>15,.0f}"
+              f"{loop_est / numpy_s:>9.0f}×  {'yes' if exact else 'NO'}"
+              + ("" if loop_n == n else f" (first {loop_n:,})"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Near-duplicate scenario index: lookup latency by index size, plus which
+rewordings clear the similarity threshold.
+
+    python -m benchmarks.bench_semantic_cache [--sizes 1000,10000,50000] [--queries 500]
+
+Synthetic scenarios draw words from a Zipf-distributed vocabulary so common
+terms have long posting lists, as they would in real traffic. Times cover
+the full lookup (vectorising the query + scoring), not the SQLite fetch.
+"""
+import time
+import random
+import argparse
+
+from core.metrics import percentile
+from core.semantic_cache import SEMANTIC_THRESHOLD, ScenarioIndex
+
+REWORDINGS = [
+    ("A new open-source video model drops tomorrow and disrupts the market", [
+        "An open-source video model is released tomorrow and disrupts the market",
+        "Tomorrow a new open source video model drops, disrupting the market",
+        "A new open-source video model drops tomorrow and disrupts the whole market",
+        "Open-source video model launch tomorrow shakes up the market",
+        "A new closed-source image model drops tomorrow and disrupts the market",
+        "The regulator opens an inquiry into the company's data practices",
+    ]),
+]
+
+
+def synthetic_scenarios(n: int, vocab: int = 20000, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    weights = [1.0 / (i + 1) for i in range(vocab)]
+    return [" ".join(rng.choices(words, weights, k=rng.randint(8, 24))) for _ in range(n)]
+
+
+def bench_size(n: int, queries: int) -> dict:
+    texts = synthetic_scenarios(n + 300)
+    index = ScenarioIndex()
+    t0 = time.perf_counter()
+    index.add_many(texts[:n])
+    load_s = time.perf_counter() - t0
+
+    adds = []
+    for text in texts[n:]:
+        t0 = time.perf_counter()
+        index.add(text)
+        adds.append((time.perf_counter() - t0) * 1000)
+
+    rng = random.Random(1)
+    lookups = []
+    for _ in range(queries):
+        text = rng.choice(texts)
+        t0 = time.perf_counter()
+        index.query(text)
+        lookups.append((time.perf_counter() - t0) * 1000)
+    return {
+        "entries": len(index),
+        "load_s": load_s,
+        "lookup_p50_ms": percentile(lookups, 50),
+        "lookup_p99_ms": percentile(lookups, 99),
+        "add_p50_ms": percentile(adds, 50),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default="1000,10000,50000")
+    ap.add_argument("--queries", type=int, default=500)
+    args = ap.parse_args()
+
+    print(f"{'entries':>8}{'load s':>9}{'lookup p50 ms':>15}{'p99 ms':>9}{'add p50 ms':>12}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        r = bench_size(n, args.queries)
+        print(f"{r['entries']:>8}{r['load_s']:>9.2f}{r['lookup_p50_ms']:>15.3f}"
+              f"{r['lookup_p99_ms']:>9.3f}{r['add_p50_ms']:>12.3f}")
+
+    print(f"\nthreshold {SEMANTIC_THRESHOLD} (LLM_SEMANTIC_THRESHOLD)")
+    for original, variants in REWORDINGS:
+        index = ScenarioIndex()
+        index.add_many(synthetic_scenarios(500) + [original])
+        print(f"stored: {original}")
+        for text in variants:
+            _, sim = index.query(text)
+            print(f"  {sim:5.2f} {'hit ' if sim >= SEMANTIC_THRESHOLD else 'miss'}  {text}")
+
+
+if __name__ == "__main__":
+    main()
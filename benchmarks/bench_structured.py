@@ -0,0 +1,106 @@
+"""
+Structured-output (response_format) vs prompt-only JSON, against the fake server.
+
+    python -m benchmarks.bench_structured --scenarios 30 --latency-median 0.3 \
+        --shapes clean=0.6,fenced=0.1,trailing_comma=0.1,truncated=0.15,echo=0.05
+
+Runs the same scenarios through generate_futures in three set-ups:
+  prompt        LLM_STRUCTURED=off (SCHEMA_HINT + repair parser + retry)
+  auto          LLM_STRUCTURED=auto, endpoint accepts response_format
+  auto-unsup    LLM_STRUCTURED=auto, endpoint rejects it (probe → fallback)
+For each it reports provider requests per packet, the parse-failure retry
+rate (failed or empty parses per packet, each one a second round trip),
+mean and p95 per-scenario latency and the fallback rate. With response_format
+the fake server answers every shape but "echo" with clean JSON, as
+constrained decoding would. The response cache is off.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from benchmarks import fake_server
+from core.metrics import percentile
+
+SETUPS = [
+    ("prompt", "off", True),
+    ("auto", "auto", True),
+    ("auto-unsup", "auto", False),
+]
+
+
+def _counter_sum(metrics, name: str, **labels) -> float:
+    return sum(
+        c["value"] for c in metrics.snapshot()["counters"]
+        if c["name"] == name and all(c["labels"].get(k) == v for k, v in labels.items())
+    )
+
+
+def run_setup(agents, metrics, config, mode: str, supported: bool, scenarios: list) -> dict:
+    agents.LLM_STRUCTURED = mode
+    agents._structured_support = None  # fresh process as far as probing goes
+    config.structured = supported
+    metrics.reset()
+    before = config.requests
+
+    latencies, results = [], []
+    for s in scenarios:
+        t0 = time.perf_counter()
+        futures = agents.generate_futures(s)
+        latencies.append(time.perf_counter() - t0)
+        results.extend(futures)
+
+    packets = len(results)
+    parse_failures = sum(_counter_sum(metrics, "llm_parse_total", result=r) for r in ("failed", "empty"))
+    probes = {r: _counter_sum(metrics, "llm_structured_probe_total", result=r)
+              for r in ("supported", "unsupported", "rejected", "error")}
+    return {
+        "requests_per_packet": round((config.requests - before) / packets, 3),
+        "parse_retry_rate": round(parse_failures / packets, 3),
+        "echo_rate": round(_counter_sum(metrics, "llm_echo_rejections_total") / packets, 3),
+        "mean_s": round(sum(latencies) / len(latencies), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "fallback_rate": round(sum(f.get("source") == "Fallback" for f in results) / packets, 3),
+        "modes": sorted({f.get("meta", {}).get("output_mode", "-") for f in results}),
+        "probe": {k: int(v) for k, v in probes.items() if v},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    fake_server.add_arguments(ap)
+    ap.add_argument("--scenarios", type=int, default=30)
+    ap.add_argument("--client-rps", default="1000", help="LLM_RPS for the client-side limiter")
+    ap.add_argument("--json", help="also write the results to this file")
+    ap.set_defaults(shapes="clean=0.6,fenced=0.1,trailing_comma=0.1,truncated=0.15,echo=0.05",
+                    latency_median=0.3)
+    args = ap.parse_args()
+
+    config = fake_server.config_from_args(args)
+    server = fake_server.start(config)
+    # core.agents reads these at import time
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["LLM_CACHE"] = "off"
+    os.environ.setdefault("LLM_RPS", args.client_rps)
+    from core import agents, metrics
+
+    report = {}
+    print(f"{'setup':<12}{'req/pkt':>9}{'parse retry':>13}{'echo':>7}{'mean s':>8}{'p95 s':>8}{'fallbk':>8}  modes / probe")
+    for name, mode, supported in SETUPS:
+        scenarios = [f"Benchmark scenario {i} ({name}): a rival ships a cheaper product in market {i}"
+                     for i in range(args.scenarios)]
+        r = report[name] = run_setup(agents, metrics, config, mode, supported, scenarios)
+        print(f"{name:<12}{r['requests_per_packet']:>9}{r['parse_retry_rate']:>13}{r['echo_rate']:>7}"
+              f"{r['mean_s']:>8}{r['p95_s']:>8}{r['fallback_rate']:>8}  {','.join(r['modes'])} {r['probe'] or ''}")
+
+    print(f"server responses: {json.dumps(config.counts, sort_keys=True)}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": report}, f, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
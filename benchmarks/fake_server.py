@@ -0,0 +1,299 @@
+"""
+Local OpenAI-compatible stand-in for /v1/chat/completions.
+
+    python -m benchmarks.fake_server --port 8010 --latency-median 0.8 \
+        --error-rate 0.02 --burst-every 100 --burst-len 10 \
+        --shapes clean=0.7,fenced=0.1,trailing_comma=0.1,truncated=0.05,echo=0.05
+
+Response bodies come from benchmarks/corpus/json_outputs.jsonl (any corpus
+"kind" can be used as a shape, plus the aliases below); the "echo" shape
+repeats the request's scenario as the narrative, "missing_key" drops one
+field and "bad_score" makes tone_score a word. A follow-up asking for
+"exactly these keys: …" (a partial repair) gets just those keys back. A
+batched panel request (one "PERSONA n: name — …" line per persona) gets
+{"packets": [...]} with one packet per persona, each drawn from the shapes;
+shapes that damage the JSON text rather than one field come back clean
+inside a batch.
+Latency is log-normal.
+Every --burst-every requests the next --burst-len get a 429 with
+Retry-After, and --error-rate of the rest get a 500. Streaming requests are
+answered as server-sent events. With --prefix-cache-block N the server
+mimics provider prompt caching: usage reports as cached the longest prompt
+prefix it has already seen, in whole blocks of N tokens. Requests carrying
+a response_format get a 400 unless --structured is set, in which case every
+shape except "echo" is answered with clean JSON, as constrained decoding would.
+"""
+import os
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CORPUS = os.path.join(os.path.dirname(__file__), "corpus", "json_outputs.jsonl")
+
+SHAPE_ALIASES = {
+    "clean": "clean_pretty",
+    "trailing_comma": "trailing_comma_object",
+}
+REPAIR_KEYS = re.compile(r"exactly these keys: ([a-z_, ]+)\.")
+BATCH_PERSONA = re.compile(r"^PERSONA \d+: (.+?) — ", re.M)
+PACKET_SHAPES = ("echo", "missing_key", "bad_score")
+
+
+def load_shapes(path: str = CORPUS) -> dict:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return {row["kind"]: row["content"] for row in rows}
+
+
+def parse_shape_weights(spec: str) -> dict:
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class FakeServerConfig:
+    def __init__(self, latency_median: float = 0.8, latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, burst_every: int = 0, burst_len: int = 0,
+                 retry_after: float = 1.0, shapes: dict = None, seed: int = None,
+                 prefix_cache_block: int = 0, structured: bool = False):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_len = burst_len
+        self.retry_after = retry_after
+        self.shapes = shapes or {"clean": 1.0}
+        self.rng = random.Random(seed)
+        self.corpus = load_shapes()
+        self.prefix_cache_block = prefix_cache_block
+        self.structured = structured
+        self._prefixes = set()
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.counts = {}
+
+    def count(self, outcome: str) -> None:
+        with self.lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def next_request(self) -> int:
+        with self.lock:
+            self.requests += 1
+            return self.requests
+
+    def in_burst(self, n: int) -> bool:
+        return bool(self.burst_every) and (n % self.burst_every) < self.burst_len and n > self.burst_len
+
+    def latency(self) -> float:
+        with self.lock:
+            return self.latency_median * self.rng.lognormvariate(0.0, self.latency_sigma)
+
+    def cached_tokens(self, request: dict) -> int:
+        """Tokens (at 4 chars each) of the longest already-seen prompt prefix, in whole blocks."""
+        text = "\x00".join(m["content"] for m in request.get("messages", []))
+        step = self.prefix_cache_block * 4
+        cached, hit = 0, True
+        with self.lock:
+            for end in range(step, len(text) + 1, step):
+                prefix = hash(text[:end])
+                if hit and prefix in self._prefixes:
+                    cached = end // 4
+                else:
+                    hit = False
+                    self._prefixes.add(prefix)
+        return cached
+
+    def _pick_shape(self) -> str:
+        with self.lock:
+            names = list(self.shapes)
+            return self.rng.choices(names, weights=[self.shapes[n] for n in names])[0]
+
+    def _packet(self, shape: str, request: dict) -> dict:
+        """A clean packet, damaged in one field for the echo, missing_key and bad_score shapes."""
+        packet = json.loads(self.corpus["clean"])
+        if shape == "echo":
+            user = next((m["content"] for m in request.get("messages", []) if m["role"] == "user"), "")
+            packet["narrative"] = next(
+                (line[len("Scenario: "):] for line in user.splitlines() if line.startswith("Scenario: ")), ""
+            )
+        elif shape == "missing_key":
+            with self.lock:
+                del packet[self.rng.choice(["narrative", "headlines", "strategy", "vulnerabilities", "risk_score"])]
+        elif shape == "bad_score":
+            packet["tone_score"] = "high"
+        return packet
+
+    def content(self, request: dict) -> tuple:
+        user = next((m["content"] for m in reversed(request.get("messages", [])) if m["role"] == "user"), "")
+        repair = REPAIR_KEYS.search(user)
+        if repair:
+            clean = json.loads(self.corpus["clean"])
+            return "repair", json.dumps({k.strip(): clean.get(k.strip()) for k in repair.group(1).split(",")})
+
+        shape = self._pick_shape()
+        if request.get("response_format"):
+            if request["response_format"].get("json_schema", {}).get("name") == "probe":
+                return "structured", '{"ok": true}'
+            if shape != "echo":
+                return "structured", json.dumps(json.loads(self.corpus["clean"]))
+        personas = BATCH_PERSONA.findall(user)
+        if personas:
+            packets = []
+            for name, shape in zip(personas, [shape] + [self._pick_shape() for _ in personas[1:]]):
+                self.count(f"batch_{shape if shape in PACKET_SHAPES else 'clean'}")
+                packets.append(dict(self._packet(shape, request), name=name))
+            return "batch", json.dumps({"packets": packets})
+        if shape in PACKET_SHAPES:
+            return shape, json.dumps(self._packet(shape, request))
+        return shape, self.corpus[SHAPE_ALIASES.get(shape, shape)]
+
+
+def make_handler(config: FakeServerConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status: int, body: dict, headers: dict = None):
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(raw)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            try:
+                self.end_headers()
+                self.wfile.write(raw)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up first (a cancelled hedge, a deadline timeout)
+                config.count("client_gone")
+
+        def do_POST(self):
+            length = int(self.headers.get("content-length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            n = config.next_request()
+
+            if config.in_burst(n):
+                config.count("429")
+                return self._json(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                                  {"retry-after": str(config.retry_after)})
+            with config.lock:
+                failed = config.rng.random() < config.error_rate
+            if failed:
+                config.count("500")
+                time.sleep(config.latency() / 4)
+                return self._json(500, {"error": {"message": "upstream error", "type": "server_error"}})
+
+            if request.get("response_format") and not config.structured:
+                config.count("400")
+                return self._json(400, {"error": {"message": "response_format is not supported",
+                                                  "type": "invalid_request_error"}})
+
+            shape, content = config.content(request)
+            config.count(shape)
+            delay = config.latency()
+            usage = {
+                "prompt_tokens": sum(len(m["content"]) for m in request.get("messages", [])) // 4,
+                "completion_tokens": len(content) // 4,
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            if config.prefix_cache_block:
+                usage["prompt_tokens_details"] = {"cached_tokens": config.cached_tokens(request)}
+
+            if request.get("stream"):
+                return self._stream(content, delay)
+
+            time.sleep(delay)
+            self._json(200, {
+                "id": f"fake-{n}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            })
+
+        def _stream(self, content: str, delay: float):
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self.send_header("connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+            time.sleep(delay * 0.2)  # time to first token
+            try:
+                for piece in pieces:
+                    chunk = {
+                        "id": "fake-stream", "object": "chat.completion.chunk",
+                        "created": int(time.time()), "model": "fake",
+                        "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                    }
+                    self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+                    self.wfile.flush()
+                    time.sleep(delay * 0.8 / len(pieces))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                config.count("stream_aborted")
+
+    return Handler
+
+
+def start(config: FakeServerConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the server on a background thread; port 0 picks a free one."""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--latency-median", type=float, default=0.8, help="seconds")
+    ap.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal sigma")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of 500 responses")
+    ap.add_argument("--burst-every", type=int, default=0, help="start a 429 burst every N requests")
+    ap.add_argument("--burst-len", type=int, default=0, help="requests per 429 burst")
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--shapes", default="clean=1", help="e.g. clean=0.8,fenced=0.1,echo=0.1")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--prefix-cache-block", type=int, default=0,
+                    help="simulate prompt prefix caching in blocks of N tokens (0 = off)")
+    ap.add_argument("--structured", action="store_true", help="accept response_format (JSON schema) requests")
+
+
+def config_from_args(args) -> FakeServerConfig:
+    return FakeServerConfig(
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate, burst_every=args.burst_every, burst_len=args.burst_len,
+        retry_after=args.retry_after, shapes=parse_shape_weights(args.shapes), seed=args.seed,
+        prefix_cache_block=args.prefix_cache_block, structured=args.structured,
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8010)
+    add_arguments(ap)
+    args = ap.parse_args()
+
+    server = start(config_from_args(args), args.host, args.port)
+    print(f"fake server on http://{args.host}:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,98 @@
 import json
+import math
 import re
 import os
 import random
+import asyncio
+import queue
+import threading
+import weakref
+import time
+import functools
 from dotenv import load_dotenv
-from openai import OpenAI
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 
+# Before the core imports below, so their env-driven settings see .env too
 load_dotenv()
 
+from core import cache as llm_cache
+from core import hedging
+from core import metrics
+from core import prompts
+from core import registry
+from core import resilience
+from core.streaming import PacketStreamParser
+from core.ratelimit import LLM_MAX_INFLIGHT, LLM_TRANSPORT_RETRIES, backoff_delay, classify_error, get_limiter
+
 USE_LLM = True
 
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.minimax.io/v1")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 MINIMAX_MODEL = os.getenv("MINIMAX_MODEL", "MiniMax-M2.5")
 
-client = OpenAI(base_url=OPENAI_BASE_URL, api_key=OPENAI_API_KEY)
+# The openai SDK takes ~0.5s to import, so the client is only built (and
+# the SDK only imported) on the first provider call, once per process.
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+
+            # Transport retries are handled by core.ratelimit, not the SDK
+            _client = OpenAI(base_url=OPENAI_BASE_URL, api_key=OPENAI_API_KEY, max_retries=0)
+    return _client
+
+
+def __getattr__(name):
+    # Keeps `core.agents.client` working for callers that used the old global
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-AGENTS = [
-    {"name": "Visionary", "style": "optimistic, exponential, bold, big bets"},
-    {"name": "Realist", "style": "cautious, grounded, risk-aware, pragmatic"},
-    {"name": "Capitalist", "style": "profit-maximizing, distribution-first, leverage-driven"},
-    {"name": "Chaos Agent", "style": "disruptive, attention-hacking, high volatility, unpredictable"},
-]
+
+# The persona panel, loaded from registry.AGENTS_CONFIG at the end of this
+# module; set_agents() swaps it in place
+AGENTS = []
+_STYLE_RULES = {}
 
 
 def _style_rules(agent_name: str):
-    if agent_name == "Visionary":
-        return (
-            "VOICE RULES:\n"
-            "- Write like a founder-pitch + futurist.\n"
-            "- Use vivid metaphors + decisive language.\n"
-            "- Include 1 bold contrarian claim.\n"
-            "- Avoid generic advice. Be specific.\n"
-        )
-    if agent_name == "Realist":
-        return (
-            "VOICE RULES:\n"
-            "- Write like an operator + risk manager.\n"
-            "- Be blunt and practical. Give a YES or NO verdict.\n"
-            "- State 1 key risk and 1 key opportunity.\n"
-            "- Keep it tight — no bullet lists, just dense prose.\n"
-        )
-    if agent_name == "Capitalist":
-        return (
-            "VOICE RULES:\n"
-            "- Write like a VC / growth lead.\n"
-            "- Talk in ROI, upside, downside, optionality.\n"
-            "- Include a terms to demand section.\n"
-            "- Use business metrics language (runway, dilution, moat).\n"
-        )
-    if agent_name == "Chaos Agent":
-        return (
-            "VOICE RULES:\n"
-            "- Write like an unhinged hype strategist.\n"
-            "- Use short punchy lines. Occasional caps.\n"
-            "- Include 1 meme-y line.\n"
-            "- Include 1 illegal in spirit move (NOT actually illegal).\n"
-        )
-    return "VOICE RULES:\n- Be distinct and specific.\n"
+    return _STYLE_RULES.get(agent_name) or registry.style_rules({"voice_rules": registry.DEFAULT_VOICE_RULES})
 
 
+PACKET_KEYS = ["name", "narrative", "headlines", "strategy", "vulnerabilities", "tone_score", "risk_score"]
+
+# Stream completions by default (LLM_STREAM=1) so narratives surface early
+LLM_STREAM = os.getenv("LLM_STREAM", "0") == "1"
+
+# Request all personas in one completion from generate_futures (LLM_BATCHED=1),
+# at most LLM_BATCH_SIZE personas per completion
+LLM_BATCHED = os.getenv("LLM_BATCHED", "0") == "1"
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "8"))
+
+# Serve stored futures for reworded scenarios (LLM_SEMANTIC_CACHE=1). Off by
+# default: a near-duplicate's packets can mention details of the original.
+LLM_SEMANTIC_CACHE = os.getenv("LLM_SEMANTIC_CACHE", "0") == "1"
+
+# Prompt layout (LLM_PROMPT_VARIANT): "prefix" puts static text first so
+# providers can reuse a cached prompt prefix; "legacy" is scenario-first
+PROMPT_VARIANTS = ("prefix", "legacy")
+PROMPT_VARIANT = os.getenv("LLM_PROMPT_VARIANT", "prefix").strip().lower()
+
+# JSON-schema constrained output (LLM_STRUCTURED): "off" relies on the prompt
+# and the repair parser, "on" always sends response_format, "auto" probes
+# the endpoint once per process and sends it only where it is accepted
+STRUCTURED_MODES = ("off", "auto", "on")
+LLM_STRUCTURED = os.getenv("LLM_STRUCTURED", "off").strip().lower()
+
+# Re-request only the missing or invalid fields of an otherwise usable packet
+# (LLM_PARTIAL_REPAIR=1) instead of regenerating the whole thing
+LLM_PARTIAL_REPAIR = os.getenv("LLM_PARTIAL_REPAIR", "1") == "1"
+
 # Tighter schema with explicit char limits to prevent runaway output
 SCHEMA_HINT = """
 Return ONLY a valid JSON object with EXACTLY these keys. No other text.
@@ -83,130 +116,717 @@ HARD RULES — violating any of these will cause a system failure:
 6. Output the JSON object and absolutely nothing else.
 """
 
+# The same packet as a response_format schema; SCHEMA_HINT still carries the
+# length rules, which strict schemas cannot express
+_SHORT_LIST = {"type": "array", "items": {"type": "string"}}
+PACKET_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "narrative": {"type": "string"},
+        "headlines": _SHORT_LIST,
+        "strategy": {"type": "string"},
+        "vulnerabilities": _SHORT_LIST,
+        "tone_score": {"type": "number"},
+        "risk_score": {"type": "number"},
+    },
+    "required": PACKET_KEYS,
+    "additionalProperties": False,
+}
+
+
+# Characters the repair scanner has to look at; everything else is copied in bulk
+_JSON_SIGNIFICANT = re.compile(r'["\\{}\[\],\n\r\t]')
+
 
 def _safe_parse_json(content: str) -> dict:
-    """Multi-strategy JSON parser. Sets _recovered=True if repairs were needed."""
-    cleaned = content.strip()
-    # Strip markdown fences
-    cleaned = re.sub(r'^```(?:json)?\s*', '', cleaned, flags=re.MULTILINE)
-    cleaned = re.sub(r'\s*```$', '', cleaned, flags=re.MULTILINE)
-    cleaned = cleaned.strip()
-
-    # Extract outermost JSON object
-    start = cleaned.find("{")
-    end = cleaned.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        raise ValueError(f"No JSON object found in output: {cleaned[:300]}")
-
-    json_str = cleaned[start:end + 1]
-
-    # Strategy 1: direct parse
+    """
+    Single-pass tolerant JSON parser. Well-formed output is parsed directly;
+    otherwise one scan skips fences and prose before the first "{", drops
+    trailing commas, blanks raw newlines/tabs inside strings and cuts
+    everything after the matching closing brace, then calls json.loads once.
+    Sets _recovered=True if repairs were needed and lists them in _repairs.
+    """
+    start = content.find("{")
+    last = content.rfind("}")
+    if start == -1 or last < start:
+        raise ValueError(f"No JSON object found in output: {content.strip()[:300]}")
+
+    # Fast path: well-formed output parses in C with no scan at all
     try:
-        parsed = json.loads(json_str)
+        parsed = json.loads(content[start:last + 1])
         parsed["_recovered"] = False
+        parsed["_repairs"] = []
         return parsed
     except json.JSONDecodeError:
         pass
 
-    # Strategy 2: remove trailing commas
-    repaired = re.sub(r',(\s*[}\]])', r'\1', json_str)
-    try:
-        parsed = json.loads(repaired)
-        parsed["_recovered"] = True
-        return parsed
-    except json.JSONDecodeError:
-        pass
+    out = []
+    repairs = []
+    depth = 0
+    in_string = False
+    escaped_pos = -1   # index of the char following a backslash inside a string
+    comma_at = -1      # len(out) right after a comma that might be trailing
+    pos = start
+    end = len(content)
 
-    # Strategy 3: replace literal control chars inside quoted strings only
-    def fix_newlines_in_strings(s):
-        result = []
-        in_string = False
-        escape_next = False
-        for ch in s:
-            if escape_next:
-                result.append(ch)
-                escape_next = False
-            elif ch == '\\' and in_string:
-                result.append(ch)
-                escape_next = True
+    for m in _JSON_SIGNIFICANT.finditer(content, start):
+        i = m.start()
+        ch = content[i]
+
+        if in_string:
+            if i == escaped_pos:
+                continue
+            if ch == "\\":
+                escaped_pos = i + 1
             elif ch == '"':
-                in_string = not in_string
-                result.append(ch)
-            elif ch in ('\n', '\r', '\t') and in_string:
-                result.append(' ')
-            else:
-                result.append(ch)
-        return ''.join(result)
-
-    repaired2 = fix_newlines_in_strings(repaired)
+                in_string = False
+            elif ch in "\n\r\t":
+                out.append(content[pos:i])
+                out.append(" ")
+                pos = i + 1
+                if "control_chars" not in repairs:
+                    repairs.append("control_chars")
+            continue
+
+        if ch in "\n\r\t":
+            continue
+
+        gap = content[pos:i]
+        if ch in "}]" and comma_at == len(out) and not gap.strip():
+            out[-1] = out[-1][:-1]
+            if "trailing_commas" not in repairs:
+                repairs.append("trailing_commas")
+        out.append(gap + ch)
+        pos = i + 1
+        comma_at = -1
+
+        if ch == '"':
+            in_string = True
+        elif ch == ",":
+            comma_at = len(out)
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                end = i + 1
+                break
+
+    if pos < end:
+        out.append(content[pos:end])
+    # Text after the object only counts as a repair when it could have been
+    # mistaken for part of it (another closing brace further on)
+    if "}" in content[end:]:
+        repairs.append("trailing_junk")
+
+    json_str = "".join(out)
     try:
-        parsed = json.loads(repaired2)
-        parsed["_recovered"] = True
-        return parsed
+        parsed = json.loads(json_str)
     except json.JSONDecodeError:
-        pass
+        raise ValueError(
+            f"Could not parse JSON after all repair attempts. Content: {json_str[:400]}"
+        ) from None
 
-    # Strategy 4: truncate to last valid closing brace
-    # Sometimes the model outputs valid JSON followed by trailing garbage
-    for end_idx in range(len(repaired2) - 1, 0, -1):
-        if repaired2[end_idx] == '}':
-            try:
-                parsed = json.loads(repaired2[:end_idx + 1])
-                parsed["_recovered"] = True
-                return parsed
-            except json.JSONDecodeError:
-                continue
+    parsed["_recovered"] = bool(repairs)
+    parsed["_repairs"] = repairs
+    return parsed
 
-    raise ValueError(
-        f"Could not parse JSON after all repair attempts. Content: {json_str[:400]}"
-    )
 
+_SALVAGE_DECODER = json.JSONDecoder(strict=False)  # tolerates raw newlines in strings
+_SALVAGE_GAP = re.compile(r"[\s,]*")
+_SALVAGE_COLON = re.compile(r"\s*:\s*")
+_SALVAGE_END = re.compile(r"\s*[,}]")
 
-def _minimax_generate(agent_name: str, style: str, scenario: str, attempt: int = 1):
-    if not OPENAI_API_KEY:
-        raise RuntimeError("Missing OPENAI_API_KEY (MiniMax key)")
 
-    style_rules = _style_rules(agent_name)
+def _salvage_fields(content: str) -> dict:
+    """
+    The complete top-level key/value pairs of a JSON object that was cut off
+    (e.g. at max_tokens), up to the first one that does not decode. A value
+    counts only once a "," or "}" follows it — "risk_score": 1 cut from 1.45
+    decodes fine but is not the value the model wrote.
+    """
+    start = content.find("{")
+    if start == -1:
+        return {}
+    fields = {}
+    pos = start + 1
+    while True:
+        pos = _SALVAGE_GAP.match(content, pos).end()
+        try:
+            key, pos = _SALVAGE_DECODER.raw_decode(content, pos)
+            colon = _SALVAGE_COLON.match(content, pos)
+            if not isinstance(key, str) or colon is None:
+                break
+            value, pos = _SALVAGE_DECODER.raw_decode(content, colon.end())
+        except json.JSONDecodeError:
+            break
+        if _SALVAGE_END.match(content, pos) is None:
+            break
+        fields[key] = value
+    return fields
 
-    system = (
-        f"You are {agent_name}, a strategic persona generating a future scenario packet. "
-        "OUTPUT FORMAT: You must return a single valid JSON object and absolutely nothing else. "
-        "No markdown. No code fences. No explanation before or after. "
-        "Keep all string values short and on a single line. "
-        "Do NOT use double quotes inside string values."
+
+_FORMAT_RULES = (
+    "OUTPUT FORMAT: You must return a single valid JSON object and absolutely nothing else. "
+    "No markdown. No code fences. No explanation before or after. "
+    "Keep all string values short and on a single line. "
+    "Do NOT use double quotes inside string values."
+)
+
+
+def _check_variant(variant: str) -> str:
+    if variant not in PROMPT_VARIANTS:
+        raise ValueError(f"Unknown prompt variant {variant!r}; expected one of {PROMPT_VARIANTS}")
+    return variant
+
+
+@functools.lru_cache(maxsize=None)
+def _agent_prompt(agent_name: str, style: str, variant: str) -> prompts.CompiledPrompt:
+    """
+    Compiled once per agent and variant. In the "prefix" layout the system
+    message (format rules + schema) is the same for every agent, the user
+    message opens with the persona and the scenario comes last, so only the
+    scenario differs between runs of the same agent.
+    """
+    persona = f"Your persona: {agent_name} — {style}\n\n{_style_rules(agent_name)}\n"
+    if _check_variant(variant) == "legacy":
+        return prompts.CompiledPrompt(
+            system=f"You are {agent_name}, a strategic persona generating a future scenario packet. {_FORMAT_RULES}",
+            user_prefix="Scenario: ",
+            user_suffix=f"\n\n{persona}{SCHEMA_HINT}",
+        )
+    return prompts.CompiledPrompt(
+        system=f"You are a strategic persona generating a future scenario packet. {_FORMAT_RULES}\n{SCHEMA_HINT}",
+        user_prefix=f"You are {agent_name}.\n{persona}\nScenario: ",
     )
 
+
+def _build_messages(agent_name: str, style: str, scenario: str, variant: str = None) -> list:
+    return _agent_prompt(agent_name, style, variant or PROMPT_VARIANT).messages(scenario)
+
+
+def _with_context(scenario: str, context: str = None) -> str:
+    """The scenario line with any extra context (e.g. a debate round) spliced in after it."""
+    return f"{scenario}\n\n{context}" if context else scenario
+
+
+def set_agents(agents: list) -> None:
+    """Replace the persona panel (see core.registry) and precompile its prompts."""
+    _STYLE_RULES.clear()
+    _STYLE_RULES.update({a["name"]: registry.style_rules(a) for a in agents})
+    AGENTS[:] = agents
+    _agent_prompt.cache_clear()
+    _batch_prompt.cache_clear()
+    for a in AGENTS:
+        _agent_prompt(a["name"], a["style"], PROMPT_VARIANT)
+
+
+def _record_prompt_tokens(prompt: prompts.CompiledPrompt, scenario: str, agent_name: str) -> None:
+    metrics.inc("llm_prompt_tokens_local_total", prompt.count_tokens(scenario),
+                agent=agent_name, variant=PROMPT_VARIANT)
+
+
+def _response_format(name: str, schema: dict) -> dict:
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def _completion_kwargs(agent_name: str, style: str, scenario: str, attempt: int,
+                       structured: bool = False) -> dict:
+    kwargs = {
+        "model": MINIMAX_MODEL,
+        "messages": _build_messages(agent_name, style, scenario),
+        "temperature": 0.85 if attempt == 1 else 0.4,
+        "max_tokens": PACKET_MAX_TOKENS,  # hard ceiling — prevents runaway long outputs that break JSON
+    }
+    if structured:
+        kwargs["response_format"] = _response_format("future_packet", PACKET_SCHEMA)
+    return kwargs
+
+
+def _request_mode(kwargs: dict) -> str:
+    return "structured" if "response_format" in kwargs else "prompt"
+
+
+def _usage(resp):
+    usage = getattr(resp, "usage", None)
+    if usage is None:
+        return None
+    out = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+    # Prompt tokens the provider served from its prefix cache, where reported
+    cached = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+    if cached is not None:
+        out["cached_tokens"] = cached
+    return out
+
+
+# Completion budget per re-requested field. A partial repair is only sent
+# for at most REPAIR_MAX_FIELDS fields and when its whole budget is under half
+# of a full generation's max_tokens; anything worse is retried in full.
+PACKET_MAX_TOKENS = 700
+REPAIR_MAX_FIELDS = 2
+REPAIR_FIELD_TOKENS = {
+    "narrative": 110, "headlines": 90, "strategy": 110, "vulnerabilities": 90,
+    "tone_score": 12, "risk_score": 12,
+}
+REPAIR_OVERHEAD_TOKENS = 30
+_REPAIR_FIELD_RULES = {
+    "narrative": "narrative: one line, max 300 chars, clear YES or NO verdict first",
+    "headlines": "headlines: array of 3 single-line strings under 80 chars each",
+    "strategy": "strategy: one line, max 300 chars, 3 actions separated by semicolons",
+    "vulnerabilities": "vulnerabilities: array of 3 single-line strings under 80 chars each",
+    "tone_score": "tone_score: plain float between 0.0 and 2.0",
+    "risk_score": "risk_score: plain float between 0.0 and 2.0",
+}
+
+
+def _invalid_fields(data: dict) -> list:
+    """Packet keys that are missing, or scores that are not finite numbers ("name" is ours to set)."""
+    bad = []
+    for k in PACKET_KEYS:
+        if k == "name":
+            continue
+        if k not in data:
+            bad.append(k)
+        elif k in ("tone_score", "risk_score"):
+            try:
+                if not math.isfinite(float(data[k])):
+                    bad.append(k)
+            except (TypeError, ValueError):
+                bad.append(k)
+    return bad
+
+
+def _repair_budget(fields: list) -> int:
+    return REPAIR_OVERHEAD_TOKENS + sum(REPAIR_FIELD_TOKENS[f] for f in fields)
+
+
+def _parse_packet(content: str, agent_name: str, mode: str = "prompt") -> dict:
+    """
+    Validated packet, or — when one or two fields are missing or invalid and
+    LLM_PARTIAL_REPAIR is on — the usable fields with "_repair" listing the
+    rest, for _repair_packet to fill in. Unusable output raises.
+    """
+    content = (content or "").strip()
+    if not content:
+        metrics.inc("llm_parse_total", result="empty", mode=mode)
+        raise ValueError("Empty model output.")
+
+    try:
+        data = _safe_parse_json(content)
+    except ValueError:
+        data = _salvage_fields(content) if LLM_PARTIAL_REPAIR else {}
+        if not data:
+            metrics.inc("llm_parse_total", result="failed", mode=mode)
+            raise
+        data["_recovered"] = True
+        data["_repairs"] = ["truncated"]
+        metrics.inc("llm_parse_total", result="partial", mode=mode)
+    else:
+        metrics.inc("llm_parse_total", result="recovered" if data["_recovered"] else "clean", mode=mode)
+    for repair in data["_repairs"]:
+        metrics.inc("llm_json_repairs_total", repair=repair)
+
+    if isinstance(data, dict) and LLM_PARTIAL_REPAIR:
+        bad = _invalid_fields(data)
+        if bad and len(bad) <= REPAIR_MAX_FIELDS and _repair_budget(bad) <= PACKET_MAX_TOKENS // 2:
+            for k in bad:
+                data.pop(k, None)
+            data["_repair"] = bad
+            return data
+    return _validate_packet(data, agent_name)
+
+
+def _repair_kwargs(data: dict, fields: list, agent_name: str, style: str, scenario: str,
+                   structured: bool = False) -> dict:
+    """A small follow-up request for just `fields`, showing the model what it already wrote."""
+    kept = {k: data[k] for k in PACKET_KEYS if k in data and k != "name"}
     user = (
-        f"Scenario: {scenario}\n\n"
-        f"Your persona: {agent_name} — {style}\n\n"
-        f"{style_rules}\n"
-        f"{SCHEMA_HINT}"
+        f"You are {agent_name} — {style}.\n{_style_rules(agent_name)}\nScenario: {scenario}\n\n"
+        f"Your packet so far: {json.dumps(kept, ensure_ascii=False)}\n\n"
+        f"Return ONLY a JSON object with exactly these keys: {', '.join(fields)}.\n"
+        + "".join(f"- {_REPAIR_FIELD_RULES[f]}\n" for f in fields)
     )
-
-    resp = client.chat.completions.create(
-        model=MINIMAX_MODEL,
-        messages=[
-            {"role": "system", "content": system},
+    kwargs = {
+        "model": MINIMAX_MODEL,
+        "messages": [
+            {"role": "system", "content": f"You complete a partly written strategic persona packet. {_FORMAT_RULES}"},
             {"role": "user", "content": user},
         ],
-        temperature=0.85 if attempt == 1 else 0.4,
-        max_tokens=700,  # hard ceiling — prevents runaway long outputs that break JSON
-    )
+        "temperature": 0.4,
+        "max_tokens": _repair_budget(fields),
+    }
+    if structured:
+        kwargs["response_format"] = _response_format("packet_repair", {
+            "type": "object",
+            "properties": {f: PACKET_SCHEMA["properties"][f] for f in fields},
+            "required": list(fields),
+            "additionalProperties": False,
+        })
+    return kwargs
 
-    content = (resp.choices[0].message.content or "").strip()
-    if not content:
-        raise ValueError("Empty model output.")
 
-    data = _safe_parse_json(content)
+def _merge_repair(data: dict, fields: list, content: str, agent_name: str) -> dict:
+    try:
+        patch = _safe_parse_json((content or "").strip())
+    except ValueError:
+        patch = {}
+    for f in fields:
+        if f in patch:
+            data[f] = patch[f]
+    still_bad = [f for f in _invalid_fields(data) if f in fields]
+    metrics.inc("llm_partial_repairs_total", result="failed" if still_bad else "ok")
+    if still_bad:
+        raise ValueError(f"Partial repair left fields invalid: {', '.join(still_bad)}")
+    for f in fields:
+        metrics.inc("llm_repaired_fields_total", field=f)
+    data["_repaired"] = list(fields)
+    return _validate_packet(data, agent_name)
 
-    required = ["name", "narrative", "headlines", "strategy", "vulnerabilities", "tone_score", "risk_score"]
-    for k in required:
+
+def _repair_packet(data: dict, agent_name: str, style: str, scenario: str, structured: bool = False,
+                   deadline: float = None) -> dict:
+    """Fill in data["_repair"] fields with one short completion; no-op for complete packets."""
+    fields = data.pop("_repair", None)
+    if not fields:
+        return data
+    with metrics.timer("llm_partial_repair_seconds"):
+        kwargs = _repair_kwargs(data, fields, agent_name, style, scenario, structured)
+        resp = _create_completion(kwargs, deadline=deadline)
+    data["_repair_usage"] = _usage(resp)
+    return _merge_repair(data, fields, resp.choices[0].message.content, agent_name)
+
+
+async def _repair_packet_async(data: dict, agent_name: str, style: str, scenario: str,
+                               structured: bool = False, deadline: float = None) -> dict:
+    fields = data.pop("_repair", None)
+    if not fields:
+        return data
+    with metrics.timer("llm_partial_repair_seconds"):
+        kwargs = _repair_kwargs(data, fields, agent_name, style, scenario, structured)
+        resp = await _create_completion_async(kwargs, deadline=deadline)
+    data["_repair_usage"] = _usage(resp)
+    return _merge_repair(data, fields, resp.choices[0].message.content, agent_name)
+
+
+def _validate_packet(data: dict, agent_name: str) -> dict:
+    if not isinstance(data, dict):
+        raise ValueError("LLM packet is not a JSON object")
+
+    # The name is ours to set; the model may leave it out or get it wrong
+    data["name"] = agent_name
+    for k in PACKET_KEYS:
         if k not in data:
             raise ValueError(f"LLM JSON missing key: {k}")
 
     data["tone_score"] = max(0.0, min(2.0, float(data["tone_score"])))
     data["risk_score"] = max(0.0, min(2.0, float(data["risk_score"])))
-    data["name"] = agent_name
+    return data
+
+
+def _cache_key(agent_name: str, style: str, scenario: str, attempt: int, kwargs: dict) -> str:
+    # Any edit to the system text, style rules, SCHEMA_HINT or layout changes
+    # the compiled prompt's fingerprint and so invalidates the entry.
+    template_hash = _agent_prompt(agent_name, style, PROMPT_VARIANT).fingerprint
+    return llm_cache.cache_key(
+        kwargs["model"], agent_name, style, template_hash, scenario, kwargs["temperature"], attempt
+    )
+
+
+def _cache_miss_status() -> str:
+    return {"off": "bypass", "refresh": "refresh"}.get(llm_cache.CACHE_MODE, "miss")
+
+
+def _cached_packet(key: str, scenario: str = None):
+    if llm_cache.CACHE_MODE != "on":
+        return None
+    packet = llm_cache.get_cache().get(key)
+    if packet is not None and scenario is not None:
+        try:
+            _check_echo(packet, scenario)
+        except ValueError:
+            return None  # stored before echoes were kept out; regenerate and overwrite it
+    if packet is not None:
+        packet["_cache"] = "hit"
+    return packet
+
+
+def _store_packet(key: str, data: dict, scenario: str = None) -> dict:
+    """Cache a finished packet; with `scenario` the echo guard runs first, so rejects are never stored."""
+    if scenario is not None:
+        _check_echo(data, scenario)
+    if llm_cache.CACHE_MODE != "off":
+        # Usage belongs to this call, not to later cache hits
+        llm_cache.get_cache().put(key, {k: v for k, v in data.items() if k != "_repair_usage"})
+    data["_cache"] = _cache_miss_status()
+    return data
+
+
+def _stream_parser(agent_name: str, scenario: str, on_field=None) -> PacketStreamParser:
+    def field_closed(key, value):
+        if key == "narrative":
+            # Run the echo guard now rather than after paying for the rest
+            _check_echo({"narrative": value}, scenario)
+        if on_field is not None:
+            on_field(agent_name, key, value)
+
+    return PacketStreamParser(PACKET_KEYS, on_field=field_closed)
+
+
+def _emit_cached_fields(packet: dict, agent_name: str, on_field=None) -> None:
+    if on_field is not None and packet.get("narrative"):
+        on_field(agent_name, "narrative", packet["narrative"])
+
+
+def _estimate_tokens(kwargs: dict) -> int:
+    # ~4 chars per token for the prompt, plus the full completion budget
+    prompt_chars = sum(len(m["content"]) for m in kwargs["messages"])
+    return prompt_chars // 4 + kwargs.get("max_tokens", 0)
+
+
+def _used_tokens(resp):
+    usage = _usage(resp)
+    return usage["prompt_tokens"] + usage["completion_tokens"] if usage else None
+
+
+def _record_request(kwargs: dict, t0: float, t_first: float, resp=None) -> None:
+    # t_first is when the response headers arrived — for streams that is
+    # the time to first byte; for plain calls it is roughly the whole call
+    elapsed = time.perf_counter() - t0
+    stream = "true" if kwargs.get("stream") else "false"
+    metrics.inc("llm_requests_total", outcome="ok")
+    metrics.observe("llm_request_seconds", elapsed, stream=stream, mode=_request_mode(kwargs))
+    metrics.observe("llm_ttfb_seconds", t_first - t0, stream=stream)
+    usage = _usage(resp) if resp is not None else None
+    if usage:
+        metrics.inc("llm_tokens_total", usage["prompt_tokens"], kind="prompt")
+        metrics.inc("llm_tokens_total", usage["completion_tokens"], kind="completion")
+        if usage.get("cached_tokens"):
+            metrics.inc("llm_tokens_total", usage["cached_tokens"], kind="prompt_cached")
+
+
+def _record_request_failure(retryable: bool, throttled: bool) -> None:
+    if throttled:
+        outcome = "throttled"
+    elif retryable:
+        outcome = "transport_error"
+    else:
+        outcome = "failed"  # includes streams aborted by the parser
+    metrics.inc("llm_requests_total", outcome=outcome)
+
+
+def _timeout_kwargs(deadline: float) -> dict:
+    """The per-request timeout create() takes: whatever is left until `deadline`."""
+    left = resilience.request_timeout(deadline)
+    return {} if left is None else {"timeout": left}
+
+
+def _admit(deadline: float) -> tuple:
+    """
+    (breaker, is_probe). Fails fast, before any limiter wait, when the
+    budget is spent or the breaker is open.
+    """
+    resilience.request_timeout(deadline)
+    breaker = resilience.get_breaker()
+    ticket = breaker.admit()
+    if ticket is None:
+        raise resilience.CircuitOpen(f"circuit open; provider calls paused ({breaker.snapshot()['retry_in_s']}s left)")
+    return breaker, ticket == "probe"
+
+
+def _note_outcome(breaker, probe: bool, exc=None) -> None:
+    # Timeouts, connection errors and 5xx count against the provider; a 429
+    # or a 4xx still means it answered, and a parse failure is ours
+    if exc is None:
+        breaker.record_success()
+    elif isinstance(exc, resilience.DeadlineExceeded):
+        if probe:
+            breaker.release_probe()  # ran out of time before the provider said anything
+    else:
+        retryable, throttled, _ = classify_error(exc)
+        if retryable and not throttled:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+
+def _retry_delay(retry: int, retry_after: float, deadline: float) -> float:
+    delay = backoff_delay(retry, retry_after)
+    left = resilience.remaining(deadline)
+    if left is not None and delay >= left:
+        return None  # the retry could not finish in time; surface the error now
+    return delay
+
+
+def _check_stream_deadline(deadline: float) -> None:
+    # The request timeout bounds each read, not a slow trickle of chunks
+    if deadline is not None and time.monotonic() >= deadline:
+        metrics.inc("llm_deadline_exceeded_total")
+        raise resilience.DeadlineExceeded("stream deadline exceeded")
+
+
+def _create_completion(kwargs: dict, consume=None, deadline: float = None):
+    """
+    Rate-limited chat completion. Throttling (429), 5xx and connection errors
+    are retried here with jittered exponential backoff; anything else — e.g.
+    a parse failure raised by consume(resp) — propagates to the caller's own
+    attempt loop untouched. Each request is sent with the time left until
+    `deadline` (a time.monotonic() value; LLM_REQUEST_TIMEOUT_S from now if
+    None) as its timeout, and goes through the shared circuit breaker:
+    CircuitOpen and DeadlineExceeded are raised without contacting the
+    provider.
+    """
+    if deadline is None:
+        deadline = resilience.attempt_deadline(None, 1)
+    limiter = get_limiter()
+    reserved = _estimate_tokens(kwargs)
+    for retry in range(LLM_TRANSPORT_RETRIES + 1):
+        breaker, probe = _admit(deadline)
+        try:
+            limiter.acquire(reserved, deadline)
+        except BaseException:
+            if probe:
+                breaker.release_probe()
+            raise
+        t0 = time.perf_counter()
+        try:
+            resp = get_client().chat.completions.create(**kwargs, **_timeout_kwargs(deadline))
+            t_first = time.perf_counter()
+            out = consume(resp) if consume is not None else resp
+        except Exception as e:
+            retryable, throttled, retry_after = classify_error(e)
+            limiter.release(reserved, throttled=throttled, retry_after=retry_after)
+            _note_outcome(breaker, probe, e)
+            _record_request_failure(retryable, throttled)
+            _note_structured_rejection(e, kwargs)
+            if not retryable or retry == LLM_TRANSPORT_RETRIES:
+                raise
+            delay = _retry_delay(retry, retry_after, deadline)
+            if delay is None:
+                raise
+            limiter.note_retry()
+            time.sleep(delay)
+            continue
+        _note_outcome(breaker, probe)
+        limiter.release(reserved, used=None if consume is not None else _used_tokens(resp))
+        _record_request(kwargs, t0, t_first, None if consume is not None else resp)
+        return out
+
+
+_structured_support = None  # "auto" probe result for this process; None until probed
+_structured_lock = threading.Lock()
+
+
+def _probe_structured() -> bool:
+    """One tiny schema-constrained request: does the endpoint accept response_format?"""
+    kwargs = {
+        "model": MINIMAX_MODEL,
+        "messages": [{"role": "user", "content": 'Reply with the JSON object {"ok": true}.'}],
+        "temperature": 0,
+        "max_tokens": 50,
+        "response_format": _response_format("probe", {
+            "type": "object", "properties": {"ok": {"type": "boolean"}},
+            "required": ["ok"], "additionalProperties": False,
+        }),
+    }
+    try:
+        resp = _create_completion(kwargs)
+        supported = isinstance(json.loads(resp.choices[0].message.content or ""), dict)
+    except json.JSONDecodeError:
+        supported = False  # accepted the parameter but ignored it
+    except Exception as e:
+        if classify_error(e)[0] or isinstance(e, (resilience.CircuitOpen, resilience.DeadlineExceeded)):
+            raise  # transient; says nothing about support
+        supported = False
+    metrics.inc("llm_structured_probe_total", result="supported" if supported else "unsupported")
+    return supported
+
+
+def _use_structured() -> bool:
+    global _structured_support
+    if LLM_STRUCTURED not in STRUCTURED_MODES:
+        raise ValueError(f"Unknown LLM_STRUCTURED mode {LLM_STRUCTURED!r}; expected one of {STRUCTURED_MODES}")
+    if LLM_STRUCTURED != "auto":
+        return LLM_STRUCTURED == "on"
+    if _structured_support is None:
+        with _structured_lock:
+            if _structured_support is None:
+                try:
+                    _structured_support = _probe_structured()
+                except Exception:
+                    metrics.inc("llm_structured_probe_total", result="error")
+                    return False  # probe again on the next call
+    return _structured_support
+
+
+async def _use_structured_async() -> bool:
+    if LLM_STRUCTURED == "auto" and _structured_support is None:
+        return await asyncio.to_thread(_use_structured)  # the probe is a blocking call
+    return _use_structured()
+
+
+def _note_structured_rejection(exc, kwargs: dict) -> None:
+    """In "auto" mode a 400/422 to a schema request switches the process back to prompt-only output."""
+    global _structured_support
+    if LLM_STRUCTURED != "auto" or "response_format" not in kwargs:
+        return
+    if getattr(exc, "status_code", None) in (400, 422) and _structured_support is True:
+        _structured_support = False
+        metrics.inc("llm_structured_probe_total", result="rejected")
+
+
+def _minimax_generate(agent_name: str, style: str, scenario: str, attempt: int = 1,
+                      stream: bool = False, on_field=None, deadline: float = None):
+    """
+    One completion → validated packet. With stream=True the response is
+    parsed as it arrives: on_field(agent_name, key, value) fires as each
+    top-level string closes, and the stream is dropped (raising StreamAbort)
+    as soon as the output cannot become a valid packet. The completion and
+    any repair request must finish by `deadline`.
+    """
+    if not OPENAI_API_KEY:
+        raise RuntimeError("Missing OPENAI_API_KEY (MiniMax key)")
+
+    if hedging.LLM_HEDGE:
+        # Hedging needs real cancellation of the losing request, which only
+        # the async client offers — run this call on the shared async loop.
+        return _run_sync(_minimax_generate_async(agent_name, style, scenario, attempt, stream, on_field, deadline))
+
+    kwargs = _completion_kwargs(agent_name, style, scenario, attempt, _use_structured())
+    mode = _request_mode(kwargs)
+    key = _cache_key(agent_name, style, scenario, attempt, kwargs)
+    cached = _cached_packet(key, scenario)
+    if cached is not None:
+        _emit_cached_fields(cached, agent_name, on_field)
+        return cached
+    _record_prompt_tokens(_agent_prompt(agent_name, style, PROMPT_VARIANT), scenario, agent_name)
+
+    if not stream:
+        resp = _create_completion(kwargs, deadline=deadline)
+        data = _parse_packet(resp.choices[0].message.content, agent_name, mode)
+        data = _repair_packet(data, agent_name, style, scenario, mode == "structured", deadline)
+        data = _store_packet(key, data, scenario)
+        data["_usage"] = _usage(resp)
+        data["_mode"] = mode
+        return data
+
+    def consume(chunks):
+        parser = _stream_parser(agent_name, scenario, on_field)
+        try:
+            for chunk in chunks:
+                _check_stream_deadline(deadline)
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta and parser.feed(delta):
+                    break  # object closed — anything after it is junk we needn't wait for
+        finally:
+            chunks.close()
+        return parser.text
+
+    text = _create_completion(dict(kwargs, stream=True), consume, deadline)
+    data = _parse_packet(text, agent_name, mode)
+    data = _repair_packet(data, agent_name, style, scenario, mode == "structured", deadline)
+    data = _store_packet(key, data, scenario)
+    data["_mode"] = mode
     return data
 
 
@@ -243,49 +863,364 @@ def _mock_future(agent_name: str, style: str, scenario: str):
     }
 
 
-def _one_agent_future(a: dict, scenario: str) -> dict:
+def _check_echo(result: dict, scenario: str) -> None:
+    # Echo guard — if the model just repeated the scenario, reject it
+    scenario_low = (scenario or "").strip().lower()
+    narrative_low = (result.get("narrative") or "").strip().lower()
+    if scenario_low and narrative_low and scenario_low[:80] in narrative_low:
+        metrics.inc("llm_echo_rejections_total")
+        raise ValueError("Model echoed the scenario instead of analysing it.")
+
+
+def _llm_result(result: dict, attempt: int) -> dict:
+    recovered = bool(result.pop("_recovered", False))
+    result["source"] = f"MiniMax (recovered)" if recovered else "MiniMax"
+    result["meta"] = {
+        "attempts_used": attempt,
+        "cache": result.pop("_cache", _cache_miss_status()),
+        "repairs": result.pop("_repairs", []),
+        "usage": result.pop("_usage", None),
+    }
+    repaired = result.pop("_repaired", None)
+    if repaired:
+        result["meta"]["repaired_fields"] = repaired
+        result["meta"]["repair_usage"] = result.pop("_repair_usage", None)
+    result.pop("_repair_usage", None)
+    mode = result.pop("_mode", None)  # None for cache hits
+    if mode:
+        result["meta"]["output_mode"] = mode
+        # attempts="2" is a retry after a parse/validation/echo failure
+        metrics.inc("llm_packets_total", mode=mode, attempts=str(attempt))
+    hedge = result.pop("_hedge", None)
+    if hedge:
+        result["meta"]["hedge"] = hedge  # which of the two requests won
+    result["meta"]["breaker"] = resilience.get_breaker().state
+    metrics.inc("agent_results_total", source=result["source"])
+    metrics.inc("llm_cache_total", status=result["meta"]["cache"])
+    return result
+
+
+def _fallback_result(a: dict, scenario: str, last_err=None, attempts: int = 0) -> dict:
+    result = _mock_future(a["name"], a["style"], scenario)
+    result["source"] = "Fallback"
+    if attempts or last_err is not None:
+        result["error"] = f"{type(last_err).__name__}: {str(last_err)}" if last_err else "Unknown"
+    result["meta"] = {"attempts_used": attempts, "breaker": resilience.get_breaker().state}
+    if attempts:
+        # Cache hits are echo-checked before they are served, so every
+        # failed attempt was a request that missed (or bypassed) the cache
+        result["meta"]["cache"] = _cache_miss_status()
+    if isinstance(last_err, (resilience.CircuitOpen, resilience.DeadlineExceeded)):
+        result["meta"]["fail_fast"] = "circuit_open" if isinstance(last_err, resilience.CircuitOpen) else "deadline"
+    metrics.inc("agent_results_total", source="Fallback")
+    return result
+
+
+def _semantic_lookup(scenario: str):
+    """Stored futures of a near-duplicate scenario, marked as such, or None."""
+    if not LLM_SEMANTIC_CACHE or llm_cache.CACHE_MODE != "on":
+        return None
+    from core import semantic_cache  # scikit-learn only loads when the cache is on
+
+    with metrics.timer("semantic_lookup_seconds"):
+        hit = semantic_cache.get_semantic_cache().lookup(scenario)
+    metrics.inc("semantic_cache_total", result="hit" if hit else "miss")
+    if hit is None:
+        return None
+
+    for f in hit["futures"]:
+        meta = f.setdefault("meta", {})
+        meta["semantic"] = {
+            "similarity": round(hit["similarity"], 3),
+            "matched_scenario": hit["scenario"],
+            "source": f.get("source"),
+        }
+        # Stored with the original run's cache status and usage; no request was made now
+        meta["cache"] = "semantic"
+        meta["usage"] = None
+        f["source"] = "Similar scenario"
+        metrics.inc("agent_results_total", source=f["source"])
+        metrics.inc("llm_cache_total", status="semantic")
+    return hit["futures"]
+
+
+def _semantic_store(scenario: str, futures: list) -> None:
+    # Fallbacks should be retried next time, not replayed
+    if not LLM_SEMANTIC_CACHE or llm_cache.CACHE_MODE == "off":
+        return
+    if any(f.get("source") == "Fallback" for f in futures):
+        return
+    from core import semantic_cache
+
+    order = {a["name"]: i for i, a in enumerate(AGENTS)}
+    semantic_cache.get_semantic_cache().store(
+        scenario, sorted(futures, key=lambda f: order.get(f.get("name", ""), 999))
+    )
+
+
+def _fail_fast(exc, deadline: float) -> bool:
+    """Is a further attempt pointless — breaker open or the whole run's budget spent?"""
+    left = resilience.remaining(deadline)
+    return isinstance(exc, resilience.CircuitOpen) or (left is not None and left <= 0)
+
+
+def _one_agent_future(a: dict, scenario: str, stream: bool = False, on_field=None,
+                      deadline: float = None) -> dict:
+    with metrics.timer("agent_generate_seconds", agent=a["name"]):
+        return _one_agent_future_untimed(a, scenario, stream, on_field, deadline)
+
+
+def _one_agent_future_untimed(a: dict, scenario: str, stream: bool = False, on_field=None,
+                              deadline: float = None) -> dict:
+    """Two attempts within `deadline` (the run's; its own LLM_RUN_DEADLINE_S if None), then the mock."""
     if not USE_LLM:
-        result = _mock_future(a["name"], a["style"], scenario)
-        result["source"] = "Fallback"
-        result["meta"] = {"attempts_used": 0}
-        return result
+        return _fallback_result(a, scenario)
+    if deadline is None:
+        deadline = resilience.run_deadline()
 
     last_err = None
-    scenario_low = (scenario or "").strip().lower()
 
     for attempt in range(1, 3):
         try:
-            result = _minimax_generate(a["name"], a["style"], scenario, attempt=attempt)
-
-            # Echo guard — if the model just repeated the scenario, reject it
-            narrative_low = (result.get("narrative") or "").strip().lower()
-            if scenario_low and narrative_low and scenario_low[:80] in narrative_low:
-                raise ValueError("Model echoed the scenario instead of analysing it.")
-
-            recovered = bool(result.pop("_recovered", False))
-            result["source"] = f"MiniMax (recovered)" if recovered else "MiniMax"
-            result["meta"] = {"attempts_used": attempt}
-            return result
+            result = _minimax_generate(
+                a["name"], a["style"], scenario, attempt=attempt, stream=stream, on_field=on_field,
+                deadline=resilience.attempt_deadline(deadline, 3 - attempt),
+            )
+            return _llm_result(result, attempt)
 
         except Exception as e:
             last_err = e
+            if _fail_fast(e, deadline):
+                break
 
-    # Both attempts failed — use mock
-    result = _mock_future(a["name"], a["style"], scenario)
-    result["source"] = "Fallback"
-    result["error"] = f"{type(last_err).__name__}: {str(last_err)}" if last_err else "Unknown"
-    result["meta"] = {"attempts_used": 2}
-    return result
+    # Both attempts failed (or could not be made) — use mock
+    return _fallback_result(a, scenario, last_err, attempts=attempt)
+
+
+def iter_future_events(scenario: str, stream: bool = None, deadline: float = None):
+    """
+    Run every agent concurrently and yield events on the caller's thread:
+      {"type": "field", "name": ..., "field": ..., "value": ...}  (stream only)
+      {"type": "result", "result": {...}}                          (completion order)
+    Field events let the UI show each narrative as soon as it closes. With
+    LLM_SEMANTIC_CACHE=1 a near-duplicate of an earlier scenario yields its
+    stored results straight away. Every agent shares one run `deadline`
+    (LLM_RUN_DEADLINE_S from now by default).
+    """
+    if stream is None:
+        stream = LLM_STREAM
+
+    cached = _semantic_lookup(scenario)
+    if cached is not None:
+        for result in cached:
+            yield {"type": "result", "result": result}
+        return
+
+    if deadline is None:
+        deadline = resilience.run_deadline()
+    events = queue.Queue()
+    results = []
+
+    def on_field(agent_name, field, value):
+        events.put({"type": "field", "name": agent_name, "field": field, "value": value})
+
+    # Large panels queue here; the limiter caps in-flight requests anyway
+    with ThreadPoolExecutor(max_workers=min(len(AGENTS), LLM_MAX_INFLIGHT)) as ex:
+        jobs = {
+            ex.submit(_one_agent_future, a, scenario, stream, on_field if stream else None, deadline): a
+            for a in AGENTS
+        }
+        for job in jobs:
+            job.add_done_callback(lambda j: events.put({"type": "done", "job": j}))
+
+        remaining = len(jobs)
+        while remaining:
+            event = events.get()
+            if event["type"] != "done":
+                yield event
+                continue
+
+            remaining -= 1
+            job = event["job"]
+            try:
+                result = job.result()
+            except Exception as e:
+                # Keep callers alive even if something unexpected happens
+                result = _fallback_result(jobs[job], scenario, e)
+            results.append(result)
+            yield {"type": "result", "result": result}
+
+    _semantic_store(scenario, results)
+
+
+def iter_futures(scenario: str, stream: bool = False):
+    """
+    Generate all agent futures concurrently and yield each one as soon as it
+    finishes (completion order, not AGENTS order), so callers can render
+    progress while the slower agents are still running.
+    """
+    for event in iter_future_events(scenario, stream=stream):
+        if event["type"] == "result":
+            yield event["result"]
+
+
+@functools.lru_cache(maxsize=None)
+def _batch_prompt(personas: tuple, variant: str) -> prompts.CompiledPrompt:
+    """personas is a tuple of (name, style) pairs, in request order."""
+    system = (
+        "You are a panel of strategic personas, each generating its own future scenario packet. "
+        f"{_FORMAT_RULES}"
+    )
+    listing = "\n".join(
+        f"PERSONA {i}: {name} — {style}\n{_style_rules(name)}"
+        for i, (name, style) in enumerate(personas, start=1)
+    )
+    instructions = (
+        f'Return ONLY {{"packets": [...]}} with exactly {len(personas)} packets, one per persona, '
+        "in the order listed. Each packet is written in that persona's own voice and uses "
+        "the persona name as its name. Every packet follows this schema:\n"
+        f"{SCHEMA_HINT}"
+    )
+    if _check_variant(variant) == "legacy":
+        return prompts.CompiledPrompt(system, "Scenario: ", f"\n\n{listing}\n{instructions}")
+    return prompts.CompiledPrompt(system, f"{listing}\n{instructions}\nScenario: ")
+
+
+def _build_batch_messages(agents: list, scenario: str, variant: str = None) -> list:
+    personas = tuple((a["name"], a["style"]) for a in agents)
+    return _batch_prompt(personas, variant or PROMPT_VARIANT).messages(scenario)
+
+
+def _minimax_generate_batch(agents: list, scenario: str, deadline: float = None) -> tuple:
+    """
+    (cache key, batch) for one completion carrying every persona's packet,
+    unvalidated. A fresh batch is not cached here: _batch_results stores it
+    only once every packet in it has passed validation.
+    """
+    if not OPENAI_API_KEY:
+        raise RuntimeError("Missing OPENAI_API_KEY (MiniMax key)")
+
+    kwargs = {
+        "model": MINIMAX_MODEL,
+        "messages": _build_batch_messages(agents, scenario),
+        "temperature": 0.85,
+        "max_tokens": 700 * len(agents),
+    }
+    key = llm_cache.cache_key(kwargs["model"], "batch", kwargs["messages"], kwargs["temperature"])
+    cached = _cached_packet(key)
+    if cached is not None:
+        return key, cached
+    personas = tuple((a["name"], a["style"]) for a in agents)
+    _record_prompt_tokens(_batch_prompt(personas, PROMPT_VARIANT), scenario, "batch")
 
+    resp = _create_completion(kwargs, deadline=deadline)
+    content = (resp.choices[0].message.content or "").strip()
+    if not content:
+        raise ValueError("Empty model output.")
+    data = _safe_parse_json(content)
+    data["_cache"] = _cache_miss_status()
+    data["_usage"] = _usage(resp)
+    return key, data
+
+
+def _batch_results(agents: list, scenario: str, deadline: float = None) -> tuple:
+    """
+    (results, errors) for one batched completion: validated results by name,
+    and for every persona left out, why — the request failed or its packet
+    was unusable. Counted in llm_batch_total{result=ok|partial|failed}.
+    """
+    import openai  # loaded by the call below anyway; kept out of module import
+
+    results, errors = {}, {}
+    try:
+        key, batch = _minimax_generate_batch(agents, scenario, deadline)
+        packets = batch.get("packets")
+        if not isinstance(packets, list):
+            raise ValueError("Batch JSON missing packets array")
+    except (openai.APIError, ValueError, TimeoutError, RuntimeError) as e:
+        # Provider, parse, deadline and breaker failures; anything else is a bug
+        metrics.inc("llm_batch_total", result="failed")
+        error = f"{type(e).__name__}: {e}"
+        return results, {a["name"]: error for a in agents}
+
+    by_name = {p.get("name"): p for p in packets if isinstance(p, dict)}
+    meta = {
+        "attempts_used": 1,
+        "batched": True,
+        "batch_size": len(agents),
+        "cache": batch.get("_cache", _cache_miss_status()),
+        "repairs": batch.get("_repairs", []),
+        "usage": batch.get("_usage"),  # shared by the whole batch, not per agent
+    }
+    for i, a in enumerate(agents):
+        packet = by_name.get(a["name"]) or (packets[i] if i < len(packets) else None)
+        if not isinstance(packet, dict):
+            errors[a["name"]] = "ValueError: no packet for this persona in the batch"
+            continue
+        try:
+            result = _validate_packet(dict(packet), a["name"])
+            _check_echo(result, scenario)
+        except (TypeError, ValueError) as e:
+            errors[a["name"]] = f"{type(e).__name__}: {e}"
+            continue
+        result["source"] = "MiniMax (recovered)" if batch.get("_recovered") else "MiniMax"
+        result["meta"] = dict(meta, breaker=resilience.get_breaker().state)
+        results[a["name"]] = result
+        metrics.inc("agent_results_total", source=result["source"])
+    metrics.inc("llm_batch_total", result="partial" if errors else "ok")
+    # A batch with an unusable packet would replay that failure (and its
+    # per-persona re-request) on every run, so only clean batches are kept
+    if not errors and batch["_cache"] != "hit":
+        _store_packet(key, {k: v for k, v in batch.items() if k not in ("_cache", "_usage")})
+    return results, errors
+
+
+def _batched_futures(scenario: str) -> list:
+    """
+    Ask for the agents' packets LLM_BATCH_SIZE at a time (chunks run
+    concurrently), validate each packet on its own and re-request only the
+    personas whose packet was unusable. The batch request gets half the
+    run's budget so the re-requests still have time.
+    """
+    deadline = resilience.run_deadline()
+    batch_deadline = resilience.attempt_deadline(deadline, 2)
+    chunks = [AGENTS[i:i + LLM_BATCH_SIZE] for i in range(0, len(AGENTS), max(1, LLM_BATCH_SIZE))]
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=min(len(chunks), LLM_MAX_INFLIGHT)) as ex:
+        for chunk_results, chunk_errors in ex.map(lambda chunk: _batch_results(chunk, scenario, batch_deadline),
+                                                  chunks):
+            results.update(chunk_results)
+            errors.update(chunk_errors)
+
+    missing = [a for a in AGENTS if a["name"] not in results]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(len(missing), LLM_MAX_INFLIGHT)) as ex:
+            for result in ex.map(lambda a: _one_agent_future(a, scenario, deadline=deadline), missing):
+                result["meta"]["batched"] = False
+                result["meta"]["batch_error"] = errors[result["name"]]
+                results[result["name"]] = result
+
+    return [results[a["name"]] for a in AGENTS]
+
+
+def generate_futures(scenario: str, batched: bool = None) -> list:
+    """
+    All agents' futures in AGENTS order. With batched=True (or LLM_BATCHED=1)
+    one completion returns every persona's packet and only failed personas
+    are re-requested individually.
+    """
+    if batched is None:
+        batched = LLM_BATCHED
+    if batched and USE_LLM:
+        futures = _semantic_lookup(scenario)
+        if futures is None:
+            futures = _batched_futures(scenario)
+            _semantic_store(scenario, futures)
+        return futures
 
-def generate_futures(scenario: str) -> list:
-    futures = []
-    with ThreadPoolExecutor(max_workers=4) as ex:
-        jobs = {ex.submit(_one_agent_future, a, scenario): a for a in AGENTS}
-        for job in as_completed(jobs):
-            futures.append(job.result())
+    futures = list(iter_futures(scenario))
 
-    # Preserve consistent display order: Visionary, Realist, Capitalist, Chaos Agent
+    # Preserve the registry's display order
     order = {a["name"]: i for i, a in enumerate(AGENTS)}
     futures.sort(key=lambda x: order.get(x.get("name", ""), 999))
     return futures
@@ -302,13 +1237,252 @@ def generate_one_future(agent_name: str, scenario: str):
         raise ValueError(f"Unknown agent: {agent_name}")
 
     if USE_LLM:
+        deadline = resilience.run_deadline()
         for attempt in range(1, 3):
             try:
-                return _minimax_generate(agent["name"], agent["style"], scenario, attempt=attempt)
+                return _minimax_generate(agent["name"], agent["style"], scenario, attempt=attempt,
+                                         deadline=resilience.attempt_deadline(deadline, 3 - attempt))
             except Exception as e:
-                if attempt == 2:
+                if attempt == 2 or _fail_fast(e, deadline):
                     mock = _mock_future(agent["name"], agent["style"], scenario)
                     mock["error"] = f"{type(e).__name__}: {str(e)}"
                     return mock
     else:
-        return _mock_future(agent["name"], agent["style"], scenario)
\ No newline at end of file
+        return _mock_future(agent["name"], agent["style"], scenario)
+
+
+# ── Async engine ──────────────────────────────────────────────────────────────
+# One pooled AsyncOpenAI client and one in-flight semaphore per event loop,
+# shared by every call on that loop, so fanning out hundreds of
+# scenario × agent generations reuses connections and never exceeds
+# LLM_MAX_INFLIGHT concurrent requests. The process-wide adaptive limiter
+# from core.ratelimit applies on top of that.
+
+_async_state = weakref.WeakKeyDictionary()
+_sync_loop = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_async_state():
+    loop = asyncio.get_running_loop()
+    state = _async_state.get(loop)
+    if state is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_INFLIGHT,
+                max_keepalive_connections=LLM_MAX_INFLIGHT,
+            ),
+        )
+        state = {
+            "client": AsyncOpenAI(
+                base_url=OPENAI_BASE_URL, api_key=OPENAI_API_KEY, http_client=http_client,
+                max_retries=0,
+            ),
+            "semaphore": asyncio.Semaphore(LLM_MAX_INFLIGHT),
+        }
+        _async_state[loop] = state
+    return state
+
+
+async def _create_completion_async(kwargs: dict, consume=None, deadline: float = None):
+    """Async counterpart of _create_completion; consume is a coroutine function."""
+    if deadline is None:
+        deadline = resilience.attempt_deadline(None, 1)
+    state = _get_async_state()
+    limiter = get_limiter()
+    reserved = _estimate_tokens(kwargs)
+    for retry in range(LLM_TRANSPORT_RETRIES + 1):
+        breaker, probe = _admit(deadline)
+        try:
+            await limiter.acquire_async(reserved, deadline)
+        except BaseException:  # includes cancellation while queued
+            if probe:
+                breaker.release_probe()
+            raise
+        t0 = time.perf_counter()
+        try:
+            async with state["semaphore"]:
+                resp = await state["client"].chat.completions.create(**kwargs, **_timeout_kwargs(deadline))
+                t_first = time.perf_counter()
+                out = await consume(resp) if consume is not None else resp
+        except asyncio.CancelledError:
+            limiter.release(reserved)
+            if probe:
+                breaker.release_probe()
+            metrics.inc("llm_requests_total", outcome="cancelled")
+            raise
+        except Exception as e:
+            retryable, throttled, retry_after = classify_error(e)
+            limiter.release(reserved, throttled=throttled, retry_after=retry_after)
+            _note_outcome(breaker, probe, e)
+            _record_request_failure(retryable, throttled)
+            _note_structured_rejection(e, kwargs)
+            if not retryable or retry == LLM_TRANSPORT_RETRIES:
+                raise
+            delay = _retry_delay(retry, retry_after, deadline)
+            if delay is None:
+                raise
+            limiter.note_retry()
+            await asyncio.sleep(delay)
+            continue
+        _note_outcome(breaker, probe)
+        limiter.release(reserved, used=None if consume is not None else _used_tokens(resp))
+        _record_request(kwargs, t0, t_first, None if consume is not None else resp)
+        return out
+
+
+async def _minimax_generate_async(agent_name: str, style: str, scenario: str, attempt: int = 1,
+                                  stream: bool = False, on_field=None, deadline: float = None,
+                                  context: str = None):
+    """
+    Async _minimax_generate. `context` is sent after the scenario line (and
+    keys the cache) but the echo guard still checks against `scenario` alone.
+    """
+    if not OPENAI_API_KEY:
+        raise RuntimeError("Missing OPENAI_API_KEY (MiniMax key)")
+
+    prompt_text = _with_context(scenario, context)
+    kwargs = _completion_kwargs(agent_name, style, prompt_text, attempt, await _use_structured_async())
+    key = _cache_key(agent_name, style, prompt_text, attempt, kwargs)
+    cached = _cached_packet(key, scenario)
+    if cached is not None:
+        _emit_cached_fields(cached, agent_name, on_field)
+        return cached
+    _record_prompt_tokens(_agent_prompt(agent_name, style, PROMPT_VARIANT), prompt_text, agent_name)
+
+    if not hedging.LLM_HEDGE:
+        return await _fetch_packet_async(kwargs, key, agent_name, style, scenario, stream, on_field, deadline,
+                                         context)
+
+    data, outcome = await hedging.hedged(
+        lambda: _fetch_packet_async(kwargs, key, agent_name, style, scenario, stream, on_field, deadline,
+                                    context),
+        hedging.get_policy(),
+    )
+    if outcome:
+        data["_hedge"] = outcome
+    return data
+
+
+async def _fetch_packet_async(kwargs: dict, key: str, agent_name: str, style: str, scenario: str,
+                              stream: bool = False, on_field=None, deadline: float = None,
+                              context: str = None) -> dict:
+    """Provider call + parse + cache store, i.e. everything after a cache miss."""
+    mode = _request_mode(kwargs)
+    prompt_text = _with_context(scenario, context)
+    if not stream:
+        resp = await _create_completion_async(kwargs, deadline=deadline)
+        data = _parse_packet(resp.choices[0].message.content, agent_name, mode)
+        data = await _repair_packet_async(data, agent_name, style, prompt_text, mode == "structured", deadline)
+        data = _store_packet(key, data, scenario)
+        data["_usage"] = _usage(resp)
+        data["_mode"] = mode
+        return data
+
+    async def consume(chunks):
+        parser = _stream_parser(agent_name, scenario, on_field)
+        try:
+            async for chunk in chunks:
+                _check_stream_deadline(deadline)
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta and parser.feed(delta):
+                    break
+        finally:
+            await chunks.close()
+        return parser.text
+
+    text = await _create_completion_async(dict(kwargs, stream=True), consume, deadline)
+    data = _parse_packet(text, agent_name, mode)
+    data = await _repair_packet_async(data, agent_name, style, prompt_text, mode == "structured", deadline)
+    data = _store_packet(key, data, scenario)
+    data["_mode"] = mode
+    return data
+
+
+async def _one_agent_future_async(a: dict, scenario: str, stream: bool = False, on_field=None,
+                                  deadline: float = None, context: str = None) -> dict:
+    with metrics.timer("agent_generate_seconds", agent=a["name"]):
+        return await _one_agent_future_async_untimed(a, scenario, stream, on_field, deadline, context)
+
+
+async def _one_agent_future_async_untimed(a: dict, scenario: str, stream: bool = False,
+                                          on_field=None, deadline: float = None, context: str = None) -> dict:
+    if not USE_LLM:
+        return _fallback_result(a, scenario)
+    if deadline is None:
+        deadline = resilience.run_deadline()
+
+    last_err = None
+
+    for attempt in range(1, 3):
+        try:
+            result = await _minimax_generate_async(
+                a["name"], a["style"], scenario, attempt=attempt, stream=stream, on_field=on_field,
+                deadline=resilience.attempt_deadline(deadline, 3 - attempt), context=context,
+            )
+            return _llm_result(result, attempt)
+
+        except Exception as e:
+            last_err = e
+            if _fail_fast(e, deadline):
+                break
+
+    # Both attempts failed (or could not be made) — use mock
+    return _fallback_result(a, scenario, last_err, attempts=attempt)
+
+
+async def generate_futures_async(scenario: str, stream: bool = False) -> list:
+    """Async counterpart of generate_futures; results come back in AGENTS order."""
+    cached = _semantic_lookup(scenario)
+    if cached is not None:
+        return cached
+    deadline = resilience.run_deadline()
+    futures = list(await asyncio.gather(
+        *(_one_agent_future_async(a, scenario, stream, deadline=deadline) for a in AGENTS)
+    ))
+    _semantic_store(scenario, futures)
+    return futures
+
+
+async def generate_agent_future_async(agent: dict, scenario: str, stream: bool = False,
+                                      deadline: float = None, context: str = None) -> dict:
+    """
+    One agent's future (with retries and fallback) on the async engine.
+    Pass the same `deadline` (resilience.run_deadline()) to every agent of a
+    run to give them one shared budget. `context` (e.g. a debate round's
+    digests) goes into the prompt after the scenario; the echo guard and the
+    fallback still see only `scenario`.
+    """
+    return await _one_agent_future_async(agent, scenario, stream, deadline=deadline, context=context)
+
+
+async def generate_many_async(scenarios: list) -> list:
+    """Generate futures for many scenarios at once, bounded by LLM_MAX_INFLIGHT."""
+    return list(await asyncio.gather(*(generate_futures_async(s) for s in scenarios)))
+
+
+def _run_sync(coro):
+    # A single long-lived background loop keeps the connection pool warm
+    # across sync calls instead of rebuilding it on every asyncio.run().
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="llm-async-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop).result()
+
+
+def generate_futures_pooled(scenario: str) -> list:
+    """Sync wrapper around generate_futures_async."""
+    return _run_sync(generate_futures_async(scenario))
+
+
+def generate_many(scenarios: list) -> list:
+    """Sync wrapper around generate_many_async."""
+    return _run_sync(generate_many_async(scenarios))
+
+
+set_agents(registry.load_agents())
@@ -0,0 +1,230 @@
+"""
+Headless batch runner: JSONL scenarios in, Parquet results out.
+
+    python -m core.batch scenarios.jsonl results/ [--concurrency 8] [--flush-every 50]
+
+Each input line is {"scenario": "...", "id": "optional"}; a line that is a
+bare JSON string is also accepted. Scenarios are read lazily and run through
+generate_futures_async → score_futures → simulate_monte_carlo with at most
+--concurrency scenarios in flight. Every --flush-every finished scenarios are
+written as one row group to a new part file in the output directory, so
+memory stays flat. Re-running with the same output directory skips scenario
+ids that are already there, which makes interrupted runs resumable.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import argparse
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from core import metrics
+from core.agents import generate_futures_async
+from core.scoring import score_futures
+from core.simulation import simulate_monte_carlo
+
+SCHEMA = pa.schema([
+    ("scenario_id", pa.string()),
+    ("scenario", pa.string()),
+    ("agent", pa.string()),
+    ("narrative", pa.string()),
+    ("headlines", pa.list_(pa.string())),
+    ("strategy", pa.string()),
+    ("vulnerabilities", pa.list_(pa.string())),
+    ("tone_score", pa.float64()),
+    ("risk_score", pa.float64()),
+    ("influence", pa.float64()),
+    ("stability", pa.float64()),
+    ("risk", pa.float64()),
+    ("final_influence", pa.float64()),
+    ("win_prob", pa.float64()),
+    ("winner", pa.bool_()),
+    ("source", pa.string()),
+    ("attempts_used", pa.int64()),
+    ("cache", pa.string()),
+    ("error", pa.string()),
+    ("finished_at", pa.timestamp("s")),
+])
+
+
+def scenario_id(scenario: str) -> str:
+    return hashlib.sha1(scenario.encode("utf-8")).hexdigest()[:16]
+
+
+def iter_scenarios(path: str):
+    """Yield (scenario_id, scenario) pairs, one line at a time."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if isinstance(row, str):
+                row = {"scenario": row}
+            scenario = (row.get("scenario") or "").strip()
+            if scenario:
+                yield str(row.get("id") or scenario_id(scenario)), scenario
+
+
+def completed_ids(output_dir: str) -> set:
+    """Scenario ids already present in the dataset (reads only that column)."""
+    if not os.path.isdir(output_dir) or not any(
+        name.endswith(".parquet") for name in os.listdir(output_dir)
+    ):
+        return set()
+    table = ds.dataset(output_dir, format="parquet").to_table(columns=["scenario_id"])
+    return set(table.column("scenario_id").to_pylist())
+
+
+async def run_scenario(sid: str, scenario: str, steps: int = 24, n_paths: int = 2000) -> list:
+    futures = await generate_futures_async(scenario)
+    scores = score_futures(futures)
+    seed = int(hashlib.sha1(scenario.encode("utf-8")).hexdigest()[:8], 16)
+    sim = simulate_monte_carlo(scores, steps=steps, n_paths=n_paths, seed=seed)
+    winner = max(sim["win_prob"], key=sim["win_prob"].get) if sim["win_prob"] else None
+
+    finished_at = int(time.time())
+    rows = []
+    for f, s in zip(futures, scores):
+        meta = f.get("meta", {})
+        rows.append({
+            "scenario_id": sid,
+            "scenario": scenario,
+            "agent": f["name"],
+            "narrative": f.get("narrative", ""),
+            "headlines": [str(h) for h in f.get("headlines", [])],
+            "strategy": f.get("strategy", ""),
+            "vulnerabilities": [str(v) for v in f.get("vulnerabilities", [])],
+            "tone_score": float(f["tone_score"]),
+            "risk_score": float(f["risk_score"]),
+            "influence": s["influence"],
+            "stability": s["stability"],
+            "risk": s["risk"],
+            "final_influence": float(sim["mean"][f["name"]][-1]),
+            "win_prob": sim["win_prob"][f["name"]],
+            "winner": f["name"] == winner,
+            "source": f.get("source", ""),
+            "attempts_used": int(meta.get("attempts_used", 0)),
+            "cache": meta.get("cache"),
+            "error": f.get("error"),
+            "finished_at": finished_at,
+        })
+    return rows
+
+
+class PartWriter:
+    """
+    Buffers rows and writes each flush as its own part file (one row group).
+    Files are written under a dot-prefixed temp name and renamed into place,
+    so an interrupted run never leaves a half-written part behind.
+    """
+
+    def __init__(self, output_dir: str, flush_every: int = 50):
+        self.output_dir = output_dir
+        self.flush_every = flush_every
+        self.session = uuid.uuid4().hex[:8]
+        self.parts = 0
+        self.scenarios = 0
+        self._rows = []
+        self._pending = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, rows: list) -> None:
+        self._rows.extend(rows)
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        table = pa.Table.from_pylist(self._rows, schema=SCHEMA)
+        name = f"part-{self.session}-{self.parts:05d}.parquet"
+        tmp = os.path.join(self.output_dir, f".{name}.tmp")
+        pq.write_table(table, tmp, row_group_size=len(self._rows))
+        os.replace(tmp, os.path.join(self.output_dir, name))
+        self.parts += 1
+        self.scenarios += self._pending
+        self._rows = []
+        self._pending = 0
+
+
+async def run_batch(input_path: str, output_dir: str, concurrency: int = 8, flush_every: int = 50,
+                    steps: int = 24, n_paths: int = 2000, log=sys.stderr) -> dict:
+    done = completed_ids(output_dir)
+    writer = PartWriter(output_dir, flush_every)
+    pending = set()
+    skipped = failed = 0
+    t0 = time.perf_counter()
+
+    def collect(finished):
+        nonlocal failed
+        for task in finished:
+            try:
+                writer.add(task.result())
+            except Exception as e:
+                failed += 1
+                print(f"scenario failed: {type(e).__name__}: {e}", file=log)
+
+    try:
+        for sid, scenario in iter_scenarios(input_path):
+            if sid in done:
+                skipped += 1
+                continue
+            done.add(sid)  # duplicate ids in the input run once
+
+            if len(pending) >= concurrency:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                collect(finished)
+            pending.add(asyncio.create_task(run_scenario(sid, scenario, steps, n_paths)))
+
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            collect(finished)
+    finally:
+        # Keep whatever finished before an interruption; the rest is retried on resume
+        for task in pending:
+            task.cancel()
+        writer.flush()
+
+    elapsed = time.perf_counter() - t0
+    summary = {
+        "written": writer.scenarios,
+        "skipped": skipped,
+        "failed": failed,
+        "parts": writer.parts,
+        "seconds": round(elapsed, 2),
+        "metrics": metrics.export(),
+    }
+    print(json.dumps(summary), file=log)
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run Alternate over a JSONL file of scenarios.")
+    ap.add_argument("input", help="JSONL file, one scenario per line")
+    ap.add_argument("output", help="Parquet dataset directory (created if missing)")
+    ap.add_argument("--concurrency", type=int, default=8, help="scenarios in flight at once")
+    ap.add_argument("--flush-every", type=int, default=50, help="scenarios per row group / part file")
+    ap.add_argument("--steps", type=int, default=24)
+    ap.add_argument("--paths", type=int, default=2000, help="Monte Carlo paths per agent")
+    args = ap.parse_args(argv)
+
+    try:
+        asyncio.run(run_batch(
+            args.input, args.output, concurrency=args.concurrency, flush_every=args.flush_every,
+            steps=args.steps, n_paths=args.paths,
+        ))
+    except KeyboardInterrupt:
+        print("interrupted — finished scenarios were saved; re-run to resume", file=sys.stderr)
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
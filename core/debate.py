@@ -0,0 +1,149 @@
+"""
+Multi-round debate: personas revise their packets after reading each other's.
+
+    python -m core.debate "A rival ships a cheaper product" [--rounds 3] [--out debate.json]
+
+Round 0 is the usual independent generation. In every later round each agent
+is re-prompted with the scenario followed by a short digest of its own previous
+packet and of every other agent's, and returns a revised packet (new verdict,
+tone_score and risk_score). Only the previous round's digests are carried,
+never the transcript, so the prompt stays the same size however many rounds
+are played. Digests are computed once per packet and shared by every agent
+that reads them. Agents within a round run concurrently; per-round and
+per-agent timings are returned and recorded as metrics.
+
+An agent whose revision falls back keeps its previous packet for that round.
+"""
+import json
+import time
+import asyncio
+import argparse
+import functools
+
+from core import metrics
+from core import resilience
+from core.agents import AGENTS, generate_agent_future_async, generate_futures_async
+from core.prompts import count_tokens
+
+DIGEST_CHARS = 160  # per-field cap, keeps one digest to a few dozen tokens
+
+_DEBATE_INSTRUCTIONS = (
+    "Answer their arguments: keep or change your verdict, and revise tone_score and "
+    "risk_score to reflect the debate. Return a complete packet."
+)
+
+
+def _clip(text: str, limit: int = DIGEST_CHARS) -> str:
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+@functools.lru_cache(maxsize=4096)
+def _digest(name: str, tone: float, risk: float, narrative: str, strategy: str) -> str:
+    return (
+        f"{name} (tone {tone:.2f}, risk {risk:.2f}): {_clip(narrative)}"
+        f" | Plan: {_clip(strategy.split(';')[0])}"
+    )
+
+
+def digest(packet: dict) -> str:
+    """One-line summary of a packet: scores, verdict and first action."""
+    return _digest(packet["name"], float(packet["tone_score"]), float(packet["risk_score"]),
+                   packet.get("narrative", ""), packet.get("strategy", ""))
+
+
+def round_context(round_no: int, own: str, others: list) -> str:
+    """
+    What one agent reads after the scenario in a debate round. It is passed
+    separately, so the echo guard still compares answers with the scenario.
+    """
+    return (
+        f"DEBATE ROUND {round_no}. Your previous packet: {own}\n"
+        "The other personas' previous packets:\n" + "".join(f"- {d}\n" for d in others)
+        + _DEBATE_INSTRUCTIONS
+    )
+
+
+async def _timed_generation(agent: dict, scenario: str, context: str, deadline: float = None) -> tuple:
+    t0 = time.perf_counter()
+    packet = await generate_agent_future_async(agent, scenario, deadline=deadline, context=context)
+    return packet, time.perf_counter() - t0
+
+
+async def debate_round(scenario: str, round_no: int, previous: list, agents: list = None) -> dict:
+    """Revise every packet in `previous` (AGENTS order) once, concurrently."""
+    agents = agents or AGENTS
+    digests = {p["name"]: digest(p) for p in previous}  # computed once per round
+    contexts = [
+        round_context(round_no, digests[a["name"]], [d for name, d in digests.items() if name != a["name"]])
+        for a in agents
+    ]
+
+    t0 = time.perf_counter()
+    deadline = resilience.run_deadline()  # each round is budgeted like one panel run
+    with metrics.timer("debate_round_seconds", phase="revision"):
+        results = await asyncio.gather(*(_timed_generation(a, scenario, c, deadline) for a, c in zip(agents, contexts)))
+
+    futures, agent_seconds = [], {}
+    scenario_tokens = count_tokens(scenario)
+    for prev, context, (packet, seconds) in zip(previous, contexts, results):
+        agent_seconds[packet["name"]] = round(seconds, 3)
+        carried = packet.get("source") == "Fallback" and prev.get("source") != "Fallback"
+        if carried:
+            metrics.inc("debate_carried_total")
+            packet = prev
+        packet = dict(packet, meta=dict(packet.get("meta", {}), debate={
+            "round": round_no, "context_tokens": scenario_tokens + count_tokens(context), "carried": carried,
+        }))
+        futures.append(packet)
+    return {
+        "round": round_no,
+        "futures": futures,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "agent_seconds": agent_seconds,
+        "context_tokens": scenario_tokens + max(count_tokens(c) for c in contexts),
+    }
+
+
+async def run_debate(scenario: str, rounds: int = 3) -> dict:
+    """
+    Round 0 plus `rounds` revision rounds. Returns {"futures": final packets,
+    "rounds": [{"round", "futures", "seconds", "agent_seconds", "context_tokens"}, ...]}.
+    """
+    t0 = time.perf_counter()
+    with metrics.timer("debate_round_seconds", phase="initial"):
+        futures = await generate_futures_async(scenario)
+    history = [{
+        "round": 0,
+        "futures": futures,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "agent_seconds": {},
+        "context_tokens": count_tokens(scenario),
+    }]
+    for round_no in range(1, rounds + 1):
+        history.append(await debate_round(scenario, round_no, history[-1]["futures"]))
+    return {"futures": history[-1]["futures"], "rounds": history}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run a multi-round Alternate debate on one scenario.")
+    ap.add_argument("scenario")
+    ap.add_argument("--rounds", type=int, default=3, help="revision rounds after the first generation")
+    ap.add_argument("--out", help="write every round's packets and timings as JSON here")
+    args = ap.parse_args(argv)
+
+    result = asyncio.run(run_debate(args.scenario, args.rounds))
+    names = [f["name"] for f in result["futures"]]
+    print(f"{'round':>5}{'seconds':>9}{'ctx tok':>9}  " + "  ".join(f"{'tone/risk':>14}" for _ in names))
+    print(f"{'':>23}  " + "  ".join(f"{n[:14]:>14}" for n in names))
+    for r in result["rounds"]:
+        scores = {f["name"]: f"{f['tone_score']:.2f}/{f['risk_score']:.2f}" for f in r["futures"]}
+        print(f"{r['round']:>5}{r['seconds']:>9.2f}{r['context_tokens']:>9}  "
+              + "  ".join(f"{scores[n]:>14}" for n in names))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+
+from core import metrics
+
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+
+class HedgePolicy:
+    """
+    Learns a hedge delay from recent completion latencies and caps how many
+    duplicate requests may be sent: at most max_ratio extra requests per
+    primary request (plus one, so the very first slow call can be hedged).
+    """
+
+    def __init__(self, percentile: float = LLM_HEDGE_PERCENTILE, max_ratio: float = LLM_HEDGE_MAX_RATIO,
+                 min_samples: int = LLM_HEDGE_MIN_SAMPLES, window: int = 200):
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.latencies = deque(maxlen=window)
+        self.primaries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def delay(self):
+        """Seconds to wait before hedging, or None until enough latencies are known."""
+        with self._lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            return metrics.percentile(self.latencies, self.percentile)
+
+    def start_primary(self) -> None:
+        with self._lock:
+            self.primaries += 1
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * self.primaries + 1:
+                return False
+            self.hedges += 1
+            return True
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "primaries": self.primaries,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "samples": len(self.latencies),
+            }
+
+
+async def hedged(make_call, policy: "HedgePolicy"):
+    """
+    Await make_call(); if it is still running after the policy's delay and
+    the spend cap allows, start a duplicate and return whichever finishes
+    first without raising. The loser is cancelled. Returns (result, outcome)
+    where outcome is None (no hedge), "primary" or "hedge". Only calls made
+    here feed the policy's latency window, so the delay is learned from the
+    unit being hedged and not from every provider request.
+    """
+    async def timed_call():
+        t0 = time.perf_counter()
+        result = await make_call()
+        policy.observe(time.perf_counter() - t0)
+        return result
+
+    policy.start_primary()
+    primary = asyncio.ensure_future(timed_call())
+    tasks = [primary]
+    try:
+        delay = policy.delay()
+        if delay is None:
+            return await primary, None
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not policy.try_hedge():
+            return await primary, None
+
+        backup = asyncio.ensure_future(timed_call())
+        tasks.append(backup)
+        pending = {primary, backup}
+        last_err = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        policy.record_win()
+                    return task.result(), "hedge" if task is backup else "primary"
+                last_err = task.exception()
+        raise last_err
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_policy() -> HedgePolicy:
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = HedgePolicy()
+    return _policy
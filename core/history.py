@@ -0,0 +1,286 @@
+"""
+Local run history: every finished run appended to a Parquet dataset.
+
+    .alternate_history/date=2026-10-17/part-….parquet
+
+One row per agent per run: the packet, its scores, the simulated mean
+trajectory with its outer percentile band, and source/cache/timing meta.
+Files are hive-partitioned by UTC date, so date filters skip whole
+directories. Each append writes a small part file (temp name, then rename);
+once a partition holds COMPACT_AFTER parts they are merged into one file,
+which keeps the file count, and so dataset discovery, bounded.
+
+Reads go through pyarrow.dataset over a memory-mapped local filesystem and
+only ever materialise the requested columns of the rows that pass the
+filter; the heavy columns (narratives, trajectories) are fetched for one run
+at a time. Limited queries read partitions newest first and stop as soon as
+enough rows match, so listing recent runs costs the same at any history size.
+"""
+import os
+import json
+import time
+import uuid
+import datetime
+import threading
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+# Empty HISTORY_DIR turns recording off
+HISTORY_DIR = os.getenv("HISTORY_DIR", ".alternate_history")
+COMPACT_AFTER = 64  # part files per date partition before they are merged
+
+SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("created_at", pa.timestamp("ms", tz="UTC")),
+    ("scenario", pa.string()),
+    ("agent", pa.string()),
+    ("winner_agent", pa.string()),
+    ("winner", pa.bool_()),
+    ("win_prob", pa.float64()),
+    ("final_influence", pa.float64()),
+    ("tone_score", pa.float64()),
+    ("risk_score", pa.float64()),
+    ("influence", pa.float64()),
+    ("stability", pa.float64()),
+    ("risk", pa.float64()),
+    ("narrative", pa.string()),
+    ("headlines", pa.list_(pa.string())),
+    ("strategy", pa.string()),
+    ("vulnerabilities", pa.list_(pa.string())),
+    ("trajectory", pa.list_(pa.float32())),
+    ("band_lo", pa.list_(pa.float32())),
+    ("band_hi", pa.list_(pa.float32())),
+    ("source", pa.string()),
+    ("attempts_used", pa.int64()),
+    ("cache", pa.string()),
+    ("error", pa.string()),
+    ("meta", pa.string()),  # the packet's meta dict as JSON
+    ("run_seconds", pa.float64()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+DATASET_SCHEMA = SCHEMA.append(pa.field("date", pa.string()))
+
+# Cheap columns for listing runs; no packet text or trajectories
+SUMMARY_COLUMNS = ["date", "created_at", "run_id", "scenario", "agent", "winner_agent", "winner",
+                   "win_prob", "final_influence", "influence", "stability", "risk", "source", "run_seconds"]
+TRAJECTORY_COLUMNS = ["agent", "trajectory", "band_lo", "band_hi", "win_prob"]
+
+
+def run_rows(scenario: str, futures: list, scores: list, sim: dict, run_seconds: float = None,
+             run_id: str = None, created_at: datetime.datetime = None) -> list:
+    """History rows for one scored and simulated run, one per agent."""
+    run_id = run_id or uuid.uuid4().hex
+    created_at = created_at or datetime.datetime.now(datetime.timezone.utc)
+    winner = max(sim["win_prob"], key=sim["win_prob"].get) if sim["win_prob"] else None
+    rows = []
+    for f, s in zip(futures, scores):
+        name = f["name"]
+        band = sim["bands"].get(name) or {0: sim["mean"][name]}
+        rows.append({
+            "run_id": run_id,
+            "created_at": created_at,
+            "scenario": scenario,
+            "agent": name,
+            "winner_agent": winner,
+            "winner": name == winner,
+            "win_prob": sim["win_prob"][name],
+            "final_influence": float(sim["mean"][name][-1]),
+            "tone_score": float(f["tone_score"]),
+            "risk_score": float(f["risk_score"]),
+            "influence": s["influence"],
+            "stability": s["stability"],
+            "risk": s["risk"],
+            "narrative": f.get("narrative", ""),
+            "headlines": [str(h) for h in f.get("headlines", [])],
+            "strategy": f.get("strategy", ""),
+            "vulnerabilities": [str(v) for v in f.get("vulnerabilities", [])],
+            "trajectory": [float(v) for v in sim["mean"][name]],
+            "band_lo": [float(v) for v in band[min(band)]],
+            "band_hi": [float(v) for v in band[max(band)]],
+            "source": f.get("source", ""),
+            "attempts_used": int(f.get("meta", {}).get("attempts_used", 0)),
+            "cache": f.get("meta", {}).get("cache"),
+            "error": f.get("error"),
+            "meta": json.dumps(f.get("meta", {}), default=str),
+            "run_seconds": run_seconds,
+        })
+    return rows
+
+
+class HistoryStore:
+    """Append-only run history under `root`; safe to share between threads."""
+
+    def __init__(self, root: str = HISTORY_DIR, compact_after: int = COMPACT_AFTER):
+        self.root = root
+        self.compact_after = compact_after
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+        self._lock = threading.Lock()
+
+    # ── Writing ──────────────────────────────────────────────────────────────
+    def _partition(self, date: str) -> str:
+        return os.path.join(self.root, f"date={date}")
+
+    def _parts(self, date: str) -> list:
+        path = self._partition(date)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.path.join(path, n) for n in os.listdir(path)
+                      if n.endswith(".parquet") and not n.startswith("."))
+
+    def _write_file(self, date: str, table: pa.Table, prefix: str = "part") -> str:
+        path = self._partition(date)
+        os.makedirs(path, exist_ok=True)
+        name = f"{prefix}-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = os.path.join(path, f".{name}.tmp")
+        pq.write_table(table, tmp, row_group_size=max(1, min(len(table), 65536)))
+        os.replace(tmp, os.path.join(path, name))
+        return name
+
+    def write(self, rows: list) -> None:
+        """Append rows (from run_rows) to their date partitions."""
+        by_date = {}
+        for row in rows:
+            by_date.setdefault(row["created_at"].strftime("%Y-%m-%d"), []).append(row)
+        with self._lock:
+            for date, date_rows in by_date.items():
+                self._write_file(date, pa.Table.from_pylist(date_rows, schema=SCHEMA))
+                if len(self._parts(date)) >= self.compact_after:
+                    self._compact(date)
+
+    def record(self, scenario: str, futures: list, scores: list, sim: dict, run_seconds: float = None) -> str:
+        rows = run_rows(scenario, futures, scores, sim, run_seconds)
+        self.write(rows)
+        return rows[0]["run_id"] if rows else None
+
+    def _compact(self, date: str) -> None:
+        parts = self._parts(date)
+        if len(parts) < 2:
+            return
+        table = pq.read_table(parts, schema=SCHEMA, memory_map=True)
+        self._write_file(date, table, prefix="compact")
+        for path in parts:
+            os.remove(path)
+
+    def compact(self) -> None:
+        """Merge every partition's part files into one file each."""
+        if not os.path.isdir(self.root):
+            return
+        with self._lock:
+            for name in sorted(os.listdir(self.root)):
+                if name.startswith("date="):
+                    self._compact(name[len("date="):])
+
+    # ── Reading ──────────────────────────────────────────────────────────────
+    def dataset(self):
+        if not os.path.isdir(self.root):
+            return None
+        return ds.dataset(self.root, schema=DATASET_SCHEMA, format="parquet",
+                          partitioning=PARTITIONING, filesystem=self._fs)
+
+    def dates(self) -> list:
+        """Partition dates present on disk, newest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted((n[len("date="):] for n in os.listdir(self.root) if n.startswith("date=")), reverse=True)
+
+    def _scan(self, columns: list, filter_=None, dates: list = None, limit: int = None) -> pa.Table:
+        """
+        Projected, filtered read. With a limit, partitions are read newest
+        first and the scan stops once `limit` rows have matched, so the
+        latest runs never touch older files.
+        """
+        # A compaction can remove parts between discovery and the scan; rescan once
+        for attempt in range(2):
+            dataset = self.dataset()
+            if dataset is None:
+                return DATASET_SCHEMA.empty_table().select(columns)
+            try:
+                if limit is None:
+                    return dataset.to_table(columns=columns, filter=filter_)
+                tables, matched = [], 0
+                for date in dates:
+                    date_filter = ds.field("date") == date
+                    table = dataset.to_table(
+                        columns=columns, filter=date_filter if filter_ is None else filter_ & date_filter
+                    )
+                    tables.append(table)
+                    matched += table.num_rows
+                    if matched >= limit:
+                        break
+                if not tables:
+                    return DATASET_SCHEMA.empty_table().select(columns)
+                return pa.concat_tables(tables)
+            except (FileNotFoundError, OSError):
+                if attempt:
+                    raise
+
+    def query(self, agent: str = None, winner: str = None, text: str = None,
+              since: datetime.date = None, until: datetime.date = None, winners_only: bool = False,
+              columns: list = None, limit: int = None) -> pa.Table:
+        """
+        Matching rows, newest first, with only `columns` (default
+        SUMMARY_COLUMNS) read. `winner` keeps runs that agent won, `text` is a
+        case-insensitive substring of the scenario, `winners_only` keeps one
+        row per run (the winner's).
+        """
+        filters = []
+        if agent:
+            filters.append(ds.field("agent") == agent)
+        if winner:
+            filters.append(ds.field("winner_agent") == winner)
+        if winners_only:
+            filters.append(ds.field("winner"))
+        if text:
+            filters.append(pc.match_substring(ds.field("scenario"), text, ignore_case=True))
+        dates = [d for d in self.dates()
+                 if (since is None or d >= since.isoformat()) and (until is None or d <= until.isoformat())]
+        if limit is None:
+            if since is not None:
+                filters.append(ds.field("date") >= since.isoformat())
+            if until is not None:
+                filters.append(ds.field("date") <= until.isoformat())
+
+        filter_ = None
+        for f in filters:
+            filter_ = f if filter_ is None else filter_ & f
+        columns = list(columns or SUMMARY_COLUMNS)
+        if "created_at" not in columns:
+            columns.append("created_at")
+
+        table = self._scan(columns, filter_, dates, limit)
+        if limit is not None and table.num_rows > limit:
+            order = pc.select_k_unstable(table, limit, [("created_at", "descending")])
+        else:
+            order = pc.sort_indices(table, [("created_at", "descending")])
+        return table.take(order)
+
+    def run(self, run_id: str, date: str = None, columns: list = None) -> pa.Table:
+        """Every agent row of one run; pass its date to read a single partition."""
+        filter_ = ds.field("run_id") == run_id
+        if date:
+            filter_ = filter_ & (ds.field("date") == date)
+        return self._scan(list(columns or SCHEMA.names), filter_)
+
+    def trajectories(self, run_id: str, date: str = None) -> tuple:
+        """(mean, bands, win_prob) for one run, shaped like simulate_monte_carlo output."""
+        rows = self.run(run_id, date, TRAJECTORY_COLUMNS).to_pylist()
+        mean = {r["agent"]: r["trajectory"] for r in rows}
+        bands = {r["agent"]: {0: r["band_lo"], 100: r["band_hi"]} for r in rows}
+        win_prob = {r["agent"]: r["win_prob"] for r in rows}
+        return mean, bands, win_prob
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history() -> HistoryStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+    return _store
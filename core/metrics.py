@@ -0,0 +1,191 @@
+"""
+In-process metrics: labelled counters and histograms, exported as a
+Prometheus text file or a JSON snapshot on local disk.
+
+    from core import metrics
+    metrics.inc("llm_requests_total", outcome="ok")
+    metrics.observe("llm_request_seconds", 1.8, stream="false")
+    with metrics.timer("score_seconds"):
+        ...
+    metrics.export("metrics.prom")   # or "metrics.json"
+"""
+import os
+import json
+import time
+import bisect
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+METRICS_PATH = os.getenv("METRICS_PATH", os.path.join(".alternate_cache", "metrics.prom"))
+
+# Seconds; wide enough for sub-ms scoring up to multi-minute stalled calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+RESERVOIR_SIZE = 2048
+
+
+def percentile(values, p: float):
+    """Nearest-rank percentile of `values` (any iterable), or None when empty."""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(p / 100.0 * (len(values) - 1)))))]
+
+
+class Histogram:
+    """Cumulative buckets for export plus a window of recent values for percentiles."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def percentile(self, p: float):
+        return percentile(self.recent, p)
+
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram()
+        hist.observe(value)
+
+
+@contextmanager
+def timer(name: str, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+
+def timed(name: str, **labels):
+    """Decorator form of timer()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with timer(name, **labels):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def counter_value(name: str, **labels) -> float:
+    """Sum of a counter over every label set that matches the given labels."""
+    want = {k: str(v) for k, v in labels.items()}
+    with _lock:
+        return sum(
+            v for (n, lbls), v in _counters.items()
+            if n == name and all(dict(lbls).get(k) == val for k, val in want.items())
+        )
+
+
+def fallback_rate():
+    total = counter_value("agent_results_total")
+    return counter_value("agent_results_total", source="Fallback") / total if total else None
+
+
+def snapshot() -> dict:
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        histograms = [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "count": h.count,
+                "sum": h.sum,
+                "p50": h.percentile(50),
+                "p95": h.percentile(95),
+                "p99": h.percentile(99),
+            }
+            for (name, labels), h in sorted(_histograms.items())
+        ]
+    return {
+        "generated_at": time.time(),
+        "fallback_rate": fallback_rate(),
+        "counters": counters,
+        "histograms": histograms,
+    }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(labels, extra=()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def to_prometheus() -> str:
+    lines = []
+    with _lock:
+        seen = set()
+        for (name, labels), value in sorted(_counters.items()):
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            lines.append(f"{name}{_labels_text(labels)} {value}")
+
+        for (name, labels), h in sorted(_histograms.items()):
+            if name not in seen:
+                lines.append(f"# TYPE {name} histogram")
+                seen.add(name)
+            cumulative = 0
+            for bound, count in zip(h.buckets, h.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels_text(labels, [('le', '+Inf')])} {h.count}")
+            lines.append(f"{name}_sum{_labels_text(labels)} {h.sum}")
+            lines.append(f"{name}_count{_labels_text(labels)} {h.count}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path: str = None) -> str:
+    """Write a Prometheus text file, or a JSON snapshot if path ends in .json."""
+    path = path or METRICS_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    body = json.dumps(snapshot(), indent=2) if path.endswith(".json") else to_prometheus()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(body)
+    os.replace(tmp, path)
+    return path
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
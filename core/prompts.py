@@ -0,0 +1,57 @@
+import re
+
+from core.cache import cache_key
+
+# Rough per-message framing cost of chat formats (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# BPE-style pre-tokenisation: contractions, words, short digit runs,
+# punctuation runs and whitespace — close to what tiktoken-style tokenizers
+# split on before merging, so one piece is roughly one token.
+_PIECE = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+(?!\S)|\s+")
+_LONG_WORD = 8  # pieces longer than this usually split into several tokens
+
+
+def count_tokens(text: str) -> int:
+    """Local prompt token estimate; no tokenizer download or provider call."""
+    n = 0
+    for m in _PIECE.finditer(text):
+        piece = m.group().strip()
+        n += 1 + max(0, len(piece.encode("utf-8")) - 1) // _LONG_WORD
+    return n
+
+
+class CompiledPrompt:
+    """
+    A chat prompt with everything except the scenario fixed up front:
+
+        system:  system
+        user:    user_prefix + scenario + user_suffix
+
+    Static text and its token count are computed once; messages() only
+    splices the scenario in. fingerprint changes whenever any static text
+    does, so response caches keyed on it go stale with the template.
+    """
+
+    def __init__(self, system: str, user_prefix: str, user_suffix: str = ""):
+        self.system = system
+        self.user_prefix = user_prefix
+        self.user_suffix = user_suffix
+        self.static_tokens = (
+            count_tokens(system) + count_tokens(user_prefix) + count_tokens(user_suffix)
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+        )
+        self.fingerprint = cache_key(system, user_prefix, user_suffix)
+
+    def messages(self, scenario: str) -> list:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": f"{self.user_prefix}{scenario}{self.user_suffix}"},
+        ]
+
+    def count_tokens(self, scenario: str) -> int:
+        return self.static_tokens + count_tokens(scenario)
+
+    def static_prefix(self) -> str:
+        """Everything sent before the scenario, i.e. what a provider can cache."""
+        return f"{self.system}\n{self.user_prefix}"
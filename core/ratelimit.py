@@ -0,0 +1,181 @@
+import os
+import time
+import random
+import asyncio
+import threading
+
+from core.resilience import DeadlineExceeded
+
+LLM_RPS = float(os.getenv("LLM_RPS", "5"))
+LLM_TPM = float(os.getenv("LLM_TPM", "200000"))
+LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", "16"))
+LLM_TRANSPORT_RETRIES = int(os.getenv("LLM_TRANSPORT_RETRIES", "4"))
+
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 20.0
+_POLL_S = 0.05  # re-check interval while waiting on the concurrency limit
+
+
+class TokenBucket:
+    """Classic token bucket; callers hold the limiter lock."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_time(self, n: float, now: float) -> float:
+        self._refill(now)
+        # A request bigger than the bucket only needs a full bucket to go
+        need = min(n, self.capacity)
+        return 0.0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self, n: float) -> None:
+        self.tokens -= n
+
+    def refund(self, n: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + n)
+
+
+class AdaptiveLimiter:
+    """
+    Shared client-side limiter for provider calls:
+      - token buckets on requests/second and tokens/minute
+      - AIMD concurrency: +1/limit per success, halved on a 429
+      - a global pause while a Retry-After is in effect
+    One instance is shared by every thread and event loop in the process.
+    """
+
+    def __init__(self, rps: float = LLM_RPS, tpm: float = LLM_TPM,
+                 max_concurrency: int = LLM_MAX_INFLIGHT, min_concurrency: int = 1):
+        self.requests = TokenBucket(rps, max(1.0, rps))
+        self.tokens = TokenBucket(tpm / 60.0, tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.inflight = 0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.retries = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: float) -> float:
+        """Take a slot and return 0.0, or return how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.inflight >= int(self.limit):
+                return _POLL_S
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.inflight += 1
+            return 0.0
+
+    @staticmethod
+    def _check_deadline(wait: float, deadline: float) -> None:
+        # Give up now rather than sleep through the caller's whole budget
+        if deadline is not None and time.monotonic() + wait >= deadline:
+            raise DeadlineExceeded("deadline passed while waiting on the rate limiter")
+
+    def acquire(self, tokens: float, deadline: float = None) -> None:
+        """Block until a slot is free; raise DeadlineExceeded if that would be after `deadline`."""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            self._check_deadline(wait, deadline)
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float, deadline: float = None) -> None:
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            self._check_deadline(wait, deadline)
+            await asyncio.sleep(wait)
+
+    def release(self, reserved: float = 0, used: float = None,
+                throttled: bool = False, retry_after: float = None) -> None:
+        with self._lock:
+            self.inflight -= 1
+            if used is not None and used < reserved:
+                self.tokens.refund(reserved - used)
+
+            now = time.monotonic()
+            if not throttled:
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+                return
+
+            self.throttled += 1
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            # One multiplicative decrease per burst of 429s, not one per request
+            if now - self._last_decrease > (retry_after or 1.0):
+                self.limit = max(self.min_concurrency, self.limit / 2.0)
+                self._last_decrease = now
+
+    def note_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "concurrency_limit": round(self.limit, 2),
+                "inflight": self.inflight,
+                "throttled": self.throttled,
+                "transport_retries": self.retries,
+            }
+
+
+def classify_error(exc) -> tuple:
+    """(retryable, throttled, retry_after) for an exception raised by a provider call."""
+    import openai  # already loaded by whoever made the call; kept out of module import
+
+    if isinstance(exc, openai.RateLimitError):
+        return True, True, _retry_after(exc)
+    if isinstance(exc, openai.APIStatusError):
+        status = exc.status_code
+        return status >= 500 or status in (408, 409), False, _retry_after(exc)
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True, False, None
+    return False, False, None
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(retry: int, retry_after: float = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** retry)))
+    return max(delay, retry_after or 0.0)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> AdaptiveLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveLimiter()
+    return _limiter
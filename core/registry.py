@@ -0,0 +1,72 @@
+import os
+import json
+import string
+import colorsys
+
+# JSON file listing the personas; see core/personas.json for the format
+AGENTS_CONFIG = os.getenv("AGENTS_CONFIG", os.path.join(os.path.dirname(__file__), "personas.json"))
+
+DEFAULT_VOICE_RULES = ["Be distinct and specific."]
+DEFAULT_ROAST = "I outplay you all."
+ROAST_FIELDS = ("winner", "loser")  # the only placeholders a roast may use
+
+
+def palette_color(i: int) -> str:
+    """Distinct hex colours for agents without one (golden-angle hue steps)."""
+    r, g, b = colorsys.hls_to_rgb((0.07 + i * 0.618034) % 1.0, 0.6, 0.75)
+    return f"#{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}"
+
+
+def _agent_entry(raw: dict, i: int) -> dict:
+    if not isinstance(raw, dict):
+        raise ValueError(f"agent #{i} must be an object")
+    name = str(raw.get("name", "")).strip()
+    style = str(raw.get("style", "")).strip()
+    if not name or not style:
+        raise ValueError(f"agent #{i} needs a non-empty name and style")
+    rules = raw.get("voice_rules") or DEFAULT_VOICE_RULES
+    if not isinstance(rules, list) or not all(isinstance(r, str) for r in rules):
+        raise ValueError(f"{name}: voice_rules must be a list of strings")
+    roast = raw.get("roast") or DEFAULT_ROAST
+    if not isinstance(roast, str):
+        raise ValueError(f"{name}: roast must be a string")
+    try:
+        fields = [(f, spec, conv) for _, f, spec, conv in string.Formatter().parse(roast) if f is not None]
+    except ValueError as e:
+        raise ValueError(f"{name}: roast is not a valid template ({e}); write literal braces as {{{{ }}}}")
+    # Plain {winner} / {loser} only: a format spec or conversion could still fail at render time
+    bad = [f + (f"!{conv}" if conv else "") + (f":{spec}" if spec else "")
+           for f, spec, conv in fields if f not in ROAST_FIELDS or spec or conv]
+    if bad:
+        raise ValueError(f"{name}: roast may only use {{winner}} and {{loser}}, not {', '.join(f'{{{f}}}' for f in bad)}")
+    return {
+        "name": name,
+        "style": style,
+        "voice_rules": list(rules),
+        "color": raw.get("color") or palette_color(i),
+        "description": raw.get("description") or style,
+        "roast": roast,
+    }
+
+
+def parse_agents(config: dict) -> list:
+    """Validated agent dicts, in config order, with optional fields filled in."""
+    raw = config.get("agents") if isinstance(config, dict) else None
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("agents config needs a non-empty \"agents\" list")
+    agents = [_agent_entry(a, i) for i, a in enumerate(raw)]
+    names = [a["name"] for a in agents]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate agent names: {', '.join(duplicates)}")
+    return agents
+
+
+def load_agents(path: str = None) -> list:
+    path = path or AGENTS_CONFIG
+    with open(path, encoding="utf-8") as f:
+        return parse_agents(json.load(f))
+
+
+def style_rules(agent: dict) -> str:
+    return "VOICE RULES:\n" + "".join(f"- {rule}\n" for rule in agent["voice_rules"])
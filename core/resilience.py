@@ -0,0 +1,164 @@
+"""
+Deadlines and a circuit breaker for provider calls.
+
+A run gets one monotonic deadline (LLM_RUN_DEADLINE_S). Its agents run
+concurrently, so each agent's budget is whatever is left of the run; each
+attempt then gets an even share of the agent's remaining budget across its
+remaining attempts, capped at LLM_REQUEST_TIMEOUT_S, and every HTTP request
+(including transport retries) is sent with the time left until that attempt
+deadline as its timeout.
+
+The breaker is shared by every thread and event loop in the process. After
+LLM_BREAKER_FAILURES consecutive failed requests (timeouts, connection
+errors, 5xx — not 429s, which the limiter handles) it opens: requests fail
+immediately and agents go straight to the fallback. After
+LLM_BREAKER_COOLDOWN_S it lets one half-open probe through; success closes
+it, failure re-opens it for another cool-down.
+"""
+import os
+import time
+import threading
+
+from core import metrics
+
+# 0 disables the run deadline or the per-request cap
+LLM_RUN_DEADLINE_S = float(os.getenv("LLM_RUN_DEADLINE_S", "90"))
+LLM_REQUEST_TIMEOUT_S = float(os.getenv("LLM_REQUEST_TIMEOUT_S", "45"))
+# LLM_BREAKER_FAILURES=0 turns the breaker off
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+
+
+class DeadlineExceeded(TimeoutError):
+    """The run or attempt budget ran out before a request could be sent."""
+
+
+class CircuitOpen(RuntimeError):
+    """The breaker is open (or probing); the request was not sent."""
+
+
+def run_deadline(seconds: float = None) -> float:
+    """Monotonic end time for a run starting now; None when the budget is 0 (unbounded)."""
+    seconds = LLM_RUN_DEADLINE_S if seconds is None else seconds
+    return time.monotonic() + seconds if seconds > 0 else None
+
+
+def remaining(deadline: float):
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def attempt_deadline(deadline: float, attempts_left: int) -> float:
+    """End time for the next attempt: an even share of what is left, capped per request."""
+    now = time.monotonic()
+    ends = []
+    if deadline is not None:
+        ends.append(now + max(0.0, deadline - now) / max(1, attempts_left))
+    if LLM_REQUEST_TIMEOUT_S > 0:
+        ends.append(now + LLM_REQUEST_TIMEOUT_S)
+    return min(ends) if ends else None
+
+
+def request_timeout(deadline: float):
+    """Seconds left for one HTTP request, or None; raises once the deadline has passed."""
+    left = remaining(deadline)
+    if left is not None and left <= 0:
+        metrics.inc("llm_deadline_exceeded_total")
+        raise DeadlineExceeded("request deadline exceeded")
+    return left
+
+
+class CircuitBreaker:
+    """closed → (N consecutive failures) → open → (cool-down) → half_open → closed | open."""
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN_S):
+        self.failure_threshold = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.short_circuited = 0
+        self._probe_inflight = False
+        self._lock = threading.Lock()
+
+    def _set(self, state: str) -> None:
+        if state != self.state:
+            metrics.inc("llm_breaker_transitions_total", to=state)
+        self.state = state
+
+    def admit(self):
+        """
+        "request" when a call may go out, "probe" when it is the single
+        half-open trial (its holder must end it with record_success,
+        record_failure or release_probe), None when it must not go out.
+        """
+        if self.failure_threshold <= 0:
+            return "request"
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self._set("half_open")
+            if self.state == "closed":
+                return "request"
+            if self.state == "half_open" and not self._probe_inflight:
+                self._probe_inflight = True
+                return "probe"
+            self.short_circuited += 1
+        metrics.inc("llm_breaker_rejections_total")
+        return None
+
+    def allow(self) -> bool:
+        """May a request go out now? In half_open only the single probe may."""
+        return self.admit() is not None
+
+    def record_success(self) -> None:
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self.failures = 0
+            self._probe_inflight = False
+            self._set("closed")
+
+    def record_failure(self) -> None:
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self.failures += 1
+            probe_failed = self.state == "half_open"
+            self._probe_inflight = False
+            if probe_failed or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self.opens += 1
+                self._set("open")
+
+    def release_probe(self) -> None:
+        """The probe ended without telling us anything (e.g. cancelled); let another one through."""
+        with self._lock:
+            self._probe_inflight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            retry_in = None
+            if self.state == "open":
+                retry_in = round(max(0.0, self.cooldown - (time.monotonic() - self.opened_at)), 2)
+            return {"state": self.state, "failures": self.failures, "retry_in_s": retry_in}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "opens": self.opens,
+                "short_circuited": self.short_circuited,
+            }
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_breaker() -> CircuitBreaker:
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker()
+    return _breaker
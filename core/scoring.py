@@ -1,21 +1,72 @@
-def score_futures(futures):
+"""
+Packet scoring: influence, stability and risk from tone, risk and plan length.
+
+score_futures scores a handful of packet dicts; score_arrays and score_table
+score columns (NumPy arrays or an Arrow table, e.g. a history query) in one
+vectorized pass and give bit-for-bit the same floats. Coefficients come from
+a weight profile: a name in WEIGHT_PROFILES (SCORING_PROFILE by default) or a
+dict of overrides on DEFAULT_WEIGHTS.
+"""
+import os
+
+import numpy as np
+
+from core import metrics
+
+# The coefficients the panel has always been scored with
+DEFAULT_WEIGHTS = {
+    "influence_tone": 1.2,    # influence likes boldness (tone)...
+    "influence_risk": 0.35,   # ...but hates instability (risk)
+    "plan_bonus_max": 0.15,   # more coherent (longer) plans get a nudge, at most this much
+    "plan_bonus_chars": 8000,  # strategy characters per 1.0 of plan bonus
+    "stability_base": 1.35,
+    "stability_risk": 0.6,    # stability hates risk
+    "stability_floor": 0.05,
+}
+WEIGHT_PROFILES = {
+    "default": DEFAULT_WEIGHTS,
+    "risk_averse": dict(DEFAULT_WEIGHTS, influence_risk=0.7, stability_risk=0.9),
+    "bold": dict(DEFAULT_WEIGHTS, influence_tone=1.5, influence_risk=0.2),
+}
+SCORING_PROFILE = os.getenv("SCORING_PROFILE", "default")
+
+SCORE_COLUMNS = ("influence", "stability", "risk")
+
+
+def weights(profile=None) -> dict:
+    """The weights for a profile name, or DEFAULT_WEIGHTS updated with a dict of overrides."""
+    if profile is None:
+        profile = SCORING_PROFILE
+    if isinstance(profile, dict):
+        unknown = set(profile) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown scoring weights: {', '.join(sorted(unknown))}")
+        return dict(DEFAULT_WEIGHTS, **profile)
+    if profile not in WEIGHT_PROFILES:
+        raise ValueError(f"Unknown scoring profile {profile!r}; expected one of {sorted(WEIGHT_PROFILES)}")
+    return WEIGHT_PROFILES[profile]
+
+
+@metrics.timed("score_seconds")
+def score_futures(futures, profile=None):
+    w = weights(profile)
     scores = []
     for f in futures:
         tone = f["tone_score"]
         risk = f["risk_score"]
 
         # Influence likes boldness (tone) but hates instability (risk)
-        influence = (1.2 * tone) - (0.35 * risk)
+        influence = (w["influence_tone"] * tone) - (w["influence_risk"] * risk)
 
         # Stability hates risk
-        stability = max(0.05, 1.35 - (0.6 * risk))
+        stability = max(w["stability_floor"], w["stability_base"] - (w["stability_risk"] * risk))
 
         # Risk is risk
         risk_out = risk
 
         # Small bonus: more coherent plans get a nudge
         plan_len = len(f.get("strategy", ""))
-        influence += min(0.15, plan_len / 8000)
+        influence += min(w["plan_bonus_max"], plan_len / w["plan_bonus_chars"])
 
         scores.append({
             "name": f["name"],
@@ -23,4 +74,62 @@ def score_futures(futures):
             "stability": max(0.0, stability),
             "risk": max(0.0, risk_out),
         })
-    return scores 
\ No newline at end of file
+    return scores
+
+
+@metrics.timed("score_batch_seconds")
+def score_arrays(tone, risk, plan_len, profile=None) -> dict:
+    """
+    {"influence", "stability", "risk"} float64 arrays for equal-length
+    tone, risk and strategy-length columns. Operations run in the same
+    order as score_futures, in place on a few float64 buffers, so results
+    are identical to it element for element (fmax keeps max()'s handling
+    of NaN inputs: the floor wins).
+    """
+    w = weights(profile)
+    tone = np.asarray(tone, dtype=np.float64)
+    risk = np.asarray(risk, dtype=np.float64)
+    plan_len = np.asarray(plan_len)
+
+    influence = np.multiply(tone, w["influence_tone"])
+    scratch = np.multiply(risk, w["influence_risk"])
+    np.subtract(influence, scratch, out=influence)
+    np.true_divide(plan_len, w["plan_bonus_chars"], out=scratch)
+    np.minimum(scratch, w["plan_bonus_max"], out=scratch)
+    np.add(influence, scratch, out=influence)
+    np.fmax(influence, 0.0, out=influence)
+
+    stability = scratch  # the bonus is no longer needed
+    np.multiply(risk, w["stability_risk"], out=stability)
+    np.subtract(w["stability_base"], stability, out=stability)
+    np.fmax(stability, w["stability_floor"], out=stability)
+    np.fmax(stability, 0.0, out=stability)
+
+    return {"influence": influence, "stability": stability, "risk": np.fmax(risk, 0.0)}
+
+
+def score_table(table, profile=None):
+    """
+    `table` (a pyarrow.Table with tone_score, risk_score and either
+    strategy_len or strategy) with influence, stability and risk set from
+    score_arrays — replaced where they exist, as in history tables. Null
+    strategies count as empty; null scores come out as NaN inputs would.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if "strategy_len" in table.column_names:
+        plan_len = table.column("strategy_len")
+    else:
+        plan_len = pc.fill_null(pc.utf8_length(table.column("strategy")), 0)
+    scores = score_arrays(
+        table.column("tone_score").to_numpy(),
+        table.column("risk_score").to_numpy(),
+        plan_len.to_numpy(),
+        profile,
+    )
+    for name in SCORE_COLUMNS:
+        column = pa.array(scores[name], type=pa.float64())
+        i = table.schema.get_field_index(name)
+        table = table.set_column(i, name, column) if i >= 0 else table.append_column(name, column)
+    return table
@@ -0,0 +1,184 @@
+import os
+import json
+import math
+import time
+import sqlite3
+import threading
+
+import numpy as np
+
+from core.cache import CACHE_TTL_SECONDS
+
+# Enabled from core.agents (LLM_SEMANTIC_CACHE=1); cosine similarity at or
+# above the threshold counts as the same scenario
+SEMANTIC_THRESHOLD = float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.7"))
+SEMANTIC_CACHE_PATH = os.getenv("LLM_SEMANTIC_CACHE_PATH", os.path.join(".alternate_cache", "scenarios.sqlite"))
+
+N_FEATURES = 2 ** 20
+MERGE_EVERY = 256  # rows buffered before the main matrix is rebuilt
+
+
+class ScenarioIndex:
+    """
+    Incremental nearest-neighbour index over scenario texts: hashed word
+    unigrams + bigrams, sublinear TF, smoothed IDF, cosine similarity.
+
+    Rows are stored column-major, so a lookup only touches the columns of
+    the query's terms: a main matrix plus a small buffer of recent
+    additions. Every MERGE_EVERY additions the buffer is folded into the
+    main matrix and all rows are re-weighted with the current IDF.
+    """
+
+    def __init__(self, n_features: int = N_FEATURES, merge_every: int = MERGE_EVERY):
+        from scipy import sparse
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.preprocessing import normalize
+
+        self._sparse = sparse
+        self._normalize = normalize
+        self._vectorizer = HashingVectorizer(
+            n_features=n_features, ngram_range=(1, 2), stop_words="english",
+            alternate_sign=False, norm=None,
+        )
+        self.merge_every = merge_every
+        self._df = np.zeros(n_features)
+        self._rows = 0
+        self._merged_tf = None  # TF rows folded into _main
+        self._pending_tf = []   # TF blocks added since the last merge
+        self._main = None       # weighted CSC of the merged rows
+        self._recent = None     # weighted CSC of the pending rows
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _term_frequencies(self, texts: list):
+        tf = self._vectorizer.transform(texts).tocsr()
+        np.log1p(tf.data, out=tf.data)
+        return tf
+
+    def _idf(self, columns) -> np.ndarray:
+        return np.log((1.0 + self._rows) / (1.0 + self._df[columns])) + 1.0
+
+    def _weighted(self, tf):
+        """Copy of CSR rows scaled by the current IDF and L2-normalised."""
+        w = tf.copy()
+        w.data *= self._idf(w.indices)
+        return self._normalize(w, norm="l2", copy=False)
+
+    def add_many(self, texts: list) -> None:
+        if not texts:
+            return
+        tf = self._term_frequencies(texts)
+        np.add.at(self._df, tf.indices, 1.0)
+        self._rows += tf.shape[0]
+        self._pending_tf.append(tf)
+
+        pending = self._sparse.vstack(self._pending_tf, format="csr")
+        if self._main is None or pending.shape[0] >= self.merge_every:
+            self._merge(pending)
+        else:
+            self._pending_tf = [pending]
+            self._recent = self._weighted(pending).tocsc()
+
+    def add(self, text: str) -> None:
+        self.add_many([text])
+
+    def _merge(self, pending) -> None:
+        blocks = [self._merged_tf, pending] if self._merged_tf is not None else [pending]
+        self._merged_tf = self._sparse.vstack(blocks, format="csr")
+        self._main = self._weighted(self._merged_tf).tocsc()
+        self._pending_tf = []
+        self._recent = None
+
+    def query(self, text: str) -> tuple:
+        """(row, cosine similarity) of the closest entry, or (None, 0.0)."""
+        if not self._rows:
+            return None, 0.0
+        q = self._term_frequencies([text])
+        if not q.nnz:
+            return None, 0.0
+        weights = q.data * self._idf(q.indices)
+        weights /= math.sqrt(float(weights @ weights))
+
+        best, best_sim = None, 0.0
+        if self._main is not None:
+            sims = self._main[:, q.indices] @ weights
+            row = int(np.argmax(sims))
+            best, best_sim = row, float(sims[row])
+        if self._recent is not None:
+            sims = self._recent[:, q.indices] @ weights
+            row = int(np.argmax(sims))
+            if sims[row] > best_sim:
+                best, best_sim = self._main.shape[0] + row, float(sims[row])
+        return (best, best_sim) if best_sim > 0 else (None, 0.0)
+
+
+class SemanticCache:
+    """
+    Generated futures per scenario in SQLite, looked up by TF-IDF similarity
+    to past scenarios. The index is rebuilt from the table on start-up;
+    entries older than the TTL are dropped then and never served.
+    """
+
+    def __init__(self, path: str = SEMANTIC_CACHE_PATH, threshold: float = SEMANTIC_THRESHOLD,
+                 ttl: float = CACHE_TTL_SECONDS):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scenarios ("
+            " id INTEGER PRIMARY KEY,"
+            " scenario TEXT NOT NULL,"
+            " futures TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM scenarios WHERE created < ?", (time.time() - ttl,))
+        rows = self._db.execute("SELECT id, scenario FROM scenarios ORDER BY id").fetchall()
+
+        self._ids = [row_id for row_id, _ in rows]
+        self.index = ScenarioIndex()
+        self.index.add_many([scenario for _, scenario in rows])
+
+    def lookup(self, scenario: str):
+        """{"futures", "similarity", "scenario"} of the closest stored scenario above the threshold."""
+        with self._lock:
+            row, similarity = self.index.query(scenario)
+            if row is None or similarity < self.threshold:
+                return None
+            found = self._db.execute(
+                "SELECT scenario, futures, created FROM scenarios WHERE id = ?", (self._ids[row],)
+            ).fetchone()
+        if found is None or time.time() - found[2] > self.ttl:
+            return None
+        return {"futures": json.loads(found[1]), "similarity": similarity, "scenario": found[0]}
+
+    def store(self, scenario: str, futures: list) -> None:
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO scenarios (scenario, futures, created) VALUES (?, ?, ?)",
+                (scenario, json.dumps(futures, ensure_ascii=False), time.time()),
+            )
+            self._ids.append(cur.lastrowid)
+            self.index.add(scenario)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticCache()
+    return _cache
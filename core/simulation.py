@@ -1,5 +1,9 @@
 import numpy as np
 
+from core import metrics
+
+
+@metrics.timed("simulate_seconds", engine="single")
 def simulate_trajectories(scores, steps: int = 24):
     """
     Produce simple trajectories for Influence over time.
@@ -17,4 +21,53 @@ def simulate_trajectories(scores, steps: int = 24):
             step = values[-1] + drift + np.random.normal(0, vol)
             values.append(max(0.0, step))
         trajectories[s["name"]] = np.array(values)
-    return trajectories
\ No newline at end of file
+    return trajectories
+
+@metrics.timed("simulate_seconds", engine="monte_carlo")
+def simulate_monte_carlo(scores, steps: int = 24, n_paths: int = 2000,
+                         percentiles=(10, 50, 90), seed=None):
+    """
+    Monte Carlo version of simulate_trajectories: n_paths influence paths per
+    agent, all agents and paths advanced together one step at a time with the
+    same drift/volatility and clip-at-zero rule. Uses its own Generator, so
+    it never touches the global np.random state.
+
+    Returns {
+        "mean":     {name: array(steps)},
+        "bands":    {name: {percentile: array(steps)}},
+        "win_prob": {name: share of paths in which it finishes first},
+    }
+    """
+    rng = np.random.default_rng(seed)
+    names = [s["name"] for s in scores]
+    if not names:
+        return {"mean": {}, "bands": {}, "win_prob": {}}
+
+    base = np.array([s["influence"] for s in scores], dtype=float)
+    risk = np.array([s["risk"] for s in scores], dtype=float)
+    stability = np.array([s["stability"] for s in scores], dtype=float)
+
+    vol = 0.12 + 0.18 * np.minimum(1.0, risk / 2.0)
+    drift = 0.03 + 0.05 * np.minimum(1.0, stability)
+
+    # (steps, agents, paths) — each step is one contiguous slab
+    paths = np.empty((steps, len(names), n_paths))
+    paths[0] = base[:, None]
+    noise = rng.standard_normal((steps - 1, len(names), n_paths)) * vol[None, :, None]
+    noise += drift[None, :, None]
+    for t in range(1, steps):
+        np.add(paths[t - 1], noise[t - 1], out=paths[t])
+        np.maximum(paths[t], 0.0, out=paths[t])
+
+    mean = paths.mean(axis=2)
+    bands = np.percentile(paths, percentiles, axis=2)
+    wins = np.bincount(paths[-1].argmax(axis=0), minlength=len(names)) / n_paths
+
+    return {
+        "mean": {name: mean[:, i] for i, name in enumerate(names)},
+        "bands": {
+            name: {p: bands[j, :, i] for j, p in enumerate(percentiles)}
+            for i, name in enumerate(names)
+        },
+        "win_prob": {name: float(wins[i]) for i, name in enumerate(names)},
+    }
@@ -0,0 +1,102 @@
+import json
+
+
+class StreamAbort(ValueError):
+    """Raised mid-stream once the output can no longer become a valid packet."""
+
+
+class PacketStreamParser:
+    """
+    Incremental scanner for a streamed JSON packet.
+
+    feed() consumes each chunk once, tracking string/escape state and object
+    depth. Every top-level string value is passed to on_field(key, value) the
+    moment its closing quote arrives, so the UI can show the narrative long
+    before the rest of the packet is written. It raises StreamAbort as soon as
+    the output is clearly unusable: prose before the opening brace, a key
+    outside allowed_keys, or a bare token where a key should be.
+    """
+
+    def __init__(self, allowed_keys, on_field=None):
+        self.allowed_keys = set(allowed_keys)
+        self.on_field = on_field
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key = None
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk. Returns True once the top-level object has closed."""
+        if self.done:
+            return True
+        self.text += chunk
+        text = self.text
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+
+            if self._depth == 0:
+                if ch == "{":
+                    # Only whitespace or a ```json fence may precede the object
+                    prefix = text[:i].strip().lower()
+                    if prefix and not "```json".startswith(prefix):
+                        raise StreamAbort(f"Prose before JSON object: {prefix[:80]}")
+                    self._depth = 1
+                    self._expect_key = True
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._close_string(text[self._string_start:i + 1])
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+                    self._pos = i + 1
+                    return True
+            elif self._depth == 1:
+                if ch == ",":
+                    self._expect_key = True
+                elif self._expect_key and not ch.isspace():
+                    raise StreamAbort(f"Expected a quoted key, got {ch!r}")
+
+        # Prose with no brace in sight — no point waiting for more of it
+        if self._depth == 0:
+            prefix = text.strip().lower()
+            if prefix and not "```json".startswith(prefix):
+                raise StreamAbort(f"Prose before JSON object: {prefix[:80]}")
+
+        self._pos = len(text)
+        return False
+
+    def _close_string(self, token: str) -> None:
+        try:
+            value = json.loads(token, strict=False)
+        except json.JSONDecodeError:
+            value = token[1:-1]
+
+        if self._expect_key:
+            if value not in self.allowed_keys:
+                raise StreamAbort(f"Disallowed key in packet: {value!r}")
+            self._key = value
+            self._expect_key = False
+        elif self.on_field is not None and self._key is not None:
+            self.on_field(self._key, value)
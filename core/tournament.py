@@ -0,0 +1,253 @@
+"""
+Tournament runner: every pair of personas, over a whole file of scenarios.
+
+    python -m core.tournament scenarios.jsonl [--agents "Visionary,Realist"] [--concurrency 4]
+                              [--paths 500] [--out standings.json] [--matchups matchups.jsonl]
+
+Input lines use the core.batch format. For each scenario every agent's packet
+is generated once (on the async engine, bounded by LLM_MAX_INFLIGHT) and
+shared by all of that agent's matchups; a matchup is played as soon as both
+of its packets exist. A matchup scores the two packets with score_futures and
+runs simulate_monte_carlo on just that pair; the share of paths each side
+finishes ahead is its result (1 = clean win, 0.5 = draw). Win counts and Elo
+ratings are updated as each matchup finishes, and progress is printed to
+stderr every --report-every seconds. Matchups involving a Fallback packet
+are voided rather than scored.
+"""
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+
+from core import metrics
+from core import resilience
+from core.agents import AGENTS, generate_agent_future_async
+from core.batch import iter_scenarios
+from core.scoring import score_futures
+from core.simulation import simulate_monte_carlo
+
+ELO_START = 1500.0
+ELO_K = 24.0
+
+
+class Standings:
+    """Win/draw/loss counts and Elo ratings, updated one matchup at a time."""
+
+    def __init__(self, names: list, start: float = ELO_START, k: float = ELO_K):
+        self.k = k
+        self.rating = {n: start for n in names}
+        self.results = {n: {"played": 0, "wins": 0, "draws": 0, "losses": 0, "score": 0.0} for n in names}
+
+    def expected(self, a: str, b: str) -> float:
+        return 1.0 / (1.0 + 10 ** ((self.rating[b] - self.rating[a]) / 400.0))
+
+    def record(self, a: str, b: str, score_a: float) -> None:
+        """score_a in [0, 1]: a's share of the matchup (b gets 1 - score_a)."""
+        delta = self.k * (score_a - self.expected(a, b))
+        self.rating[a] += delta
+        self.rating[b] -= delta
+        for name, score in ((a, score_a), (b, 1.0 - score_a)):
+            r = self.results[name]
+            r["played"] += 1
+            r["score"] += score
+            if score > 0.5:
+                r["wins"] += 1
+            elif score < 0.5:
+                r["losses"] += 1
+            else:
+                r["draws"] += 1
+
+    def leader(self):
+        return max(self.rating, key=self.rating.get) if self.rating else None
+
+    def table(self) -> list:
+        """Rows sorted by Elo, best first."""
+        rows = [
+            {"agent": n, "elo": round(self.rating[n], 1), **self.results[n],
+             "score": round(self.results[n]["score"], 3)}
+            for n in self.rating
+        ]
+        return sorted(rows, key=lambda r: r["elo"], reverse=True)
+
+
+def matchup_seed(sid: str, a: str, b: str) -> int:
+    return int(hashlib.sha1(f"{sid}\0{a}\0{b}".encode("utf-8")).hexdigest()[:8], 16)
+
+
+def play_matchup(sid: str, fa: dict, fb: dict, steps: int = 24, n_paths: int = 500) -> float:
+    """a's share of simulated paths in which it finishes ahead of b."""
+    scores = score_futures([fa, fb])
+    sim = simulate_monte_carlo(scores, steps=steps, n_paths=n_paths,
+                               seed=matchup_seed(sid, fa["name"], fb["name"]))
+    return sim["win_prob"][fa["name"]]
+
+
+class Progress:
+    def __init__(self, scenarios: int, packets: int, matchups: int):
+        self.total = {"scenarios": scenarios, "packets": packets, "matchups": matchups}
+        self.done = {"scenarios": 0, "packets": 0, "matchups": 0, "void": 0}
+        self.t0 = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def line(self, standings: Standings) -> str:
+        elapsed = max(self.elapsed(), 1e-9)
+        played = self.done["matchups"] + self.done["void"]
+        rate = played / elapsed
+        eta = (self.total["matchups"] - played) / rate if rate else float("inf")
+        leader = standings.leader()
+        return (
+            f"scenarios {self.done['scenarios']}/{self.total['scenarios']}"
+            f"  packets {self.done['packets']}/{self.total['packets']} ({self.done['packets'] / elapsed:.1f}/s)"
+            f"  matchups {played}/{self.total['matchups']} ({rate:.1f}/s)"
+            f"  eta {eta:.0f}s  leader {leader} ({standings.rating[leader]:.0f})"
+        )
+
+
+async def run_scenario(sid: str, scenario: str, agents: list, standings: Standings, progress: Progress,
+                       steps: int, n_paths: int, on_matchup=None) -> None:
+    """Generate each agent's packet once; play each pair as soon as both packets are in."""
+    deadline = resilience.run_deadline()  # one budget for the scenario's packets, as in a panel run
+    tasks = {asyncio.create_task(generate_agent_future_async(a, scenario, deadline=deadline)): a["name"]
+             for a in agents}
+    ready = {}
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            packet = await next_done
+            progress.done["packets"] += 1
+            metrics.inc("tournament_packets_total", source=packet.get("source", ""))
+            for other, other_packet in ready.items():
+                a, b = sorted((packet["name"], other))
+                fa, fb = (packet, other_packet) if a == packet["name"] else (other_packet, packet)
+                if fa.get("source") == "Fallback" or fb.get("source") == "Fallback":
+                    progress.done["void"] += 1
+                    metrics.inc("tournament_matchups_total", result="void")
+                    continue
+                score_a = play_matchup(sid, fa, fb, steps, n_paths)
+                standings.record(a, b, score_a)
+                progress.done["matchups"] += 1
+                metrics.inc("tournament_matchups_total", result="played")
+                if on_matchup is not None:
+                    on_matchup({"scenario_id": sid, "a": a, "b": b, "score_a": score_a})
+            ready[packet["name"]] = packet
+    finally:
+        for task in tasks:
+            task.cancel()
+    progress.done["scenarios"] += 1
+
+
+async def _report(progress: Progress, standings: Standings, every: float, log) -> None:
+    while True:
+        await asyncio.sleep(every)
+        print(progress.line(standings), file=log)
+
+
+async def run_tournament(input_path: str, agent_names: list = None, concurrency: int = 4,
+                         steps: int = 24, n_paths: int = 500, report_every: float = 5.0,
+                         on_matchup=None, log=sys.stderr) -> dict:
+    agents = [a for a in AGENTS if not agent_names or a["name"] in agent_names]
+    missing = set(agent_names or ()) - {a["name"] for a in agents}
+    if missing:
+        raise ValueError(f"unknown agents: {', '.join(sorted(missing))}")
+    if len(agents) < 2:
+        raise ValueError("a tournament needs at least two agents")
+
+    scenarios, seen = [], set()
+    for sid, scenario in iter_scenarios(input_path):
+        if sid not in seen:  # duplicate ids in the input run once
+            seen.add(sid)
+            scenarios.append((sid, scenario))
+
+    pairs = len(agents) * (len(agents) - 1) // 2
+    standings = Standings([a["name"] for a in agents])
+    progress = Progress(len(scenarios), len(scenarios) * len(agents), len(scenarios) * pairs)
+    reporter = asyncio.create_task(_report(progress, standings, report_every, log))
+    pending = set()
+    failed = 0
+
+    def collect(finished):
+        nonlocal failed
+        for task in finished:
+            try:
+                task.result()
+            except Exception as e:
+                failed += 1
+                print(f"scenario failed: {type(e).__name__}: {e}", file=log)
+
+    try:
+        for sid, scenario in scenarios:
+            if len(pending) >= concurrency:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                collect(finished)
+            pending.add(asyncio.create_task(
+                run_scenario(sid, scenario, agents, standings, progress, steps, n_paths, on_matchup)
+            ))
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            collect(finished)
+    finally:
+        reporter.cancel()
+        for task in pending:
+            task.cancel()
+
+    elapsed = progress.elapsed()
+    print(progress.line(standings), file=log)
+    return {
+        "scenarios": progress.done["scenarios"],
+        "failed": failed,
+        "packets": progress.done["packets"],
+        "matchups": progress.done["matchups"],
+        "void": progress.done["void"],
+        "seconds": round(elapsed, 2),
+        "packets_per_second": round(progress.done["packets"] / elapsed, 2) if elapsed else None,
+        "matchups_per_second": round(progress.done["matchups"] / elapsed, 2) if elapsed else None,
+        "standings": standings.table(),
+        "metrics": metrics.export(),
+    }
+
+
+def print_standings(rows: list, out=sys.stdout) -> None:
+    print(f"{'#':>3}  {'agent':<20}{'elo':>8}{'played':>8}{'W':>6}{'D':>6}{'L':>6}{'score':>9}", file=out)
+    for i, r in enumerate(rows, 1):
+        print(f"{i:>3}  {r['agent']:<20}{r['elo']:>8.1f}{r['played']:>8}{r['wins']:>6}{r['draws']:>6}"
+              f"{r['losses']:>6}{r['score']:>9.2f}", file=out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Round-robin Alternate personas over a JSONL file of scenarios.")
+    ap.add_argument("input", help="JSONL file, one scenario per line")
+    ap.add_argument("--agents", help="comma-separated agent names (default: the whole panel)")
+    ap.add_argument("--concurrency", type=int, default=4, help="scenarios in flight at once")
+    ap.add_argument("--steps", type=int, default=24)
+    ap.add_argument("--paths", type=int, default=500, help="Monte Carlo paths per matchup")
+    ap.add_argument("--report-every", type=float, default=5.0, help="seconds between progress lines")
+    ap.add_argument("--out", help="write the summary (standings + metrics) as JSON here")
+    ap.add_argument("--matchups", help="append one JSON line per played matchup here")
+    args = ap.parse_args(argv)
+
+    names = [n.strip() for n in args.agents.split(",") if n.strip()] if args.agents else None
+    matchup_log = open(args.matchups, "a", encoding="utf-8") if args.matchups else None
+    on_matchup = (lambda row: matchup_log.write(json.dumps(row) + "\n")) if matchup_log else None
+    try:
+        summary = asyncio.run(run_tournament(
+            args.input, names, concurrency=args.concurrency, steps=args.steps, n_paths=args.paths,
+            report_every=args.report_every, on_matchup=on_matchup,
+        ))
+    except KeyboardInterrupt:
+        print("interrupted", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if matchup_log is not None:
+            matchup_log.close()
+
+    print_standings(summary["standings"])
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()